@@ -5,8 +5,7 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from wordcloud import STOPWORDS
 
 from community_detection import Utils
-from community_detection.Utils import get_vertex_ids_in_each_community, get_user_ids_from_vertex_ids, \
-    get_tweet_texts_belonging_to_user_ids
+from community_detection.CommunityIndex import CommunityIndex
 from sentiment_analysis.preprocessing.PreProcessing import preprocess_strings
 from twitter_data.database import DBUtils
 
@@ -36,14 +35,14 @@ def get_top_keywords_from_documents(documents, TOP_N_KEYWORDS=20):
         return ""
 
 
-def get_top_keywords_per_community(graph, membership, tweet_objects, preprocessors=[]):
+def get_top_keywords_per_community(graph, membership, tweet_objects, preprocessors=[], community_index=None):
+    if community_index is None:
+        community_index = CommunityIndex(graph, membership, tweet_objects)
 
     keyword_list = []
-    vertex_ids_per_community = get_vertex_ids_in_each_community(graph, membership)
 
-    for community_num, vertex_ids in enumerate(vertex_ids_per_community):
-        user_ids_str = get_user_ids_from_vertex_ids(graph, vertex_ids)
-        tweet_texts = get_tweet_texts_belonging_to_user_ids(tweet_objects, user_ids_str)
+    for community_num in community_index.get_communities():
+        tweet_texts = community_index.get_tweet_texts(community_num)
         tweet_texts = preprocess_strings(tweet_texts, preprocessors)
         keyword_list.append((community_num, get_top_keywords_from_documents(tweet_texts)))
 
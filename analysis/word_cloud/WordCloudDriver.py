@@ -13,8 +13,8 @@ from community_detection.Utils import get_vertex_ids_in_each_community, get_user
 from sentiment_analysis.preprocessing.PreProcessing import preprocess_strings
 
 
-def generate_word_cloud_per_community(graph, membership, tweet_objects, base_file_name, preprocessors=[]):
-    texts_per_community = get_texts_per_community(graph, membership, tweet_objects, preprocessors)
+def generate_word_cloud_per_community(graph, membership, tweet_objects, base_file_name, preprocessors=[], community_index=None):
+    texts_per_community = get_texts_per_community(graph, membership, tweet_objects, preprocessors, community_index=community_index)
     texts_per_community = [" ".join(texts) for texts in texts_per_community] # convert to list of strings
 
     brexit_coloring = numpy.array(Image.open("C:/Users/user/PycharmProjects/ms-thesis/uk_flag.png"))
@@ -37,8 +37,8 @@ def generate_word_cloud_per_community(graph, membership, tweet_objects, base_fil
 
 
 
-def generate_tfidf_word_cloud_per_community(graph, membership, tweet_objects, base_file_name, preprocessors=[]):
-    texts_per_community = get_texts_per_community(graph, membership, tweet_objects, preprocessors)
+def generate_tfidf_word_cloud_per_community(graph, membership, tweet_objects, base_file_name, preprocessors=[], community_index=None):
+    texts_per_community = get_texts_per_community(graph, membership, tweet_objects, preprocessors, community_index=community_index)
     texts_per_community = [" ".join(texts) for texts in texts_per_community] # convert to list of strings
     tokens_per_community = [text.split() for text in texts_per_community]
     tfidf_model, corpus, dictionary = generate_tfidf_corpus_dictionary(tokens_per_community)
@@ -0,0 +1,160 @@
+import abc
+
+import numpy
+
+
+# Sparsification of a weighted graph before community detection. An extractor decides which edges to keep; the
+# backbone keeps all vertices (so memberships stay aligned with the vertex ids of the full graph) and only the kept
+# edges. Each extractor keeps a report of how many edges and how much weight it removed.
+
+class BackboneExtractor(object):
+
+    def __init__(self, weights="weight"):
+        # name of the edge attribute holding the weights, every edge weighs 1 if the graph does not have it
+        self.weights = weights
+        self.report = {}
+
+    @abc.abstractmethod
+    def get_kept_edges(self, graph, weights):
+        """
+        :param graph: graph to be sparsified
+        :param weights: numpy array of edge weights aligned with graph.es
+        :return: boolean numpy array aligned with graph.es, True for the edges in the backbone
+        """
+
+    @abc.abstractmethod
+    def get_name(self):
+        """
+        :return: short name describing the extractor
+        """
+
+    def get_weights(self, graph):
+        if self.weights is None or self.weights not in graph.es.attributes():
+            return numpy.ones(graph.ecount())
+        return numpy.array(graph.es[self.weights], dtype=numpy.float64)
+
+    def extract(self, graph):
+        weights = self.get_weights(graph)
+        kept_edges = self.get_kept_edges(graph, weights) if graph.ecount() > 0 else numpy.zeros(0, dtype=bool)
+        backbone = graph.subgraph_edges(numpy.flatnonzero(kept_edges).tolist(), delete_vertices=False)
+
+        self.report = {"extractor": self.get_name(),
+                       "edges_before": graph.ecount(),
+                       "edges_after": backbone.ecount(),
+                       "weight_before": float(weights.sum()),
+                       "weight_after": float(weights[kept_edges].sum())}
+        return backbone
+
+    def get_report_string(self):
+        if not self.report:
+            return "{}: not applied".format(self.get_name())
+        return "{}: removed {}/{} edges, kept {} edges and {:.1f}% of the weight".format(
+            self.report["extractor"], self.report["edges_before"] - self.report["edges_after"],
+            self.report["edges_before"], self.report["edges_after"],
+            100.0 * self.report["weight_after"] / self.report["weight_before"] if self.report["weight_before"] else 0)
+
+
+# disparity filter (Serrano et al. 2009): keeps the edges that are significant at level alpha for at least one
+# endpoint compared to spreading the strength of the endpoint uniformly over its edges. Directed edges are tested
+# against the out-strength of their source and the in-strength of their target. Edges of degree 1 vertices are kept.
+class DisparityFilter(BackboneExtractor):
+
+    def __init__(self, alpha=0.05, weights="weight"):
+        BackboneExtractor.__init__(self, weights)
+        self.alpha = alpha
+
+    def get_kept_edges(self, graph, weights):
+        edges = numpy.array(graph.get_edgelist(), dtype=numpy.int64)
+        sources = edges[:, 0]
+        targets = edges[:, 1]
+        weight_list = weights.tolist()
+
+        if graph.is_directed():
+            source_strengths = numpy.array(graph.strength(mode="out", weights=weight_list))[sources]
+            source_degrees = numpy.array(graph.degree(mode="out"))[sources]
+            target_strengths = numpy.array(graph.strength(mode="in", weights=weight_list))[targets]
+            target_degrees = numpy.array(graph.degree(mode="in"))[targets]
+        else:
+            strengths = numpy.array(graph.strength(weights=weight_list))
+            degrees = numpy.array(graph.degree())
+            source_strengths, source_degrees = strengths[sources], degrees[sources]
+            target_strengths, target_degrees = strengths[targets], degrees[targets]
+
+        return self.is_significant(weights, source_strengths, source_degrees) | \
+               self.is_significant(weights, target_strengths, target_degrees)
+
+    def is_significant(self, weights, strengths, degrees):
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            p_values = numpy.power(1 - weights / strengths, degrees - 1)
+        return (degrees <= 1) | (p_values < self.alpha)
+
+    def get_name(self):
+        return "disparity filter (alpha={})".format(self.alpha)
+
+
+# keeps the k heaviest edges of every vertex; an edge stays if it is among the k heaviest of either endpoint,
+# ties are broken by edge id
+class TopKEdgesPerVertex(BackboneExtractor):
+
+    def __init__(self, k=5, weights="weight"):
+        BackboneExtractor.__init__(self, weights)
+        self.k = k
+
+    def get_kept_edges(self, graph, weights):
+        edges = numpy.array(graph.get_edgelist(), dtype=numpy.int64)
+        edge_ids = numpy.arange(len(edges))
+
+        # every edge once per endpoint, ordered by vertex and decreasing weight
+        vertices = numpy.concatenate([edges[:, 0], edges[:, 1]])
+        endpoint_edge_ids = numpy.concatenate([edge_ids, edge_ids])
+        endpoint_weights = numpy.concatenate([weights, weights])
+        order = numpy.lexsort((endpoint_edge_ids, -endpoint_weights, vertices))
+        vertices = vertices[order]
+        endpoint_edge_ids = endpoint_edge_ids[order]
+
+        # rank of every edge among the edges of the vertex
+        group_starts = numpy.flatnonzero(numpy.concatenate([[True], vertices[1:] != vertices[:-1]]))
+        group_sizes = numpy.diff(numpy.concatenate([group_starts, [len(vertices)]]))
+        ranks = numpy.arange(len(vertices)) - numpy.repeat(group_starts, group_sizes)
+
+        kept_edges = numpy.zeros(len(edges), dtype=bool)
+        kept_edges[endpoint_edge_ids[ranks < self.k]] = True
+        return kept_edges
+
+    def get_name(self):
+        return "top {} edges per vertex".format(self.k)
+
+
+# keeps the edges whose weight is at least the given quantile of all edge weights
+class WeightQuantileFilter(BackboneExtractor):
+
+    def __init__(self, quantile=0.5, weights="weight"):
+        BackboneExtractor.__init__(self, weights)
+        self.quantile = quantile
+
+    def get_kept_edges(self, graph, weights):
+        return weights >= numpy.percentile(weights, 100.0 * self.quantile)
+
+    def get_name(self):
+        return "weight quantile {}".format(self.quantile)
+
+
+# modularity of a membership found on the backbone, on the backbone and on the full graph; with a reference
+# membership (e.g. from detection on the full graph) its modularity on the full graph is compared too
+def get_modularity_change(graph, backbone, membership, weights="weight", reference_membership=None):
+    graph_weights = graph.es[weights] if weights in graph.es.attributes() else None
+    backbone_weights = backbone.es[weights] if weights in backbone.es.attributes() else None
+    modularity_change = {"backbone_modularity": backbone.modularity(membership, weights=backbone_weights),
+                         "full_graph_modularity": graph.modularity(membership, weights=graph_weights)}
+    if reference_membership is not None:
+        modularity_change["reference_modularity"] = graph.modularity(reference_membership, weights=graph_weights)
+    return modularity_change
+
+
+def get_modularity_change_string(modularity_change):
+    string = "Weighted modularity on the backbone: {}, on the full graph: {}".format(
+        modularity_change["backbone_modularity"], modularity_change["full_graph_modularity"])
+    if "reference_modularity" in modularity_change:
+        string += ", of the reference membership on the full graph: {}".format(
+            modularity_change["reference_modularity"])
+    return string
@@ -0,0 +1,639 @@
+import abc
+import math
+import multiprocessing
+import random
+import sys
+import time
+
+import igraph
+from igraph import Graph, VertexClustering
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows; peak memory is then not reported
+    resource = None
+
+
+# Community detection algorithms behind one interface. A detector takes a graph and returns a membership list
+# aligned with the vertex ids. Each run keeps a report with the wall time, the peak memory of the process,
+# the number of communities and the modularity, so algorithms can be compared per dataset.
+# Detectors are registered by name in COMMUNITY_DETECTORS; use get_community_detector to create one.
+# run_trials runs independent seeded trials of a detector in a process pool and keeps the best one.
+# run_warm_started seeds a detector with the membership of a previous run on a smaller version of the graph.
+# run_per_component detects the communities of every connected component separately, in a process pool.
+# fold_vertices removes degree-1 (and degree-2 chain) vertices before detection; unfold_membership puts them back.
+
+class CommunityDetector(object):
+
+    def __init__(self, weights="weight"):
+        # name of the edge attribute holding the weights, None for unweighted detection
+        self.weights = weights
+        self.report = {}
+
+    @abc.abstractmethod
+    def detect(self, graph, weights):
+        """
+        :param graph: graph whose communities are detected
+        :param weights: list of edge weights aligned with graph.es or None
+        :return: igraph VertexClustering of the graph
+        """
+
+    @abc.abstractmethod
+    def get_name(self):
+        """
+        :return: short name describing the detector
+        """
+
+    # detection starting from initial_membership; detectors that cannot be seeded detect from scratch
+    def detect_from(self, graph, weights, initial_membership):
+        return self.detect(graph, weights)
+
+    def get_weights(self, graph):
+        if self.weights is None or self.weights not in graph.es.attributes():
+            return None
+        return graph.es[self.weights]
+
+    def run(self, graph, initial_membership=None):
+        weights = self.get_weights(graph)
+
+        start_time = time.time()
+        if initial_membership is None:
+            clustering = self.detect(graph, weights)
+        else:
+            clustering = self.detect_from(graph, weights, initial_membership)
+        wall_time = time.time() - start_time
+
+        membership = clustering.membership
+        self.report = {"detector": self.get_name(),
+                       "num_vertices": graph.vcount(),
+                       "num_edges": graph.ecount(),
+                       "wall_time": wall_time,
+                       "peak_memory_mb": get_peak_memory_mb(),
+                       "num_communities": max(membership) + 1 if membership else 0,
+                       "modularity": graph.modularity(membership),
+                       "weighted_modularity": graph.modularity(membership, weights=weights),
+                       "codelength": getattr(clustering, "codelength", None)}
+        return membership
+
+    def get_report_string(self):
+        if not self.report:
+            return "{}: not run".format(self.get_name())
+        peak_memory = self.report["peak_memory_mb"]
+        return "{}: {} communities in {:.2f}s, peak memory {}. Modularity: {}, weighted modularity: {}".format(
+            self.report["detector"], self.report["num_communities"], self.report["wall_time"],
+            "{:.1f} MB".format(peak_memory) if peak_memory is not None else "n/a",
+            self.report["modularity"], self.report["weighted_modularity"])
+
+    # quality of a run report; higher is better
+    def get_quality(self, report):
+        return report["weighted_modularity"]
+
+
+class InfomapDetector(CommunityDetector):
+
+    def __init__(self, weights="weight", trials=10):
+        CommunityDetector.__init__(self, weights)
+        self.trials = trials
+
+    def detect(self, graph, weights):
+        return graph.community_infomap(edge_weights=weights, trials=self.trials)
+
+    def get_name(self):
+        return "infomap"
+
+    # infomap minimizes the codelength
+    def get_quality(self, report):
+        return -report["codelength"]
+
+
+class LabelPropagationDetector(CommunityDetector):
+
+    def detect(self, graph, weights):
+        return graph.community_label_propagation(weights=weights)
+
+    def detect_from(self, graph, weights, initial_membership):
+        return graph.community_label_propagation(weights=weights, initial=initial_membership)
+
+    def get_name(self):
+        return "label_propagation"
+
+
+# the following algorithms only work on undirected graphs; directed graphs are collapsed first, summing the
+# weights of reciprocal edges
+
+class MultilevelDetector(CommunityDetector):
+
+    def detect(self, graph, weights):
+        undirected_graph, weights = get_undirected_graph(graph, weights)
+        return undirected_graph.community_multilevel(weights=weights)
+
+    # multilevel cannot be seeded directly, so it starts from the graph with the initial communities contracted
+    # into single vertices; initial communities can be merged but not split
+    def detect_from(self, graph, weights, initial_membership):
+        undirected_graph, weights = get_undirected_graph(graph, weights)
+        contracted_graph = Graph(n=undirected_graph.vcount(), edges=undirected_graph.get_edgelist())
+        contracted_graph.es["weight"] = weights if weights is not None else 1
+        contracted_graph.contract_vertices(initial_membership)
+        contracted_graph.simplify(multiple=True, loops=False, combine_edges={"weight": "sum"})
+        contracted_membership = contracted_graph.community_multilevel(weights=contracted_graph.es["weight"]).membership
+        return VertexClustering(graph, [contracted_membership[community] for community in initial_membership])
+
+    def get_name(self):
+        return "multilevel"
+
+
+class LeadingEigenvectorDetector(CommunityDetector):
+
+    def detect(self, graph, weights):
+        undirected_graph, weights = get_undirected_graph(graph, weights)
+        return undirected_graph.community_leading_eigenvector(weights=weights)
+
+    def get_name(self):
+        return "leading_eigenvector"
+
+
+# community_leiden takes resolution_parameter in python-igraph 0.8 and 0.9; 0.10 renamed it to resolution
+LEIDEN_RESOLUTION_KEYWORD = "resolution" if tuple(int(part) for part in igraph.__version__.split(".")[:2]) >= (0, 10) \
+    else "resolution_parameter"
+
+
+class LeidenDetector(CommunityDetector):
+
+    def __init__(self, weights="weight", resolution=1, n_iterations=2):
+        CommunityDetector.__init__(self, weights)
+        self.resolution = resolution
+        self.n_iterations = n_iterations
+
+    def detect(self, graph, weights):
+        undirected_graph, weights = get_undirected_graph(graph, weights)
+        return undirected_graph.community_leiden(objective_function="modularity", weights=weights,
+                                                 n_iterations=self.n_iterations,
+                                                 **{LEIDEN_RESOLUTION_KEYWORD: self.resolution})
+
+    def detect_from(self, graph, weights, initial_membership):
+        undirected_graph, weights = get_undirected_graph(graph, weights)
+        return undirected_graph.community_leiden(objective_function="modularity", weights=weights,
+                                                 n_iterations=self.n_iterations, initial_membership=initial_membership,
+                                                 **{LEIDEN_RESOLUTION_KEYWORD: self.resolution})
+
+    def get_name(self):
+        return "leiden"
+
+
+COMMUNITY_DETECTORS = {"infomap": InfomapDetector,
+                       "multilevel": MultilevelDetector,
+                       "louvain": MultilevelDetector,
+                       "label_propagation": LabelPropagationDetector,
+                       "leading_eigenvector": LeadingEigenvectorDetector}
+
+# Leiden is only available in python-igraph 0.8 and later (see LEIDEN_RESOLUTION_KEYWORD)
+if hasattr(Graph, "community_leiden"):
+    COMMUNITY_DETECTORS["leiden"] = LeidenDetector
+
+
+def get_community_detector(name, **params):
+    detector_class = COMMUNITY_DETECTORS.get(name, None)
+    if detector_class is None:
+        raise ValueError("Unknown community detector {}. Available: {}".format(
+            name, ", ".join(sorted(COMMUNITY_DETECTORS.keys()))))
+    return detector_class(**params)
+
+
+### MULTIPLE TRIALS ###
+# The graph is handed to the workers once as an edge list with the weights through the pool initializer; each
+# worker rebuilds it on its first trial. Trial i seeds the random number generator used by igraph with seed + i,
+# so the result only depends on the seed and the number of trials, not on the number of workers. The random state of
+# the calling process is restored after the trials that run in it.
+# Like ExperimentGrid, the pools need the fork start method, so the calling script is not imported again by the
+# workers; without it (Windows) the trials and components run one after the other in this process.
+
+_worker_state = {}
+
+
+def _init_worker(state):
+    _worker_state.clear()
+    _worker_state.update(state)
+
+
+def _run_trial(trial):
+    graph = _worker_state.get("graph", None)
+    if graph is None:
+        graph = Graph(n=_worker_state["num_vertices"], edges=_worker_state["edges"],
+                      directed=_worker_state["directed"])
+        if _worker_state["weights"] is not None:
+            graph.es[_worker_state["detector"].weights] = _worker_state["weights"]
+        _worker_state["graph"] = graph
+
+    detector = _worker_state["detector"]
+    random_state = random.getstate()
+    random.seed(_worker_state["seed"] + trial)
+    try:
+        membership = detector.run(graph)
+    finally:
+        random.setstate(random_state)
+    return membership, detector.report
+
+
+def run_trials(detector, graph, num_trials, num_workers=None, seed=0):
+    state = {"num_vertices": graph.vcount(),
+             "edges": graph.get_edgelist(),
+             "directed": graph.is_directed(),
+             "weights": detector.get_weights(graph),
+             "detector": detector,
+             "seed": seed}
+    trials = range(num_trials)
+
+    if num_workers is None:
+        num_workers = multiprocessing.cpu_count()
+
+    if num_workers <= 1 or num_trials <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        state["graph"] = graph
+        _init_worker(state)
+        try:
+            results = [_run_trial(trial) for trial in trials]
+        finally:
+            _worker_state.clear()
+    else:
+        pool = multiprocessing.get_context("fork").Pool(min(num_workers, num_trials), initializer=_init_worker,
+                                                        initargs=(state,))
+        try:
+            results = pool.map(_run_trial, trials)
+        finally:
+            pool.close()
+            pool.join()
+
+    # the first trial wins ties
+    best_trial = 0
+    for trial, (membership, report) in enumerate(results):
+        if detector.get_quality(report) > detector.get_quality(results[best_trial][1]):
+            best_trial = trial
+
+    best_membership, best_report = results[best_trial]
+    detector.report = dict(best_report)
+    detector.report["trials"] = get_trials_report(results, best_trial, seed)
+    return best_membership
+
+
+# spread of the quality measures over the trials
+def get_trials_report(results, best_trial, seed):
+    trials_report = {"num_trials": len(results), "best_trial": best_trial, "seed": seed,
+                     "reports": [report for membership, report in results]}
+    for measure in ["modularity", "weighted_modularity", "codelength", "num_communities", "wall_time"]:
+        values = [report[measure] for membership, report in results if report[measure] is not None]
+        if not values:
+            continue
+        mean = sum(values) / float(len(values))
+        trials_report[measure] = {"min": min(values),
+                                  "max": max(values),
+                                  "mean": mean,
+                                  "std": math.sqrt(sum((value - mean) ** 2 for value in values) / len(values))}
+    return trials_report
+
+
+def get_trials_report_string(trials_report):
+    lines = ["{} trials (seed {}), best trial: {}".format(trials_report["num_trials"], trials_report["seed"],
+                                                        trials_report["best_trial"])]
+    for measure in ["modularity", "weighted_modularity", "codelength", "num_communities", "wall_time"]:
+        spread = trials_report.get(measure, None)
+        if spread is not None:
+            lines.append("{}: min {}, max {}, mean {}, std {}".format(measure, spread["min"], spread["max"],
+                                                                     spread["mean"], spread["std"]))
+    return "\n".join(lines)
+
+
+### PER COMPONENT ###
+# Components with at most small_component_size vertices are one community each, the largest component is run in
+# this process and the others in the pool, each sent as its own edge list. The community ids are offset per
+# component in the order of the components, so they are contiguous. The random number generator is seeded with
+# seed + component before every component, so the result does not depend on the number of workers either.
+# Modularity based detectors see each component as a graph of its own, which can give slightly different (usually
+# smaller) communities than a run on the whole graph.
+
+def _run_component(seed_component_graph):
+    seed, component_graph = seed_component_graph
+    return run_component_graph(_worker_state["detector"], component_graph, _worker_state["directed"], seed)
+
+
+# (number of vertices, edge list, weights) of each component with the vertices numbered in increasing order of
+# their ids, in one pass over the edges
+def get_component_graphs(graph, membership, weights, component_ids):
+    local_ids = [0] * graph.vcount()
+    num_vertices = [0] * (max(membership) + 1 if membership else 0)
+    for vertex_id, component in enumerate(membership):
+        local_ids[vertex_id] = num_vertices[component]
+        num_vertices[component] += 1
+
+    component_edges = dict((component, []) for component in component_ids)
+    component_weights = dict((component, []) for component in component_ids)
+    for edge_id, (source, target) in enumerate(graph.get_edgelist()):
+        component = membership[source]
+        if component in component_edges:
+            component_edges[component].append((local_ids[source], local_ids[target]))
+            if weights is not None:
+                component_weights[component].append(weights[edge_id])
+
+    return [(num_vertices[component], component_edges[component],
+             component_weights[component] if weights is not None else None) for component in component_ids]
+
+
+def run_per_component(detector, graph, small_component_size=2, giant_detector=None, num_workers=None, seed=0):
+    if giant_detector is None:
+        giant_detector = detector
+    if num_workers is None:
+        num_workers = multiprocessing.cpu_count()
+
+    start_time = time.time()
+    weights = detector.get_weights(graph)
+    component_membership = graph.clusters(mode="weak").membership
+    component_sizes = [0] * (max(component_membership) + 1 if component_membership else 0)
+    for component in component_membership:
+        component_sizes[component] += 1
+
+    giant_component = component_sizes.index(max(component_sizes)) if component_sizes else None
+    medium_components = [component for component, size in enumerate(component_sizes)
+                         if size > small_component_size and component != giant_component]
+    component_graphs = get_component_graphs(graph, component_membership, weights,
+                                            medium_components + [giant_component] if component_sizes else [])
+    medium_component_graphs = [(seed + component, component_graph)
+                               for component, component_graph in zip(medium_components, component_graphs)]
+
+    directed = graph.is_directed()
+    run_giant_component = bool(component_sizes) and component_sizes[giant_component] > small_component_size
+
+    if num_workers <= 1 or not medium_components or "fork" not in multiprocessing.get_all_start_methods():
+        medium_memberships = [run_component_graph(detector, component_graph, directed, component_seed)
+                              for component_seed, component_graph in medium_component_graphs]
+        giant_membership = run_component_graph(giant_detector, component_graphs[-1], directed,
+                                               seed + giant_component) if run_giant_component else None
+    else:
+        pool = multiprocessing.get_context("fork").Pool(min(num_workers, len(medium_components)),
+                                                        initializer=_init_worker,
+                                                        initargs=({"detector": detector, "directed": directed},))
+        try:
+            # the giant component runs here while the pool works on the others
+            async_result = pool.map_async(_run_component, medium_component_graphs,
+                                          chunksize=max(1, len(medium_components) // (4 * num_workers)))
+            giant_membership = run_component_graph(giant_detector, component_graphs[-1], directed,
+                                                   seed + giant_component) if run_giant_component else None
+            medium_memberships = async_result.get()
+        finally:
+            pool.close()
+            pool.join()
+
+    # membership of every component; trivial ones are a single community
+    local_memberships = [[0] * size for size in component_sizes]
+
+    for component, local_membership in zip(medium_components, medium_memberships):
+        local_memberships[component] = local_membership
+    if giant_membership is not None:
+        local_memberships[giant_component] = giant_membership
+
+    # stitch the component memberships together, offsetting the community ids of every component
+    offsets = []
+    num_communities = 0
+    for local_membership in local_memberships:
+        offsets.append(num_communities)
+        num_communities += max(local_membership) + 1 if local_membership else 0
+
+    local_indices = [0] * len(component_sizes)
+    membership = []
+    for component in component_membership:
+        membership.append(offsets[component] + local_memberships[component][local_indices[component]])
+        local_indices[component] += 1
+
+    detector.report = {"detector": "{} per component".format(detector.get_name()),
+                       "num_vertices": graph.vcount(),
+                       "num_edges": graph.ecount(),
+                       "wall_time": time.time() - start_time,
+                       "peak_memory_mb": get_peak_memory_mb(),
+                       "num_communities": num_communities,
+                       "modularity": graph.modularity(membership),
+                       "weighted_modularity": graph.modularity(membership, weights=weights),
+                       "codelength": None,
+                       "components": {"num_components": len(component_sizes),
+                                      "num_small_components": len(component_sizes) - len(medium_components) -
+                                                              (1 if run_giant_component else 0),
+                                      "num_medium_components": len(medium_components),
+                                      "giant_component_size": max(component_sizes) if component_sizes else 0}}
+    return membership
+
+
+def run_component_graph(detector, component_graph, directed, seed):
+    num_vertices, edges, weights = component_graph
+    graph = Graph(n=num_vertices, edges=edges, directed=directed)
+    if weights is not None and detector.weights is not None:
+        graph.es[detector.weights] = weights
+    random_state = random.getstate()
+    random.seed(seed)
+    try:
+        return detector.run(graph)
+    finally:
+        random.setstate(random_state)
+
+
+def get_components_report_string(components_report):
+    return "{} components: {} small, {} detected in parallel, giant component of {} vertices".format(
+        components_report["num_components"], components_report["num_small_components"],
+        components_report["num_medium_components"], components_report["giant_component_size"])
+
+
+### FOLDING ###
+# Vertices with a single neighbour are removed before detection and get the community of that neighbour. Of two
+# vertices that only have each other, the one with the higher id is folded. With fold_chains, paths of vertices
+# with exactly two remaining neighbours are replaced by one edge between the ends of the path, weighing the
+# lightest edge on the path; each half of the path gets the community of the end it is closer to. Neighbours are
+# counted ignoring edge directions, self-loops and multiple edges.
+
+def fold_vertices(graph, fold_chains=False, weights="weight"):
+    start_time = time.time()
+    num_vertices = graph.vcount()
+    neighbours = [set(vertex_neighbours) for vertex_neighbours in graph.get_adjlist(mode="all")]
+    for vertex_id, vertex_neighbours in enumerate(neighbours):
+        vertex_neighbours.discard(vertex_id)
+
+    # vertex id -> vertex id whose community it gets, -1 if it stays in the reduced graph
+    parents = [-1] * num_vertices
+    num_folded_leaves = 0
+    for vertex_id, vertex_neighbours in enumerate(neighbours):
+        if len(vertex_neighbours) == 1:
+            neighbour = next(iter(vertex_neighbours))
+            if len(neighbours[neighbour]) == 1 and neighbour > vertex_id:
+                continue
+            parents[vertex_id] = neighbour
+            num_folded_leaves += 1
+
+    chain_edges = []
+    num_folded_chain_vertices = 0
+    if fold_chains:
+        edge_weights = graph.es[weights] if weights in graph.es.attributes() else None
+        remaining_neighbours = [[neighbour for neighbour in vertex_neighbours if parents[neighbour] == -1]
+                                if parents[vertex_id] == -1 else [] for vertex_id, vertex_neighbours in enumerate(neighbours)]
+        is_chain_vertex = [len(vertex_neighbours) == 2 for vertex_neighbours in remaining_neighbours]
+
+        for vertex_id in range(num_vertices):
+            if not is_chain_vertex[vertex_id] or parents[vertex_id] != -1:
+                continue
+
+            # walk to both ends of the path, stopping at vertices that are not chain vertices
+            path_ends = []
+            paths = []
+            for first_neighbour in remaining_neighbours[vertex_id]:
+                previous_vertex, current_vertex, path = vertex_id, first_neighbour, []
+                while is_chain_vertex[current_vertex] and current_vertex != vertex_id:
+                    path.append(current_vertex)
+                    next_vertex = [neighbour for neighbour in remaining_neighbours[current_vertex]
+                                   if neighbour != previous_vertex][0]
+                    previous_vertex, current_vertex = current_vertex, next_vertex
+                path_ends.append(current_vertex)
+                paths.append(path)
+
+            # a cycle of chain vertices has no ends to fold into
+            if path_ends[0] == vertex_id:
+                for path_vertex in paths[0]:
+                    is_chain_vertex[path_vertex] = False
+                is_chain_vertex[vertex_id] = False
+                continue
+
+            chain = paths[0][::-1] + [vertex_id] + paths[1]
+            start, end = path_ends
+            path_vertices = [start] + chain + [end]
+            for index, chain_vertex in enumerate(chain):
+                parents[chain_vertex] = start if index < (len(chain) + 1) // 2 else end
+            num_folded_chain_vertices += len(chain)
+
+            if start != end:
+                path_weights = [edge_weights[graph.get_eid(source, target, directed=False)] if edge_weights is not None else 1
+                                for source, target in zip(path_vertices[:-1], path_vertices[1:])]
+                chain_edges.append((start, end, min(path_weights)))
+
+    kept_vertex_ids = [vertex_id for vertex_id in range(num_vertices) if parents[vertex_id] == -1]
+    reduced_graph = graph.induced_subgraph(kept_vertex_ids)
+    if chain_edges:
+        reduced_ids = dict((vertex_id, reduced_id) for reduced_id, vertex_id in enumerate(kept_vertex_ids))
+        num_edges = reduced_graph.ecount()
+        reduced_graph.add_edges([(reduced_ids[start], reduced_ids[end]) for start, end, weight in chain_edges])
+        if weights in graph.es.attributes():
+            reduced_graph.es[num_edges:][weights] = [weight for start, end, weight in chain_edges]
+
+    folding_report = {"num_vertices": num_vertices,
+                      "num_edges": graph.ecount(),
+                      "num_folded_leaves": num_folded_leaves,
+                      "num_folded_chain_vertices": num_folded_chain_vertices,
+                      "reduced_num_vertices": reduced_graph.vcount(),
+                      "reduced_num_edges": reduced_graph.ecount(),
+                      "wall_time": time.time() - start_time}
+    return reduced_graph, kept_vertex_ids, parents, folding_report
+
+
+# membership aligned with the vertex ids of the full graph from the membership of the reduced graph
+def unfold_membership(reduced_membership, kept_vertex_ids, parents):
+    membership = [-1] * len(parents)
+    for vertex_id, community in zip(kept_vertex_ids, reduced_membership):
+        membership[vertex_id] = community
+
+    for vertex_id in range(len(parents)):
+        # leaves of folded chain vertices need two steps
+        path = []
+        while membership[vertex_id] == -1:
+            path.append(vertex_id)
+            vertex_id = parents[vertex_id]
+        for path_vertex in path:
+            membership[path_vertex] = membership[vertex_id]
+    return membership
+
+
+# replaces the graph measures in the report of a detector that ran on the reduced graph with those of the full graph
+def set_unfolded_report(detector, graph, membership, folding_report):
+    weights = detector.get_weights(graph)
+    detector.report["reduced_modularity"] = detector.report.get("modularity", None)
+    detector.report.update({"num_vertices": graph.vcount(),
+                            "num_edges": graph.ecount(),
+                            "num_communities": max(membership) + 1 if membership else 0,
+                            "modularity": graph.modularity(membership),
+                            "weighted_modularity": graph.modularity(membership, weights=weights),
+                            "folding": folding_report})
+
+
+def get_folding_report_string(folding_report):
+    return "Folded {} degree-1 and {} chain vertices in {:.2f}s: detected on {}/{} vertices and {}/{} edges".format(
+        folding_report["num_folded_leaves"], folding_report["num_folded_chain_vertices"], folding_report["wall_time"],
+        folding_report["reduced_num_vertices"], folding_report["num_vertices"],
+        folding_report["reduced_num_edges"], folding_report["num_edges"])
+
+
+### WARM START ###
+
+# membership of a graph that grew by appending vertices (as the update_* graph functions do), seeded from the
+# membership of the first len(previous_membership) vertices; the communities are renumbered 0..k-1 and every
+# new vertex gets a community of its own
+def extend_membership(previous_membership, num_vertices):
+    if len(previous_membership) > num_vertices:
+        raise ValueError("The previous membership has {} vertices but the graph only has {}".format(
+            len(previous_membership), num_vertices))
+
+    community_ids = {}
+    initial_membership = []
+    for community in previous_membership:
+        initial_membership.append(community_ids.setdefault(community, len(community_ids)))
+    initial_membership.extend(range(len(community_ids), len(community_ids) + num_vertices - len(previous_membership)))
+    return initial_membership
+
+
+# runs detector seeded with the previous membership and falls back to a full run of fallback_detector (detector
+# itself if None) when the weighted modularity ends up more than tolerance below that of the seed partition, or of
+# reference_modularity if given (e.g. the modularity of the last full run)
+def run_warm_started(detector, graph, previous_membership, fallback_detector=None, tolerance=0.01,
+                     reference_modularity=None):
+    initial_membership = extend_membership(previous_membership, graph.vcount())
+    seed_modularity = graph.modularity(initial_membership, weights=detector.get_weights(graph))
+    if reference_modularity is None:
+        reference_modularity = seed_modularity
+
+    membership = detector.run(graph, initial_membership=initial_membership)
+    warm_start_report = {"num_previous_vertices": len(previous_membership),
+                         "seed_modularity": seed_modularity,
+                         "reference_modularity": reference_modularity,
+                         "warm_modularity": detector.report["weighted_modularity"],
+                         "warm_wall_time": detector.report["wall_time"],
+                         "fell_back": False}
+
+    if detector.report["weighted_modularity"] < reference_modularity - tolerance:
+        if fallback_detector is None:
+            fallback_detector = detector
+        membership = fallback_detector.run(graph)
+        detector.report = dict(fallback_detector.report)
+        warm_start_report["fell_back"] = True
+
+    detector.report["warm_start"] = warm_start_report
+    return membership
+
+
+def get_warm_start_report_string(warm_start_report):
+    return "Warm start from {} vertices: seed modularity {}, warm modularity {} in {:.2f}s{}".format(
+        warm_start_report["num_previous_vertices"], warm_start_report["seed_modularity"],
+        warm_start_report["warm_modularity"], warm_start_report["warm_wall_time"],
+        ", fell back to a full run" if warm_start_report["fell_back"] else "")
+
+
+def get_undirected_graph(graph, weights):
+    if not graph.is_directed():
+        return graph, weights
+    undirected_graph = Graph(n=graph.vcount(), edges=graph.get_edgelist(), directed=True)
+    if weights is None:
+        undirected_graph.to_undirected(mode="collapse")
+        return undirected_graph, None
+    undirected_graph.es["weight"] = weights
+    undirected_graph.to_undirected(mode="collapse", combine_edges={"weight": "sum"})
+    return undirected_graph, undirected_graph.es["weight"]
+
+
+# peak resident memory of this process so far, in MB
+def get_peak_memory_mb():
+    if resource is None:
+        return None
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KB elsewhere
+    if sys.platform == "darwin":
+        return peak_memory / float(1 << 20)
+    return peak_memory / 1024.0
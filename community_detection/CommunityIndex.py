@@ -0,0 +1,69 @@
+# Lookups from a community to its vertex ids, the user ids of those vertices (vertex names) and the indices of the
+# tweets of those users, built in one pass over the vertices and one over the tweets.
+# The per-community analysis (texts, topic models, keywords, stats) uses it instead of scanning all vertices and
+# all tweets for every community.
+# Communities are numbered 0..max(membership) like get_vertex_ids_in_each_community_optimized; ids without
+# vertices are empty communities.
+
+class CommunityIndex(object):
+
+    # the vertex names of graph are user id strs; vertex_ids_per_community (lists of vertex ids) can be given
+    # instead of the membership
+    def __init__(self, graph, membership, tweets, vertex_ids_per_community=None):
+        self.tweets = tweets
+
+        if vertex_ids_per_community is None:
+            num_communities = max(membership) + 1 if len(membership) > 0 else 0
+            vertex_ids_per_community = [[] for community in range(num_communities)]
+            for vertex_id, community in enumerate(membership):
+                vertex_ids_per_community[community].append(vertex_id)
+        else:
+            vertex_ids_per_community = [sorted(set(vertex_ids)) for vertex_ids in vertex_ids_per_community]
+        self.vertex_ids_per_community = vertex_ids_per_community
+
+        names = graph.vs["name"] if graph.vcount() > 0 else []
+        self.user_ids_per_community = [[names[vertex_id] for vertex_id in vertex_ids]
+                                       for vertex_ids in self.vertex_ids_per_community]
+
+        # user id -> communities it is in, in increasing order; a user is in several communities only if more
+        # than one vertex has its id
+        user_communities = {}
+        for community, user_ids in enumerate(self.user_ids_per_community):
+            for user_id in user_ids:
+                communities = user_communities.setdefault(user_id, [])
+                if not communities or communities[-1] != community:
+                    communities.append(community)
+
+        # tweet indices in tweet order
+        self.tweet_indices_per_community = [[] for community in self.vertex_ids_per_community]
+        self.num_tweets_per_user = {}
+        for tweet_index, tweet in enumerate(tweets):
+            user_id = tweet.user.id_str
+            self.num_tweets_per_user[user_id] = self.num_tweets_per_user.get(user_id, 0) + 1
+            for community in user_communities.get(user_id, []):
+                self.tweet_indices_per_community[community].append(tweet_index)
+
+    def __len__(self):
+        return len(self.vertex_ids_per_community)
+
+    def get_communities(self):
+        return range(len(self.vertex_ids_per_community))
+
+    def get_vertex_ids(self, community):
+        return self.vertex_ids_per_community[community]
+
+    def get_user_ids(self, community):
+        return self.user_ids_per_community[community]
+
+    # user ids of the community that have at least one tweet in the dataset
+    def get_present_user_ids(self, community):
+        return [user_id for user_id in self.user_ids_per_community[community] if user_id in self.num_tweets_per_user]
+
+    def get_tweet_indices(self, community):
+        return self.tweet_indices_per_community[community]
+
+    def get_tweets(self, community):
+        return [self.tweets[tweet_index] for tweet_index in self.tweet_indices_per_community[community]]
+
+    def get_tweet_texts(self, community):
+        return [self.tweets[tweet_index].text for tweet_index in self.tweet_indices_per_community[community]]
@@ -8,7 +8,9 @@ from analysis.topic_modelling import TopicModellerFacade
 from analysis.topic_modelling.LDATopicModeller import LDATopicModeller
 from analysis.word_cloud import WordCloudDriver
 from analysis.word_cloud.WordCloudDriver import generate_word_cloud_per_community, get_texts_per_community
+from community_detection import ExperimentGrid
 from community_detection import Utils
+from community_detection.CommunityIndex import CommunityIndex
 from community_detection.weight_modification.EdgeWeightModifier import *
 from community_detection.weight_modification.user_graph_weight_modification.UserVerticesHashtagWeightModifier import \
     UserVerticesHashtagWeightModifier
@@ -75,14 +77,28 @@ user_hashtag_weight_modifier = UserVerticesHashtagWeightModifier()
 ###########################################
 ### User Network (Mentions) Experiments ###
 ###########################################
-def run_one_cycle(run_name, graph, tweet_objects, edge_weight_modifiers, topic_modelling_preprocessors=[], min_membership=100):
+# cache files in the working directory are shared by concurrent runs (see run_grid), so they are written to a
+# temporary file first and moved into place; a run never loads a partially written pickle
+def dump_pickle(obj, file_name):
+    temp_file_name = "{}.{}.tmp".format(file_name, os.getpid())
+    with open(temp_file_name, "wb") as temp_file:
+        pickle.dump(obj, temp_file)
+    os.replace(temp_file_name, file_name)
+
+
+# previous_membership_file is the .membership pickle of an earlier run on the graph before it was updated; the
+# communities are then warm-started from it, with a full run of fallback_detector if the modularity drops.
+# With a backbone_extractor (see Backbone) the communities are detected on the sparsified graph
+# The output goes to dir_name, by default a new folder named after the run and the current time
+def run_one_cycle(run_name, graph, tweet_objects, edge_weight_modifiers, topic_modelling_preprocessors=[], min_membership=100, detector="infomap", previous_membership_file=None, fallback_detector=None, backbone_extractor=None, dir_name=None):
 
     run_name = "{}-{}".format(min_membership, run_name)
 
     print("Running: "+run_name)
 
     # Create Output Folder
-    dir_name = "{}-{}".format(run_name, datetime.now().strftime("%Y-%m-%d-%H-%M-%S"))
+    if dir_name is None:
+        dir_name = "{}-{}".format(run_name, datetime.now().strftime("%Y-%m-%d-%H-%M-%S"))
     if not os.path.exists(dir_name):
         os.makedirs(dir_name)
 
@@ -96,9 +112,18 @@ def run_one_cycle(run_name, graph, tweet_objects, edge_weight_modifiers, topic_m
 
     graph.save(dir_name +"/" + run_name + "_modified.pickle")
 
+    # Backbone
+    detection_graph = graph
+    if backbone_extractor is not None:
+        detection_graph = Utils.extract_backbone(graph, backbone_extractor, general_out_file, verbose=True)
+        detection_graph.save(dir_name +"/" + run_name + "_backbone.pickle")
+
     # Community Detection
     print("Determining communities")
-    membership = Utils.determine_communities(graph, general_out_file, verbose=True)
+    previous_membership = pickle.load(open(previous_membership_file, "rb")) if previous_membership_file else None
+    membership = Utils.determine_communities(detection_graph, general_out_file, verbose=True, detector=detector, previous_membership=previous_membership, fallback_detector=fallback_detector)
+    if backbone_extractor is not None:
+        Utils.print_backbone_modularity_change(graph, detection_graph, membership, general_out_file)
     pickle.dump(membership, open(dir_name +"/" + run_name + ".membership", "wb"))
     general_out_file.flush()
 
@@ -110,9 +135,12 @@ def run_one_cycle(run_name, graph, tweet_objects, edge_weight_modifiers, topic_m
     pickle.dump(membership, open(dir_name +"/" + str(min_membership) + "_filtered.membership", "wb"))
     general_out_file.flush()
 
+    # vertex -> user -> tweet lookups shared by the per-community analysis
+    community_index = CommunityIndex(graph, membership, tweet_objects)
+
     # Raw texts
     try:
-        Utils.generate_text_for_communities(graph, membership, tweet_objects, run_name, preprocessors=[], output_dir=dir_name)
+        Utils.generate_text_for_communities(graph, membership, tweet_objects, run_name, preprocessors=[], output_dir=dir_name, community_index=community_index)
     except Exception as e:
         print(e)
     # print("Generating tf-idf word clouds")
@@ -129,7 +157,7 @@ def run_one_cycle(run_name, graph, tweet_objects, edge_weight_modifiers, topic_m
     LDA_topic_modeller = LDATopicModeller()
     topic_modelling_out_file = open("{}/{}-topic-models.txt".format(dir_name, str(min_membership)), "w", encoding="utf-8")
 
-    community_topics_tuple_list = TopicModellerFacade.construct_topic_models_for_communities(LDA_topic_modeller, graph, membership, tweet_objects, preprocessors=topic_modelling_preprocessors)
+    community_topics_tuple_list = TopicModellerFacade.construct_topic_models_for_communities(LDA_topic_modeller, graph, membership, tweet_objects, preprocessors=topic_modelling_preprocessors, community_index=community_index)
     for community, topics in community_topics_tuple_list:
         if topics is not None:
             print("Community {}:\n{}\n".format(community, topics), file=topic_modelling_out_file)
@@ -141,83 +169,181 @@ def run_one_cycle(run_name, graph, tweet_objects, edge_weight_modifiers, topic_m
 
     general_out_file.close()
 
+    return dir_name
+
+
+def get_detector_name(detector):
+    return detector if isinstance(detector, str) else detector.get_name()
 
-def run_threshold_cycle(threshold, min_membership, graph_to_load, tweet_objects, analysis_preprocessors=[]):
+
+# (threshold graph, cached unfiltered membership) of run_threshold_cycle. The cached memberships and filtered graphs
+# depend on the detector; infomap keeps the cache names from before the detector could be chosen, so existing caches
+# are still found
+def get_threshold_cache_names(threshold, graph_to_load, detector="infomap"):
+    base_graph_name = "threshold-{}-{}.pickle".format(threshold, graph_to_load)
+    detector_name = get_detector_name(detector)
+    if detector_name == "infomap":
+        return base_graph_name, "{}.membership".format(base_graph_name)
+    return base_graph_name, "{}-{}.membership".format(base_graph_name, detector_name)
+
+
+# The output goes to dir_name, by default a new folder named after the run and the current time
+def run_threshold_cycle(threshold, min_membership, graph_to_load, tweet_objects, analysis_preprocessors=[], detector="infomap", dir_name=None):
 
     run_name = "{}-{}".format(min_membership, graph_to_load)
 
     print("Running: "+run_name)
 
     # Create Output Folder
-    dir_name = "{}-{}".format(run_name, datetime.now().strftime("%Y-%m-%d-%H-%M-%S"))
+    if dir_name is None:
+        dir_name = "{}-{}".format(run_name, datetime.now().strftime("%Y-%m-%d-%H-%M-%S"))
     if not os.path.exists(dir_name):
         os.makedirs(dir_name)
 
-    try:
-
-        base_graph_name = "threshold-{}-{}.pickle".format(threshold, graph_to_load)
+    base_graph_name, base_membership_name = get_threshold_cache_names(threshold, graph_to_load, detector)
+    detector_name = get_detector_name(detector)
+    if detector_name == "infomap":
         run_name = "{}-{}".format(min_membership, base_graph_name)
-        general_out_file = open("{}/{}-general-info.txt".format(dir_name, run_name), "w")
+    else:
+        run_name = "{}-{}-{}".format(min_membership, detector_name, base_graph_name)
+    general_out_file = open("{}/{}-general-info.txt".format(dir_name, run_name), "w")
+
 
+    # load graph and membership
 
-        # load graph and membership
+    try:
+        print("Loading filtered communities")
+        graph = pickle.load(open(run_name, "rb"))
+        membership = pickle.load(open(run_name+".membership", "rb"))
+    except Exception as e:
+        print("Constructing filtered graph")
+        # no filtered communities yet, try loading unfiltered membership
+        graph = pickle.load(open(base_graph_name, "rb"))
 
         try:
-            print("Loading filtered communities")
-            graph = pickle.load(open(run_name, "rb"))
-            membership = pickle.load(open(run_name+".membership", "rb"))
+            membership = pickle.load(open(base_membership_name, "rb"))
+            modularity = graph.modularity(membership)
+            print("Modularity: {}\n".format(modularity), file=general_out_file)
         except Exception as e:
-            print("Constructing filtered graph")
-            # no filtered communities yet, try loading unfiltered membership
-            graph = pickle.load(open(base_graph_name, "rb"))
-
-            try:
-                membership = pickle.load(open(base_graph_name+".membership", "rb"))
-                modularity = graph.modularity(membership)
-                print("Modularity: {}\n".format(modularity), file=general_out_file)
-            except Exception as e:
-                print("Determining membership")
-                membership = Utils.determine_communities(graph, general_out_file, verbose=True)
-                pickle.dump(membership, open(base_graph_name+".membership", "wb"))
-
-            (graph, filtered_membership) = Utils.construct_graph_with_filtered_communities(graph, membership, min_membership)
-            print("Filtered communities: {}/{}. Graph now has {} vertices and {} edges".format(len(filtered_membership), len(membership), len(graph.vs), len(graph.es)), file=general_out_file)
-            membership = filtered_membership
-            pickle.dump(graph, open(run_name, "wb"))
-            pickle.dump(membership, open("{}.membership".format(run_name), "wb"))
-
-        print("Generating raw texts")
-        # Raw texts
-        Utils.generate_text_for_communities(graph, membership, tweet_objects, run_name, [], output_dir=dir_name)
-        general_out_file.close()
-
-        # print("Generating tf-idf word clouds")
-        # # tf-idf
-        # WordCloudDriver.generate_tfidf_word_cloud_per_community(graph,
-        #                           membership,
-        #                           tweet_objects,
-        #                           run_name,
-        #                           analysis_preprocessors)
-
-        # plot
-        # print("Plotting")
-        # CommunityViz.plot_communities(graph, "display_str", membership, run_name+".png", verbose=True)
-
-        # topic modelling
-        print("Modelling topics")
-        LDA_topic_modeller = LDATopicModeller()
-        topic_models_file = open("{}/{}-topic-models.txt".format(dir_name, run_name), "w", encoding="utf-8")
-        community_topics_tuple_list = TopicModellerFacade.construct_topic_models_for_communities(LDA_topic_modeller, graph, membership, tweet_objects, preprocessors=analysis_preprocessors)
-        topic_models_pickle_file = open("{}/{}-topic_models.pickle".format(dir_name, run_name), "wb")
-        pickle.dump(community_topics_tuple_list, topic_models_pickle_file)
-
-        for community, topics in community_topics_tuple_list:
-            if topics is not None:
-                print("Community {}:\n{}\n".format(community, topics), file=topic_models_file)
-        topic_models_file.close()
+            print("Determining membership")
+            membership = Utils.determine_communities(graph, general_out_file, verbose=True, detector=detector)
+            dump_pickle(membership, base_membership_name)
 
-    except Exception as e:
-        print(e)
+        (graph, filtered_membership) = Utils.construct_graph_with_filtered_communities(graph, membership, min_membership)
+        print("Filtered communities: {}/{}. Graph now has {} vertices and {} edges".format(len(filtered_membership), len(membership), len(graph.vs), len(graph.es)), file=general_out_file)
+        membership = filtered_membership
+        dump_pickle(graph, run_name)
+        dump_pickle(membership, "{}.membership".format(run_name))
+
+    community_index = CommunityIndex(graph, membership, tweet_objects)
+
+    print("Generating raw texts")
+    # Raw texts
+    Utils.generate_text_for_communities(graph, membership, tweet_objects, run_name, [], output_dir=dir_name, community_index=community_index)
+    general_out_file.close()
+
+    # print("Generating tf-idf word clouds")
+    # # tf-idf
+    # WordCloudDriver.generate_tfidf_word_cloud_per_community(graph,
+    #                           membership,
+    #                           tweet_objects,
+    #                           run_name,
+    #                           analysis_preprocessors)
+
+    # plot
+    # print("Plotting")
+    # CommunityViz.plot_communities(graph, "display_str", membership, run_name+".png", verbose=True)
+
+    # topic modelling
+    print("Modelling topics")
+    LDA_topic_modeller = LDATopicModeller()
+    topic_models_file = open("{}/{}-topic-models.txt".format(dir_name, run_name), "w", encoding="utf-8")
+    community_topics_tuple_list = TopicModellerFacade.construct_topic_models_for_communities(LDA_topic_modeller, graph, membership, tweet_objects, preprocessors=analysis_preprocessors, community_index=community_index)
+    topic_models_pickle_file = open("{}/{}-topic_models.pickle".format(dir_name, run_name), "wb")
+    pickle.dump(community_topics_tuple_list, topic_models_pickle_file)
+
+    for community, topics in community_topics_tuple_list:
+        if topics is not None:
+            print("Community {}:\n{}\n".format(community, topics), file=topic_models_file)
+    topic_models_file.close()
+
+    return dir_name
+
+
+def run_threshold_sweep(thresholds, min_membership, graph_to_load, tweet_objects, analysis_preprocessors=[], detector="infomap"):
+    # builds the graph of every threshold from one sort of the saved final scores, then analyzes each one
+    Utils.generate_user_mention_hashtag_sa_threshold_networks(graph_to_load, thresholds, verbose=True)
+
+    for threshold in thresholds:
+        run_threshold_cycle(threshold, min_membership, graph_to_load, tweet_objects, analysis_preprocessors=analysis_preprocessors,
+                            detector=detector)
+
+
+# Runs one configuration of an experiment grid (see ExperimentGrid). A configuration is a dict with a unique "name" and
+# "cycle": "one_cycle" with "graph" (key of shared["graphs"]), "modifiers" (keys of shared["modifiers"]) and
+# "preprocessors" (key of shared["preprocessors"]), or "threshold_cycle" with "threshold" and "graph" (the name of the
+# saved threshold graphs). Both take "min_membership" and "detector". The output of a configuration goes to the folder
+# named after it in shared["grid_dir"], so the results of an earlier run of the grid are found by name.
+def run_grid_config(config, shared):
+    preprocessors = shared["preprocessors"].get(config.get("preprocessors", None), [])
+    dir_name = "{}/{}".format(shared["grid_dir"], config["name"])
+    if config["cycle"] == "one_cycle":
+        # the modifiers change the edge weights in place
+        graph = shared["graphs"][config["graph"]].copy()
+        modifiers = [shared["modifiers"][modifier] for modifier in config.get("modifiers", [])]
+        return run_one_cycle(config["name"], graph, shared["tweets"], modifiers,
+                             topic_modelling_preprocessors=preprocessors,
+                             min_membership=config.get("min_membership", 100),
+                             detector=config.get("detector", "infomap"), dir_name=dir_name)
+    elif config["cycle"] == "threshold_cycle":
+        return run_threshold_cycle(config["threshold"], config.get("min_membership", 100), config["graph"],
+                                   shared["tweets"], analysis_preprocessors=preprocessors,
+                                   detector=config.get("detector", "infomap"), dir_name=dir_name)
+    raise ValueError("Unknown cycle {} in experiment {}".format(config["cycle"], config["name"]))
+
+
+# Determines the unfiltered membership of one threshold graph for run_threshold_cycle (see run_grid)
+def run_grid_membership(config, shared):
+    base_graph_name, base_membership_name = get_threshold_cache_names(config["threshold"], config["graph"],
+                                                                      config["detector"])
+    if os.path.exists(base_membership_name):
+        return base_membership_name
+    graph = pickle.load(open(base_graph_name, "rb"))
+    general_out_file = open(config["out_file_name"], "w")
+    membership = Utils.determine_communities(graph, general_out_file, verbose=True, detector=config["detector"])
+    general_out_file.close()
+    dump_pickle(membership, base_membership_name)
+    return base_membership_name
+
+
+# base graphs are loaded once here and shared with the forked workers. Threshold configurations of the same graph,
+# threshold and detector share the unfiltered membership, so the missing memberships are determined first, one per
+# worker, in a grid of their own in grid_dir/memberships; the configurations then load them from the cache.
+def run_grid(configs, tweet_objects, modifiers, preprocessors, grid_dir="grid", num_workers=4):
+    graph_names = set(config["graph"] for config in configs if config["cycle"] == "one_cycle")
+    graphs = dict((graph_name, pickle.load(open(graph_name+".pickle", "rb"))) for graph_name in graph_names)
+    shared = {"tweets": tweet_objects, "graphs": graphs, "modifiers": modifiers, "preprocessors": preprocessors,
+              "grid_dir": grid_dir}
+
+    membership_grid_dir = "{}/memberships".format(grid_dir)
+    membership_configs = {}
+    for config in configs:
+        if config["cycle"] != "threshold_cycle" or \
+                os.path.exists(ExperimentGrid.get_marker_file_name(grid_dir, config["name"])):
+            continue
+        detector = config.get("detector", "infomap")
+        base_graph_name, base_membership_name = get_threshold_cache_names(config["threshold"], config["graph"], detector)
+        if not os.path.exists(base_membership_name) and base_membership_name not in membership_configs:
+            membership_configs[base_membership_name] = {
+                "name": base_membership_name, "threshold": config["threshold"], "graph": config["graph"],
+                "detector": detector,
+                "out_file_name": "{}/{}-general-info.txt".format(membership_grid_dir, base_membership_name)}
+    if membership_configs:
+        ExperimentGrid.run_experiment_grid([membership_configs[name] for name in sorted(membership_configs)],
+                                           run_grid_membership, shared, grid_dir=membership_grid_dir,
+                                           num_workers=num_workers)
+
+    return ExperimentGrid.run_experiment_grid(configs, run_grid_config, shared, grid_dir=grid_dir, num_workers=num_workers)
 
 
 brexit_topic_modelling_preprocessors =  [SplitWordByWhitespace(),
@@ -244,40 +370,57 @@ brexit_hashtag_preprocessors = [SplitWordByWhitespace(),
 
 brexit_sa_preprocessors = [] # not needed anymore as pre-processing is done inside the KerasClassifier
 
-json_tweet_objects = Utils.load_tweet_objects_from_json_files("D:/DLSU/Masters/MS Thesis/data-2016/test")
-# json_tweet_ids = Utils.load_tweet_ids_from_json_files("D:/DLSU/Masters/MS Thesis/data-2016/test")
-# json_tweet_objects = DBUtils.retrieve_all_tweet_objects_from_db(json_tweet_ids, verbose=True)
-# base_graph_name = "brexit_mention_graph_modified_weights"
-# graph = Utils.generate_user_mention_network(base_graph_name, json_tweet_objects, verbose=True)
-# graph = pickle.load(open(base_graph_name+".pickle","rb"))
-
-# run_one_cycle(base_graph_name+"_with_hashtags_contextualsa_test", graph, json_tweet_objects, [user_hashtag_weight_modifier, user_keras_contextual_sa_weight_modifier], topic_modelling_preprocessors=brexit_topic_modelling_preprocessors, min_membership=300)
-# run_one_cycle(base_graph_name+"_with_hashtags_contextualsa", graph, json_tweet_objects, [user_hashtag_weight_modifier, user_keras_contextual_sa_weight_modifier], topic_modelling_preprocessors=brexit_topic_modelling_preprocessors, min_membership=300)
-# run_one_cycle(base_graph_name+"_with_hashtags_sa", graph, json_tweet_objects, [user_hashtag_weight_modifier, user_keras_sa_weight_modifier], topic_modelling_preprocessors=brexit_topic_modelling_preprocessors, min_membership=300)
-# run_one_cycle(base_graph_name+"_with_hashtags", graph, json_tweet_objects, [user_hashtag_weight_modifier],topic_modelling_preprocessors=brexit_topic_modelling_preprocessors, min_membership=300)
-# run_one_cycle(base_graph_name, graph, json_tweet_objects, [], topic_modelling_preprocessors=brexit_topic_modelling_preprocessors, min_membership=300) # mentions only
-
-# graph = pickle.load(open("100-threshold-0.05-brexit_mention_hashtag_contextualsa_graph.pickle", "rb"))
-# membership = pickle.load(open("100-threshold-0.05-brexit_mention_hashtag_contextualsa_graph.pickle.membership", "rb"))
-# print("Generating raw texts")
-# # Raw texts
-# Utils.generate_text_for_communities(graph, membership, json_tweet_objects, "100-threshold-0.05-brexit_mention_hashtag_contextualsa_graph.pickle", [])
-
-
-run_threshold_cycle(0.05, 150, "brexit_mention_hashtag_sa_graph", json_tweet_objects, analysis_preprocessors=brexit_topic_modelling_preprocessors)
-
-# base_graph_name = "brexit_no_rt_mention_hashtag_contextualsa_graph"
-# graph = Utils.generate_user_mention_hashtag_sa_network(base_graph_name, json_tweet_objects, keras_classifier_with_context, hashtag_preprocessors=brexit_hashtag_preprocessors, sa_preprocessors=brexit_sa_preprocessors, verbose=True, load_mode=False, THRESHOLD = 0.05)
-# base_graph_name = "brexit_mention_hashtag_sa_graph"
-# graph = Utils.generate_user_mention_hashtag_sa_network(base_graph_name, json_tweet_objects, keras_classifier_no_context, hashtag_preprocessors=brexit_hashtag_preprocessors, sa_preprocessors=brexit_sa_preprocessors, verbose=True, load_mode=False, THRESHOLD = 0.04)
-# # graph = Utils.generate_user_mention_hashtag_sa_network(base_graph_name, json_tweet_objects, keras_classifier_no_context, hashtag_preprocessors=brexit_hashtag_preprocessors, sa_preprocessors=brexit_sa_preprocessors, verbose=True, load_mode=True, THRESHOLD = 0.05)
-# run_threshold_cycle(0.05, 100, base_graph_name, json_tweet_objects, analysis_preprocessors=brexit_topic_modelling_preprocessors)
-
-# while(True):
-#     threshold = float(input("Threshold?"))
-#     min_membership = int(input("Min vertices in community?"))
-#     graph_to_load = input("Graph to load?")
-#     run_threshold_cycle(threshold, min_membership, graph_to_load, json_tweet_objects, analysis_preprocessors=brexit_topic_modelling_preprocessors)
+# the runs are guarded, so process pools that import this module (without fork) do not start them again
+if __name__ == "__main__":
+    json_tweet_objects = Utils.load_tweet_objects_from_json_files("D:/DLSU/Masters/MS Thesis/data-2016/test")
+    # json_tweet_ids = Utils.load_tweet_ids_from_json_files("D:/DLSU/Masters/MS Thesis/data-2016/test")
+    # json_tweet_objects = DBUtils.retrieve_all_tweet_objects_from_db(json_tweet_ids, verbose=True)
+    # base_graph_name = "brexit_mention_graph_modified_weights"
+    # graph = Utils.generate_user_mention_network(base_graph_name, json_tweet_objects, verbose=True)
+    # graph = pickle.load(open(base_graph_name+".pickle","rb"))
+
+    # run_one_cycle(base_graph_name+"_with_hashtags_contextualsa_test", graph, json_tweet_objects, [user_hashtag_weight_modifier, user_keras_contextual_sa_weight_modifier], topic_modelling_preprocessors=brexit_topic_modelling_preprocessors, min_membership=300)
+    # run_one_cycle(base_graph_name+"_with_hashtags_contextualsa", graph, json_tweet_objects, [user_hashtag_weight_modifier, user_keras_contextual_sa_weight_modifier], topic_modelling_preprocessors=brexit_topic_modelling_preprocessors, min_membership=300)
+    # run_one_cycle(base_graph_name+"_with_hashtags_sa", graph, json_tweet_objects, [user_hashtag_weight_modifier, user_keras_sa_weight_modifier], topic_modelling_preprocessors=brexit_topic_modelling_preprocessors, min_membership=300)
+    # run_one_cycle(base_graph_name+"_with_hashtags", graph, json_tweet_objects, [user_hashtag_weight_modifier],topic_modelling_preprocessors=brexit_topic_modelling_preprocessors, min_membership=300)
+    # run_one_cycle(base_graph_name, graph, json_tweet_objects, [], topic_modelling_preprocessors=brexit_topic_modelling_preprocessors, min_membership=300) # mentions only
+
+    # graph = pickle.load(open("100-threshold-0.05-brexit_mention_hashtag_contextualsa_graph.pickle", "rb"))
+    # membership = pickle.load(open("100-threshold-0.05-brexit_mention_hashtag_contextualsa_graph.pickle.membership", "rb"))
+    # print("Generating raw texts")
+    # # Raw texts
+    # Utils.generate_text_for_communities(graph, membership, json_tweet_objects, "100-threshold-0.05-brexit_mention_hashtag_contextualsa_graph.pickle", [])
+
+
+    run_threshold_cycle(0.05, 150, "brexit_mention_hashtag_sa_graph", json_tweet_objects, analysis_preprocessors=brexit_topic_modelling_preprocessors)
+
+    # brexit_grid_modifiers = {"hashtags": user_hashtag_weight_modifier,
+    #                          "sa": user_keras_sa_weight_modifier,
+    #                          "contextual_sa": user_keras_contextual_sa_weight_modifier}
+    # brexit_grid = []
+    # for min_membership in [100, 300]:
+    #     for modifier_names in [[], ["hashtags"], ["hashtags", "sa"], ["hashtags", "contextual_sa"]]:
+    #         brexit_grid.append({"name": "_".join(["brexit_mention_graph"] + modifier_names) + "-{}".format(min_membership),
+    #                             "cycle": "one_cycle", "graph": "brexit_mention_graph", "modifiers": modifier_names,
+    #                             "preprocessors": "brexit", "min_membership": min_membership})
+    #     for threshold in [0.04, 0.05]:
+    #         brexit_grid.append({"name": "threshold-{}-brexit_mention_hashtag_sa_graph-{}".format(threshold, min_membership),
+    #                             "cycle": "threshold_cycle", "threshold": threshold, "graph": "brexit_mention_hashtag_sa_graph",
+    #                             "preprocessors": "brexit", "min_membership": min_membership})
+    # run_grid(brexit_grid, json_tweet_objects, brexit_grid_modifiers, {"brexit": brexit_topic_modelling_preprocessors}, grid_dir="brexit-grid", num_workers=4)
+
+    # base_graph_name = "brexit_no_rt_mention_hashtag_contextualsa_graph"
+    # graph = Utils.generate_user_mention_hashtag_sa_network(base_graph_name, json_tweet_objects, keras_classifier_with_context, hashtag_preprocessors=brexit_hashtag_preprocessors, sa_preprocessors=brexit_sa_preprocessors, verbose=True, load_mode=False, THRESHOLD = 0.05)
+    # base_graph_name = "brexit_mention_hashtag_sa_graph"
+    # graph = Utils.generate_user_mention_hashtag_sa_network(base_graph_name, json_tweet_objects, keras_classifier_no_context, hashtag_preprocessors=brexit_hashtag_preprocessors, sa_preprocessors=brexit_sa_preprocessors, verbose=True, load_mode=False, THRESHOLD = 0.04)
+    # # graph = Utils.generate_user_mention_hashtag_sa_network(base_graph_name, json_tweet_objects, keras_classifier_no_context, hashtag_preprocessors=brexit_hashtag_preprocessors, sa_preprocessors=brexit_sa_preprocessors, verbose=True, load_mode=True, THRESHOLD = 0.05)
+    # run_threshold_cycle(0.05, 100, base_graph_name, json_tweet_objects, analysis_preprocessors=brexit_topic_modelling_preprocessors)
+
+    # while(True):
+    #     threshold = float(input("Threshold?"))
+    #     min_membership = int(input("Min vertices in community?"))
+    #     graph_to_load = input("Graph to load?")
+    #     run_threshold_cycle(threshold, min_membership, graph_to_load, json_tweet_objects, analysis_preprocessors=brexit_topic_modelling_preprocessors)
 
 # pilipinasdebates_topic_modelling_preprocessors = [SplitWordByWhitespace(),
 #                  WordToLowercase(),
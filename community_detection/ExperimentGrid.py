@@ -0,0 +1,127 @@
+import multiprocessing
+import os
+import pickle
+import time
+from datetime import datetime
+
+# Runs a list of experiment configurations (dicts with a unique "name") in a bounded process pool.
+# run_func(config, shared) runs one configuration; shared holds the read-only data of all runs (tweets, base graphs,
+# modifiers). The workers are forked after shared is set, so they read it without copying or pickling it, and every
+# configuration gets a fresh worker, so changes a run makes to the shared objects stay in that run.
+# A finished configuration leaves a marker file in grid_dir; configurations with a marker are skipped on the next
+# run of the grid. A summary table with the status, timings and output of every configuration is written to grid_dir.
+# Workers are daemonic, so run_func cannot start process pools of its own (e.g. num_workers in the detection
+# functions); without the fork start method (Windows) the configurations run one after the other.
+
+SUMMARY_FILE_NAME = "summary.tsv"
+
+_worker_state = {}
+
+
+def _init_worker(state):
+    _worker_state.clear()
+    _worker_state.update(state)
+
+
+def _run_config(config):
+    started = datetime.now()
+    start_time = time.time()
+    try:
+        output = _worker_state["run_func"](config, _worker_state["shared"])
+        status = "done"
+        error = None
+    except Exception as e:
+        output = None
+        status = "failed"
+        error = repr(e)
+
+    result = {"name": config["name"],
+              "status": status,
+              "started": started.strftime("%Y-%m-%d %H:%M:%S"),
+              "wall_time": time.time() - start_time,
+              "output": output,
+              "error": error,
+              "pid": os.getpid()}
+
+    # the marker is moved into place once complete, an interrupted write leaves no marker
+    if status == "done":
+        marker_file_name = get_marker_file_name(_worker_state["grid_dir"], config["name"])
+        with open(marker_file_name + ".tmp", "wb") as marker_file:
+            pickle.dump(result, marker_file)
+        os.replace(marker_file_name + ".tmp", marker_file_name)
+    return result
+
+
+def get_marker_file_name(grid_dir, name):
+    return "{}/{}.done".format(grid_dir, name)
+
+
+def run_experiment_grid(configs, run_func, shared, grid_dir="grid", num_workers=None, verbose=True):
+    names = [config["name"] for config in configs]
+    if len(set(names)) != len(names):
+        raise ValueError("Experiment names must be unique: {}".format(sorted(name for name in set(names)
+                                                                            if names.count(name) > 1)))
+    if not os.path.exists(grid_dir):
+        os.makedirs(grid_dir)
+    if num_workers is None:
+        num_workers = multiprocessing.cpu_count()
+
+    # configurations that finished in an earlier run of the grid keep their result
+    results = {}
+    pending_configs = []
+    for config in configs:
+        marker_file_name = get_marker_file_name(grid_dir, config["name"])
+        if os.path.exists(marker_file_name):
+            result = pickle.load(open(marker_file_name, "rb"))
+            result["status"] = "skipped"
+            results[config["name"]] = result
+        else:
+            pending_configs.append(config)
+
+    if verbose:
+        print("Experiment grid: {} configurations, {} already done".format(len(configs),
+                                                                          len(configs) - len(pending_configs)))
+
+    start_time = time.time()
+    state = {"run_func": run_func, "shared": shared, "grid_dir": grid_dir}
+    if num_workers <= 1 or len(pending_configs) <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        _init_worker(state)
+        try:
+            for config in pending_configs:
+                results[config["name"]] = _run_config(config)
+                print_progress(results[config["name"]], len(results), len(configs), verbose)
+        finally:
+            _worker_state.clear()
+    else:
+        pool = multiprocessing.get_context("fork").Pool(min(num_workers, len(pending_configs)),
+                                                        initializer=_init_worker, initargs=(state,),
+                                                        maxtasksperchild=1)
+        try:
+            for result in pool.imap_unordered(_run_config, pending_configs):
+                results[result["name"]] = result
+                print_progress(result, len(results), len(configs), verbose)
+        finally:
+            pool.close()
+            pool.join()
+
+    ordered_results = [results[name] for name in names]
+    write_summary(ordered_results, "{}/{}".format(grid_dir, SUMMARY_FILE_NAME), time.time() - start_time)
+    return ordered_results
+
+
+def print_progress(result, num_finished, num_configs, verbose):
+    if verbose:
+        print("Experiment grid: {}/{} {} {} in {:.1f}s{}".format(num_finished, num_configs, result["name"],
+                                                                result["status"], result["wall_time"],
+                                                                ": " + result["error"] if result["error"] else ""))
+
+
+def write_summary(results, summary_file_name, total_wall_time):
+    summary_file = open(summary_file_name, "w", encoding="utf-8")
+    print("Name\tStatus\tStarted\tWall time (s)\tOutput\tError", file=summary_file)
+    for result in results:
+        print("{}\t{}\t{}\t{:.1f}\t{}\t{}".format(result["name"], result["status"], result["started"],
+                                                result["wall_time"], result["output"],
+                                                result["error"] if result["error"] else ""), file=summary_file)
+    print("Total wall time (s): {:.1f}".format(total_wall_time), file=summary_file)
+    summary_file.close()
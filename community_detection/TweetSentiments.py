@@ -0,0 +1,48 @@
+from twitter_data.database import DBUtils
+
+
+# Sentiment labels are computed once per tweet and stored in a list aligned with the tweets,
+# so scoring functions can look them up by tweet index instead of classifying again.
+
+def get_conversation_context(tweet):
+    try:
+        conv_context = DBUtils.retrieve_full_conversation(tweet.in_reply_to_status_id, [])
+        return [context_tweet.text for context_tweet in conv_context]
+    except Exception as e:
+        return []
+
+
+# conversation context texts of all tweets, with the conversations fetched in bulk
+def get_conversation_contexts(tweets):
+    try:
+        conversations = DBUtils.retrieve_full_conversations([tweet.in_reply_to_status_id for tweet in tweets])
+    except Exception as e:
+        return [get_conversation_context(tweet) for tweet in tweets]
+    return [[context_tweet.text for context_tweet in conversations[tweet.in_reply_to_status_id]] for tweet in tweets]
+
+
+# returns a list with the sentiment of tweets[i] at index i; tweets not in tweet_indices are labelled None
+def classify_tweets(tweets, classifier, with_context=True, tweet_indices=None, batch_size=500, verbose=False):
+    if tweet_indices is None:
+        tweet_indices = range(len(tweets))
+    tweet_indices = list(tweet_indices)
+
+    sentiments = [None] * len(tweets)
+
+    for batch_start in range(0, len(tweet_indices), batch_size):
+        batch_indices = tweet_indices[batch_start:batch_start + batch_size]
+        tweet_texts = [tweets[index].text for index in batch_indices]
+        if with_context:
+            contextual_info_dicts = [{"conv_context": conv_context} for conv_context in
+                                     get_conversation_contexts([tweets[index] for index in batch_indices])]
+        else:
+            contextual_info_dicts = [{} for index in batch_indices]
+
+        batch_sentiments = classifier.classify_sentiments(tweet_texts, contextual_info_dicts)
+        for index, sentiment in zip(batch_indices, batch_sentiments):
+            sentiments[index] = sentiment
+
+        if verbose:
+            print("Classifying tweets: processed {}/{} tweets".format(batch_start + len(batch_indices), len(tweet_indices)))
+
+    return sentiments
@@ -1,11 +1,19 @@
 import csv
+import pickle
 import re
+from collections import Counter
 
+import numpy
 from tweepy import Status
 
+from community_detection import Backbone
+from community_detection import CommunityDetection
+from community_detection.CommunityIndex import CommunityIndex
 from community_detection.graph_construction import TweetGraphs
 from community_detection.graph_construction import MentionGraphs
+from community_detection.graph_construction import StreamingGraphs
 from community_detection.weight_modification.EdgeWeightModifier import *
+from community_detection.weight_modification.TweetFeatureIndex import TweetFeatureIndex
 from sentiment_analysis.evaluation import TSVParser
 from sentiment_analysis.preprocessing.PreProcessing import preprocess_strings
 from twitter_data.SentiTweets import SentiTweetAdapter
@@ -40,15 +48,41 @@ def generate_user_network(file_name, tweet_objects, verbose=False):
 def generate_user_mention_network(file_name, tweet_objects, verbose=False):
     return generate_network(file_name, tweet_objects,TweetGraphs.construct_user_mention_graph, verbose )
 
-def generate_user_mention_hashtag_sa_network(file_name, tweet_objects, classifier, THRESHOLD, hashtag_preprocessors=[], sa_preprocessors=[], verbose=False, load_mode=False):
+# adds a batch of new tweets to the graph saved by generate_user_mention_network
+def update_user_mention_network(file_name, tweet_objects, verbose=False):
+    GRAPH_PICKLE_FILE_NAME = file_name+".pickle"
+    G = pickle.load(open(GRAPH_PICKLE_FILE_NAME, "rb"))
+    return TweetGraphs.update_user_mention_graph(G, tweet_objects, GRAPH_PICKLE_FILE_NAME, verbose=verbose)
+
+def generate_user_mention_hashtag_sa_network(file_name, tweet_objects, classifier, THRESHOLD, hashtag_preprocessors=[], sa_preprocessors=[], verbose=False, load_mode=False, num_workers=None):
     GRAPH_PICKLE_FILE_NAME = file_name+".pickle"
     if verbose:
         print("Going to construct the graph")
     # construct graph based on user objects
-    G = MentionGraphs.construct_user_mention_hashtag_sa_graph(None, tweet_objects, classifier, GRAPH_PICKLE_FILE_NAME, THRESHOLD=THRESHOLD, hashtag_preprocessors=hashtag_preprocessors, sa_preprocessors=sa_preprocessors, verbose=verbose, load_mode=load_mode)
+    G = MentionGraphs.construct_user_mention_hashtag_sa_graph(None, tweet_objects, classifier, GRAPH_PICKLE_FILE_NAME, THRESHOLD=THRESHOLD, hashtag_preprocessors=hashtag_preprocessors, sa_preprocessors=sa_preprocessors, verbose=verbose, load_mode=load_mode, num_workers=num_workers)
+    G.save(GRAPH_PICKLE_FILE_NAME)
+    return G
+
+# streams the tweets of the json files in json_folder_path instead of loading them as tweet objects first
+def generate_user_mention_hashtag_sa_network_from_json_files(file_name, json_folder_path, classifier, THRESHOLD, sa_preprocessors=[], verbose=False, hub_guard=None):
+    GRAPH_PICKLE_FILE_NAME = file_name+".pickle"
+    tweet_files = FolderIO.get_files(json_folder_path, False, '.json')
+    G = StreamingGraphs.construct_user_mention_hashtag_sa_graph_from_json(tweet_files, classifier, GRAPH_PICKLE_FILE_NAME, THRESHOLD=THRESHOLD, sa_preprocessors=sa_preprocessors, verbose=verbose, hub_guard=hub_guard)
     G.save(GRAPH_PICKLE_FILE_NAME)
     return G
 
+# incremental version of generate_user_mention_hashtag_sa_network: the first call builds the graph and its score
+# accumulators from tweet_objects, later calls only add the new tweets to them
+def update_user_mention_hashtag_sa_network(file_name, tweet_objects, classifier, THRESHOLD, sa_preprocessors=[], verbose=False):
+    GRAPH_PICKLE_FILE_NAME = file_name+".pickle"
+    G = StreamingGraphs.update_user_mention_hashtag_sa_graph(tweet_objects, classifier, GRAPH_PICKLE_FILE_NAME, THRESHOLD=THRESHOLD, sa_preprocessors=sa_preprocessors, verbose=verbose)
+    G.save(GRAPH_PICKLE_FILE_NAME)
+    return G
+
+def generate_user_mention_hashtag_sa_threshold_networks(file_name, thresholds, verbose=False):
+    GRAPH_PICKLE_FILE_NAME = file_name+".pickle"
+    return MentionGraphs.construct_user_mention_hashtag_sa_threshold_graphs(GRAPH_PICKLE_FILE_NAME, thresholds, verbose=verbose)
+
 ###############################
 ### Tweet Network Functions ###
 ###############################
@@ -68,34 +102,130 @@ def modify_network_weights(G, file_name, tweet_objects, edge_weight_modifiers, v
     # Modify edge weights
     if verbose:
         print("Going to modify edge weights")
-    G = modify_edge_weights(G, edge_weight_modifiers, {"tweets":tweet_objects, "with_context":True}, verbose)
+    # the tweet features are extracted once and shared by all modifiers
+    params = {"tweets":tweet_objects, "with_context":True, "tweet_features":TweetFeatureIndex(tweet_objects)}
+    G = modify_edge_weights(G, edge_weight_modifiers, params, verbose)
     return G
 
+# sparsified copy of G with the same vertices, to be used for community detection
+def extract_backbone(G, backbone_extractor, out_file, verbose=False):
+    if verbose:
+        print("Going to extract the backbone: {}".format(backbone_extractor.get_name()))
+    backbone = backbone_extractor.extract(G)
+    print(backbone_extractor.get_report_string(), file=out_file)
+    if verbose:
+        print(backbone_extractor.get_report_string())
+    return backbone
+
+# how the modularity of the membership found on the backbone compares between the backbone and G
+def print_backbone_modularity_change(G, backbone, membership, out_file, reference_membership=None):
+    modularity_change = Backbone.get_modularity_change(G, backbone, membership, reference_membership=reference_membership)
+    print(Backbone.get_modularity_change_string(modularity_change), file=out_file)
+    return modularity_change
+
 ################################################
 ### Community Detection & Analysis Functions ###
 ################################################
-def determine_communities(G, out_file, verbose=False):
+# detector is a CommunityDetector or the name of one in CommunityDetection.COMMUNITY_DETECTORS. With num_trials > 1
+# the detector is run num_trials times with different seeds in num_workers processes and the best run is kept.
+# With previous_membership (the membership of the graph before vertices were appended to it) the detector is seeded
+# with it and fallback_detector does a full run if the modularity drops. With per_component the connected components
+# are detected separately in num_workers processes; components of at most small_component_size vertices are one
+# community each. With fold_leaves degree-1 vertices (and degree-2 chains with fold_chains) are left out of the
+# detection and get the community of their neighbour; the membership is still aligned with the vertices of G
+def determine_communities(G, out_file, verbose=False, detector="infomap", num_trials=1, num_workers=None, seed=0,
+                          previous_membership=None, fallback_detector=None, per_component=False,
+                          small_component_size=2, fold_leaves=False, fold_chains=False):
+    if not isinstance(detector, CommunityDetection.CommunityDetector):
+        detector = CommunityDetection.get_community_detector(detector)
+    if fallback_detector is not None and not isinstance(fallback_detector, CommunityDetection.CommunityDetector):
+        fallback_detector = CommunityDetection.get_community_detector(fallback_detector)
+
+    # Folding
+    detection_graph = G
+    if fold_leaves or fold_chains:
+        (detection_graph, kept_vertex_ids, parents, folding_report) = CommunityDetection.fold_vertices(G, fold_chains=fold_chains)
+        if previous_membership is not None:
+            # the kept vertex ids are increasing, so the previous vertices stay in front
+            previous_membership = [previous_membership[vertex_id] for vertex_id in kept_vertex_ids if vertex_id < len(previous_membership)]
+        if verbose:
+            print(CommunityDetection.get_folding_report_string(folding_report))
+
     # Community Detection
     if verbose:
-        print("Going to determine communities")
-    membership = G.community_infomap(edge_weights=G.es["weight"]).membership
+        print("Going to determine communities using {}".format(detector.get_name()))
+    if previous_membership is not None:
+        membership = CommunityDetection.run_warm_started(detector, detection_graph, previous_membership,
+                                                         fallback_detector=fallback_detector)
+    elif per_component:
+        membership = CommunityDetection.run_per_component(detector, detection_graph, small_component_size=small_component_size,
+                                                          num_workers=num_workers, seed=seed)
+    elif num_trials > 1:
+        membership = CommunityDetection.run_trials(detector, detection_graph, num_trials, num_workers=num_workers, seed=seed)
+    else:
+        membership = detector.run(detection_graph)
+
+    if detection_graph is not G:
+        membership = CommunityDetection.unfold_membership(membership, kept_vertex_ids, parents)
+        CommunityDetection.set_unfolded_report(detector, G, membership, folding_report)
 
     # Print metrics
-    modularity = G.modularity(membership)
-    print("Modularity: {}".format(modularity), file=out_file)
+    print("Modularity: {}".format(detector.report["modularity"]), file=out_file)
+    print(detector.get_report_string(), file=out_file)
+    if "trials" in detector.report:
+        print(CommunityDetection.get_trials_report_string(detector.report["trials"]), file=out_file)
+    if "components" in detector.report:
+        print(CommunityDetection.get_components_report_string(detector.report["components"]), file=out_file)
+    if "warm_start" in detector.report:
+        print(CommunityDetection.get_warm_start_report_string(detector.report["warm_start"]), file=out_file)
+    if "folding" in detector.report:
+        print(CommunityDetection.get_folding_report_string(detector.report["folding"]), file=out_file)
+    if verbose:
+        print(detector.get_report_string())
 
     return membership
 
+# runs every detector on the same graph and writes one line per detector; returns detector name -> (membership, report)
+def compare_community_detectors(G, out_file, detectors=None, verbose=False):
+    if detectors is None:
+        detectors = sorted(set(CommunityDetection.COMMUNITY_DETECTORS.keys()) - {"louvain"})
+
+    results = {}
+    print("Detector\tCommunities\tWall time (s)\tPeak memory (MB)\tModularity\tWeighted modularity", file=out_file)
+    for detector in detectors:
+        if not isinstance(detector, CommunityDetection.CommunityDetector):
+            detector = CommunityDetection.get_community_detector(detector)
+        if verbose:
+            print("Going to determine communities using {}".format(detector.get_name()))
+        membership = detector.run(G)
+        report = detector.report
+        print("{}\t{}\t{:.2f}\t{}\t{}\t{}".format(report["detector"], report["num_communities"], report["wall_time"],
+                                                 report["peak_memory_mb"], report["modularity"],
+                                                 report["weighted_modularity"]), file=out_file)
+        results[report["detector"]] = (membership, report)
+    return results
+
 def remove_communities_with_less_than_n(membership, n):
-    return [m for m in membership if membership.count(m) >= n ]
+    community_sizes = Counter(membership)
+    return [m for m in membership if community_sizes[m] >= n]
+
+# ids of the vertices in communities with at least n vertices, and their membership with the kept communities
+# renumbered 0..k-1 in the order of their original ids
+def filter_membership(membership, n):
+    membership = numpy.asarray(membership, dtype=numpy.int64)
+    if len(membership) == 0:
+        return [], []
+    community_sizes = numpy.bincount(membership)
+    kept_communities = community_sizes >= n
+    kept_vertex_ids = numpy.flatnonzero(kept_communities[membership])
+    community_ids = numpy.cumsum(kept_communities) - 1
+    return kept_vertex_ids.tolist(), community_ids[membership[kept_vertex_ids]].tolist()
 
 def construct_graph_with_filtered_communities(g, membership, min_vertices_per_community):
-    g = g.copy()
-    valid_membership = remove_communities_with_less_than_n(membership, min_vertices_per_community)
-    to_delete_ids = [v.index for v in g.vs if membership[v.index] not in valid_membership]
-    g.delete_vertices(to_delete_ids)
+    (kept_vertex_ids, filtered_membership) = filter_membership(membership, min_vertices_per_community)
+    g = g.induced_subgraph(kept_vertex_ids)
 
-    return (g, valid_membership)
+    return (g, filtered_membership)
 
 def get_communities(membership):
     return sorted(list(set(membership)))
@@ -122,9 +252,11 @@ def get_vertex_ids_in_each_community_optimized(graph, membership, verbose=False)
     return community_vertices
 
 def get_user_ids_from_vertex_ids(graph, vertex_ids):
-    return [vertex["name"] for vertex in graph.vs if vertex.index in vertex_ids]
+    names = graph.vs["name"] if graph.vcount() > 0 else []
+    return [names[vertex_id] for vertex_id in sorted(set(vertex_ids)) if 0 <= vertex_id < len(names)]
 
 def get_tweet_texts_belonging_to_user_ids(tweet_objects, user_ids_str):
+    user_ids_str = set(user_ids_str)
     return [tweet.text for tweet in tweet_objects if tweet.user.id_str in user_ids_str]
 
 
@@ -224,18 +356,20 @@ def load_non_rt_tweet_objects_from_senti_csv_files(csv_folder_path, limit=None):
 ### Utility Functions ###
 #########################
 
-def generate_stats_per_community(graph, vertex_ids_per_community, tweet_objects):
+def generate_stats_per_community(graph, vertex_ids_per_community, tweet_objects, community_index=None):
+    if community_index is None:
+        community_index = CommunityIndex(graph, None, tweet_objects, vertex_ids_per_community=vertex_ids_per_community)
+
     stats = []
-    dataset_users = [tweet.user.id_str for tweet in tweet_objects]
-    for community_num, vertex_ids in enumerate(vertex_ids_per_community):
+    for community_num in community_index.get_communities():
 
-        user_ids = get_user_ids_from_vertex_ids(graph, vertex_ids)
-        present_user_ids = [user_id for user_id in user_ids if user_id in dataset_users]
+        user_ids = community_index.get_user_ids(community_num)
+        present_user_ids = community_index.get_present_user_ids(community_num)
 
-        tweet_texts = get_tweet_texts_belonging_to_user_ids(tweet_objects, user_ids)
+        tweet_indices = community_index.get_tweet_indices(community_num)
 
         stats_string = "# of Users: {}\n# of Users who exist in the dataset: {}\n# of Tweets:{}"\
-            .format(len(user_ids), len(present_user_ids), len(tweet_texts))
+            .format(len(user_ids), len(present_user_ids), len(tweet_indices))
 
         stats.append(stats_string)
     return stats
@@ -254,12 +388,13 @@ def extract_vertices_in_communities(graph, membership):
 
     return dict
 
-def generate_text_for_communities(graph, membership, tweet_objects, base_name, preprocessors=[], output_dir="texts"):
+def generate_text_for_communities(graph, membership, tweet_objects, base_name, preprocessors=[], output_dir="texts", community_index=None):
     texts_per_community = get_texts_per_community(
         graph,
         membership,
         tweet_objects,
-        preprocessors = preprocessors
+        preprocessors = preprocessors,
+        community_index = community_index
         )
 
     for index, texts in enumerate(texts_per_community):
@@ -273,15 +408,14 @@ def generate_text_for_communities(graph, membership, tweet_objects, base_name, p
     return texts_per_community
 
 
-def get_texts_per_community(graph, membership, tweet_objects, preprocessors=[]):
+def get_texts_per_community(graph, membership, tweet_objects, preprocessors=[], community_index=None):
+    if community_index is None:
+        community_index = CommunityIndex(graph, membership, tweet_objects)
 
     texts_per_community = []
 
-    vertex_ids_per_community = get_vertex_ids_in_each_community_optimized(graph, membership)
-
-    for community_num, vertex_ids in enumerate(vertex_ids_per_community):
-        user_ids_str = get_user_ids_from_vertex_ids(graph, vertex_ids)
-        tweet_texts = get_tweet_texts_belonging_to_user_ids(tweet_objects, user_ids_str)
+    for community_num in community_index.get_communities():
+        tweet_texts = community_index.get_tweet_texts(community_num)
         tweet_texts = preprocess_strings(tweet_texts, preprocessors)
         texts_per_community.append(tweet_texts)
 
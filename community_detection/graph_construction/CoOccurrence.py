@@ -0,0 +1,258 @@
+import numpy
+from scipy import sparse
+
+from community_detection.graph_construction.PairScores import PairScores
+
+
+# Sparse co-occurrence engine: users x keys incidence matrix where a key is a hashtag or a (hashtag, sentiment) pair.
+# The number of keys two users share is computed as a sparse product instead of expanding every pair of users in
+# python.
+# score_co_occurrences gives the same scores as MentionGraphs.score_user_co_occurrences, which pairs every entry of
+# a key's user list with the distinct users listed before it. Per key, that is
+#   a != b: 1 + (repeats of a after the first entry of b) + (repeats of b after the first entry of a)
+#   a == b: number of repeats of a
+# where a repeat is an entry of a user after their first one. The 1 per shared key comes from the incidence
+# product; only the repeats are expanded, over the users listed before them (see KeyOccurrences).
+
+# key_users_dict: key -> iterable of user id strs (e.g. from construct_hashtag_users_index)
+# returns (csr matrix of shape (# users, # keys), list of user id strs for the rows, list of keys for the columns)
+def construct_incidence_matrix(key_users_dict, user_ids=None):
+    if user_ids is None:
+        user_ids = sorted({user for users in key_users_dict.values() for user in users})
+    user_index = {user_id: index for index, user_id in enumerate(user_ids)}
+    keys = list(key_users_dict.keys())
+
+    rows = []
+    cols = []
+    for key_index, key in enumerate(keys):
+        key_user_ids = {user_index[user] for user in key_users_dict[key] if user in user_index}
+        rows.extend(key_user_ids)
+        cols.extend([key_index] * len(key_user_ids))
+
+    data = numpy.ones(len(rows), dtype=numpy.int32)
+    incidence_matrix = sparse.csr_matrix((data, (rows, cols)), shape=(len(user_ids), len(keys)), dtype=numpy.int32)
+    return incidence_matrix, user_ids, keys
+
+
+# key weights aligned with the incidence matrix columns, None if every key counts 1
+def get_key_weight_vector(keys, key_weights):
+    if not key_weights:
+        return None
+    return numpy.array([key_weights.get(key, 1) for key in keys], dtype=numpy.float64)
+
+
+# number of keys shared by each pair of users, upper triangular coo matrix without the diagonal
+def compute_shared_key_counts(incidence_matrix, key_weight_vector=None):
+    if key_weight_vector is None:
+        pair_counts = incidence_matrix.dot(incidence_matrix.T)
+    else:
+        pair_counts = incidence_matrix.multiply(key_weight_vector).tocsr().dot(incidence_matrix.T)
+    return sparse.triu(pair_counts, k=1).tocoo()
+
+
+# number of keys shared by the given (user index, user index) pairs: row-wise intersection of the two users' keys
+def compute_counts_for_pairs(incidence_matrix, source_indices, target_indices, key_weight_vector=None):
+    if len(source_indices) == 0:
+        return numpy.zeros(0, dtype=numpy.int64)
+    source_rows = incidence_matrix[source_indices]
+    target_rows = incidence_matrix[target_indices]
+    shared_keys = source_rows.multiply(target_rows).tocsr()
+    if key_weight_vector is None:
+        return numpy.asarray(shared_keys.sum(axis=1)).ravel()
+    return shared_keys.dot(key_weight_vector)
+
+
+def pair_counts_to_score_dict(pair_counts, user_ids, score_dict=None):
+    if score_dict is None:
+        score_dict = {}
+    for row, col, count in zip(pair_counts.row, pair_counts.col, pair_counts.data):
+        if count:
+            a, b = user_ids[row], user_ids[col]
+            tuple = (a, b) if a <= b else (b, a)
+            score_dict[tuple] = score_dict.get(tuple, 0) + count.item()
+    return score_dict
+
+
+# The entries of the key user lists: one entry per distinct (user, key), numbered key by key in the order of their
+# first appearance in the list, so the users of a key in list order are entry_rows[key_starts[key]:key_starts[key+1]]
+# and the rank of an entry is its position there. A repeat of an entry is stored with the number of distinct users
+# listed before it (including the user itself); it is paired with the users of the ranks below that number.
+class KeyOccurrences(object):
+
+    # user_ids: the users of the rows, entries of users not in user_ids are left out
+    def __init__(self, key_users_dict, user_ids=None):
+        if user_ids is None:
+            user_ids = sorted({user for users in key_users_dict.values() for user in users})
+        user_index = {user_id: index for index, user_id in enumerate(user_ids)}
+        self.user_ids = user_ids
+        self.keys = list(key_users_dict.keys())
+
+        entry_rows = []
+        key_starts = [0]
+        repeat_entries = []
+        repeat_prefixes = []
+        for key in self.keys:
+            key_entries = {}
+            for user in key_users_dict[key]:
+                row = user_index.get(user, None)
+                if row is None:
+                    continue
+                entry = key_entries.get(row, None)
+                if entry is None:
+                    key_entries[row] = len(entry_rows)
+                    entry_rows.append(row)
+                else:
+                    repeat_entries.append(entry)
+                    repeat_prefixes.append(len(key_entries))
+            key_starts.append(len(entry_rows))
+
+        self.entry_rows = numpy.array(entry_rows, dtype=numpy.int64)
+        self.key_starts = numpy.array(key_starts, dtype=numpy.int64)
+        self.entry_keys = numpy.repeat(numpy.arange(len(self.keys), dtype=numpy.int64), numpy.diff(self.key_starts))
+        self.entry_ranks = numpy.arange(len(entry_rows), dtype=numpy.int64) - self.key_starts[self.entry_keys]
+
+        # repeats sorted by entry and prefix, as entry * prefix_base + prefix
+        self.prefix_base = int(numpy.diff(self.key_starts).max()) + 1 if len(self.keys) else 1
+        self.repeats = numpy.sort(numpy.array(repeat_entries, dtype=numpy.int64) * self.prefix_base +
+                                  numpy.array(repeat_prefixes, dtype=numpy.int64))
+        self.repeat_starts = numpy.searchsorted(self.repeats,
+                                                numpy.arange(len(entry_rows) + 1, dtype=numpy.int64) * self.prefix_base)
+
+        # entry of (row, key) by binary search over row * number of keys + key
+        self.entry_order = numpy.argsort(self.entry_rows * len(self.keys) + self.entry_keys, kind="mergesort")
+        self.sorted_row_keys = (self.entry_rows * len(self.keys) + self.entry_keys)[self.entry_order]
+
+        self.incidence_matrix = sparse.csr_matrix((numpy.ones(len(entry_rows), dtype=numpy.int32),
+                                                   (self.entry_rows, self.entry_keys)),
+                                                  shape=(len(user_ids), len(self.keys)), dtype=numpy.int32)
+
+    def get_entries(self, rows, keys):
+        return self.entry_order[numpy.searchsorted(self.sorted_row_keys, rows * len(self.keys) + keys)]
+
+    # number of repeats of each entry that are paired with the entry of the given rank in the same key
+    def count_repeats_after(self, entries, ranks):
+        return self.repeat_starts[entries + 1] - numpy.searchsorted(self.repeats, entries * self.prefix_base + ranks,
+                                                                    side="right")
+
+    # scores of the given (row, row) pairs; rows can be equal
+    def score_pairs(self, source_indices, target_indices, key_weight_vector=None):
+        if len(source_indices) == 0:
+            return numpy.zeros(0, dtype=numpy.int64)
+        shared_keys = self.incidence_matrix[source_indices].multiply(self.incidence_matrix[target_indices]).tocoo()
+        pair_indices = shared_keys.row.astype(numpy.int64)
+        keys = shared_keys.col.astype(numpy.int64)
+
+        source_entries = self.get_entries(source_indices[pair_indices], keys)
+        target_entries = self.get_entries(target_indices[pair_indices], keys)
+        source_repeats = self.count_repeats_after(source_entries, self.entry_ranks[target_entries])
+        target_repeats = self.count_repeats_after(target_entries, self.entry_ranks[source_entries])
+        is_self_pair = source_entries == target_entries
+        key_scores = numpy.where(is_self_pair, source_repeats, 1 + source_repeats + target_repeats)
+
+        if key_weight_vector is None:
+            return numpy.bincount(pair_indices, weights=key_scores, minlength=len(source_indices)).astype(numpy.int64)
+        return numpy.bincount(pair_indices, weights=key_scores * key_weight_vector[keys], minlength=len(source_indices))
+
+    # scores of all pairs, upper triangular coo matrix including the self pairs on the diagonal
+    def score_all_pairs(self, key_weight_vector=None):
+        shared_key_counts = compute_shared_key_counts(self.incidence_matrix, key_weight_vector)
+
+        # every repeating entry against the ranks below its last repeat
+        repeating_entries = numpy.flatnonzero(numpy.diff(self.repeat_starts))
+        last_prefixes = self.repeats[self.repeat_starts[repeating_entries + 1] - 1] - repeating_entries * self.prefix_base
+        entries = numpy.repeat(repeating_entries, last_prefixes)
+        ranks = numpy.arange(len(entries), dtype=numpy.int64) - \
+                numpy.repeat(numpy.cumsum(last_prefixes) - last_prefixes, last_prefixes)
+        repeat_counts = self.count_repeats_after(entries, ranks).astype(numpy.float64)
+        keys = self.entry_keys[entries]
+        if key_weight_vector is not None:
+            repeat_counts *= key_weight_vector[keys]
+
+        rows = self.entry_rows[entries]
+        other_rows = self.entry_rows[self.key_starts[keys] + ranks]
+        all_rows = numpy.concatenate([shared_key_counts.row, numpy.minimum(rows, other_rows)])
+        all_cols = numpy.concatenate([shared_key_counts.col, numpy.maximum(rows, other_rows)])
+        all_counts = numpy.concatenate([shared_key_counts.data.astype(numpy.float64), repeat_counts])
+        pair_counts = sparse.coo_matrix((all_counts, (all_rows, all_cols)),
+                                        shape=(len(self.user_ids), len(self.user_ids))).tocsr().tocoo()
+        if key_weight_vector is None:
+            pair_counts.data = numpy.rint(pair_counts.data).astype(numpy.int64)
+        return pair_counts
+
+
+# same scores as MentionGraphs.score_user_co_occurrences applied to every key, see the top of the file
+# only_existing_pairs: only update pairs already in score_dict (like the *_optimized scoring functions)
+# as_sparse: return (upper triangular coo matrix with the self pairs on the diagonal, user ids) instead of updating
+# a dict
+# key_weights: key -> weight of each co-occurrence of the key (e.g. from a HubHashtagGuard), 1 if missing
+def score_co_occurrences(key_users_dict, score_dict=None, only_existing_pairs=False, as_sparse=False, key_weights=None):
+    occurrences = KeyOccurrences(key_users_dict)
+    user_ids = occurrences.user_ids
+    key_weight_vector = get_key_weight_vector(occurrences.keys, key_weights)
+
+    if only_existing_pairs:
+        if score_dict is None:
+            score_dict = {}
+        user_index = {user_id: index for index, user_id in enumerate(user_ids)}
+        pairs = [tuple for tuple in score_dict.keys() if tuple[0] in user_index and tuple[1] in user_index]
+        source_indices = numpy.array([user_index[a] for a, b in pairs], dtype=numpy.int64)
+        target_indices = numpy.array([user_index[b] for a, b in pairs], dtype=numpy.int64)
+        counts = occurrences.score_pairs(source_indices, target_indices, key_weight_vector)
+
+        if as_sparse:
+            upper_rows = numpy.minimum(source_indices, target_indices)
+            upper_cols = numpy.maximum(source_indices, target_indices)
+            return sparse.coo_matrix((counts, (upper_rows, upper_cols)), shape=(len(user_ids), len(user_ids))), user_ids
+
+        for tuple, count in zip(pairs, counts):
+            if count:
+                score_dict[tuple] += count.item()
+        return score_dict
+
+    pair_counts = occurrences.score_all_pairs(key_weight_vector)
+    if as_sparse:
+        return pair_counts, user_ids
+    return pair_counts_to_score_dict(pair_counts, user_ids, score_dict)
+
+
+# only_existing_pairs scoring for PairScores, with the same scores as score_co_occurrences; the rows follow the
+# pair scores' interned user ids
+def score_pair_scores(key_users_dict, pair_scores, key_weights=None):
+    occurrences = KeyOccurrences(key_users_dict, pair_scores.interner.user_ids)
+    source_indices, target_indices = pair_scores.get_pairs()
+    pair_scores.scores += occurrences.score_pairs(source_indices.astype(numpy.int64), target_indices.astype(numpy.int64),
+                                                  get_key_weight_vector(occurrences.keys, key_weights))
+    return pair_scores
+
+
+# incidence matrix from parallel arrays of interned user indices and key indices; duplicate entries count once
+def construct_incidence_matrix_from_indices(user_indices, key_indices, num_users, num_keys):
+    data = numpy.ones(len(user_indices), dtype=numpy.int32)
+    incidence_matrix = sparse.csr_matrix((data, (user_indices, key_indices)), shape=(num_users, num_keys),
+                                         dtype=numpy.int32)
+    incidence_matrix.data[:] = 1
+    return incidence_matrix
+
+
+
+# for every edge of graph: (number of keys both endpoint vertices have, sum of the weights of those keys),
+# with the users of key_users_dict matched to the vertex names. Arrays are aligned with graph.es.
+def count_shared_keys_per_edge(graph, key_users_dict, key_weights=None):
+    if graph.ecount() == 0 or not key_users_dict:
+        return numpy.zeros(graph.ecount(), dtype=numpy.int64), numpy.zeros(graph.ecount(), dtype=numpy.int64)
+
+    # one row per distinct vertex name
+    user_rows = {}
+    vertex_rows = numpy.array([user_rows.setdefault(name, len(user_rows)) for name in graph.vs["name"]],
+                              dtype=numpy.int64)
+    incidence_matrix, user_ids, keys = construct_incidence_matrix(key_users_dict, list(user_rows))
+
+    edges = numpy.array(graph.get_edgelist(), dtype=numpy.int64)
+    source_rows = vertex_rows[edges[:, 0]]
+    target_rows = vertex_rows[edges[:, 1]]
+
+    shared_key_counts = compute_counts_for_pairs(incidence_matrix, source_rows, target_rows)
+    key_weight_vector = get_key_weight_vector(keys, key_weights)
+    if key_weight_vector is None or numpy.all(key_weight_vector == 1):
+        return shared_key_counts, shared_key_counts
+    return shared_key_counts, compute_counts_for_pairs(incidence_matrix, source_rows, target_rows, key_weight_vector)
@@ -0,0 +1,55 @@
+from twitter_data.database import DBManager
+
+
+# Follow-edge join: every user's follower/following lists are fetched once and reduced to the vertex ids of
+# users inside the graph, so building the edges is a set intersection per user instead of a scan over all
+# vertices per tweet.
+
+# user_index: user id str -> vertex id of the users whose lists are fetched
+# vertex_index: vertex name -> vertex id of every vertex the lists are joined with, e.g. including the vertices of a
+# graph that is being extended; defaults to user_index
+# returns vertex id -> (set of follower vertex ids, set of following vertex ids)
+def load_follow_index(user_index, verbose=False, vertex_index=None):
+    if vertex_index is None:
+        vertex_index = user_index
+    follow_index = {}
+
+    for index, (user_id_str, vertex_id) in enumerate(user_index.items()):
+        # this code is flawed because DBManager.get followers/following should be corrected. it currently has a limit to avoid being stuck with one user
+        follower_ids = DBManager.get_or_add_followers_ids(user_id_str)
+        following_ids = DBManager.get_or_add_following_ids(user_id_str)
+
+        follow_index[vertex_id] = (join_with_user_index(follower_ids, vertex_index),
+                                   join_with_user_index(following_ids, vertex_index))
+
+        if verbose:
+            if index % 1000 == 0 or index == len(user_index) - 1:
+                print("Loading follow index: processed {}/{} users".format(index + 1, len(user_index)))
+
+    return follow_index
+
+
+def join_with_user_index(user_ids, user_index):
+    if not user_ids:
+        return set()
+    return {user_index[str(user_id)] for user_id in user_ids if str(user_id) in user_index}
+
+
+# directed edges (a, b) meaning a follows b, as vertex id pairs
+def construct_follow_edges(follow_index):
+    edges = set()
+
+    for vertex_id, (follower_vertex_ids, following_vertex_ids) in follow_index.items():
+        for follower_vertex_id in follower_vertex_ids:
+            if follower_vertex_id != vertex_id:
+                edges.add((follower_vertex_id, vertex_id))
+
+        for following_vertex_id in following_vertex_ids:
+            if following_vertex_id != vertex_id:
+                edges.add((vertex_id, following_vertex_id))
+
+    return sorted(edges)
+
+
+def get_follow_edges(user_index, verbose=False, vertex_index=None):
+    return construct_follow_edges(load_follow_index(user_index, verbose, vertex_index))
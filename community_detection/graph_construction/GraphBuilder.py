@@ -0,0 +1,97 @@
+from igraph import Graph
+
+
+class GraphBuilder(object):
+    # Collects vertices and edges in plain python structures and creates the igraph Graph in a single call.
+    # vertex_ids is the name -> vertex index registry, so checking if a vertex exists is a dict lookup
+    # instead of graph.vs.select(name=...) which scans every vertex.
+
+    def __init__(self, graph=None, directed=False):
+        self.directed = graph.is_directed() if graph is not None else directed
+        self.vertex_ids = {}
+        self.vertex_attributes = {"name": []}
+        self.edges = []
+        self.edge_weights = []
+        self.edge_set = set()
+
+        if graph is not None:
+            self.load_graph(graph)
+
+    def load_graph(self, graph):
+        for attribute in graph.vs.attributes():
+            self.vertex_attributes[attribute] = list(graph.vs[attribute])
+
+        if "name" not in graph.vs.attributes():
+            self.vertex_attributes["name"] = [str(index) for index in range(graph.vcount())]
+
+        for index, name in enumerate(self.vertex_attributes["name"]):
+            self.vertex_ids[name] = index
+
+        weights = graph.es["weight"] if "weight" in graph.es.attributes() else [1] * graph.ecount()
+        for edge, weight in zip(graph.get_edgelist(), weights):
+            self.edges.append(edge)
+            self.edge_weights.append(weight)
+            self.edge_set.add(edge)
+
+    def vcount(self):
+        return len(self.vertex_attributes["name"])
+
+    def ecount(self):
+        return len(self.edges)
+
+    def exists(self, name):
+        return str(name) in self.vertex_ids
+
+    def get_vertex_id(self, name):
+        return self.vertex_ids.get(str(name), None)
+
+    def add_vertex(self, name, **attributes):
+        name = str(name)
+        vertex_id = self.vertex_ids.get(name, None)
+        if vertex_id is not None:
+            return vertex_id
+
+        vertex_id = self.vcount()
+        self.vertex_ids[name] = vertex_id
+
+        # every attribute list has to stay aligned with the vertex ids; missing values are None like in igraph
+        for attribute, values in self.vertex_attributes.items():
+            if attribute == "name":
+                values.append(name)
+            else:
+                values.append(attributes.pop(attribute, None))
+
+        for attribute, value in attributes.items():
+            self.vertex_attributes[attribute] = [None] * vertex_id + [value]
+
+        return vertex_id
+
+    def add_user_vertex(self, user_id, username):
+        return self.add_vertex(user_id, username=username, display_str=username)
+
+    def add_hashtag_vertex(self, hashtag_text):
+        return self.add_vertex(hashtag_text, display_str=hashtag_text, id=hashtag_text)
+
+    def add_tweet_vertex(self, tweet):
+        return self.add_vertex(tweet.id, tweet_text=tweet.text, display_str=tweet.text, tweet_id=tweet.id)
+
+    # adds the edge (source, target) once; both vertices should already be in the registry
+    def add_edge(self, source_name, target_name, weight=1):
+        return self.add_edge_by_id(self.vertex_ids[str(source_name)], self.vertex_ids[str(target_name)], weight)
+
+    def add_edge_by_id(self, source_id, target_id, weight=1):
+        edge = (source_id, target_id)
+        if edge in self.edge_set:
+            return False
+
+        self.edge_set.add(edge)
+        self.edges.append(edge)
+        self.edge_weights.append(weight)
+        return True
+
+    def build(self):
+        return Graph(n=self.vcount(),
+                     edges=self.edges,
+                     directed=self.directed,
+                     vertex_attrs=self.vertex_attributes,
+                     edge_attrs={"weight": self.edge_weights})
@@ -0,0 +1,134 @@
+import abc
+import math
+import random
+
+
+# Guards against hub hashtags (e.g. #brexit) whose users would be expanded into billions of pairs.
+# A guard takes key -> users in tweet order (key is a hashtag or a (hashtag, sentiment) pair) and returns the
+# user lists that should be paired plus a weight per key. Each guard keeps a report of what it changed.
+
+class HubHashtagGuard(object):
+
+    def __init__(self, max_users):
+        self.max_users = max_users
+        self.report = {}
+
+    @abc.abstractmethod
+    def guard_key(self, key, user_list, total_users):
+        """
+        :param key: hashtag or (hashtag, sentiment)
+        :param user_list: users of the tweets with the key, in tweet order
+        :param total_users: number of distinct users over all keys
+        :return: (user list to be paired or None to drop the key, weight of each pair increment)
+        """
+
+    @abc.abstractmethod
+    def get_name(self):
+        """
+        :return: short name describing the guard
+        """
+
+    def apply(self, key_users_dict):
+        total_users = len({user for user_list in key_users_dict.values() for user in user_list})
+
+        guarded_key_users_dict = {}
+        key_weights = {}
+        hub_keys = []
+        pairs_before = 0
+        pairs_after = 0
+
+        for key, user_list in key_users_dict.items():
+            num_users = len(set(user_list))
+            if num_users > self.max_users:
+                hub_keys.append((key, num_users))
+
+            guarded_user_list, weight = self.guard_key(key, user_list, total_users)
+            pairs_before += count_pair_expansions(user_list)
+            if guarded_user_list is not None:
+                guarded_key_users_dict[key] = guarded_user_list
+                key_weights[key] = weight
+                pairs_after += count_pair_expansions(guarded_user_list)
+
+        self.report = {"guard": self.get_name(),
+                       "max_users": self.max_users,
+                       "num_keys": len(key_users_dict),
+                       "hub_keys": sorted(hub_keys, key=lambda key_count: key_count[1], reverse=True),
+                       "pairs_before": pairs_before,
+                       "pairs_after": pairs_after}
+
+        return guarded_key_users_dict, key_weights
+
+    def get_report_string(self, top_n=10):
+        if not self.report:
+            return "{}: not applied".format(self.get_name())
+        hub_keys = ", ".join(["{} ({})".format(key, num_users) for key, num_users in self.report["hub_keys"][:top_n]])
+        return "{}: {}/{} keys have more than {} users [{}]. Pair expansions: {} -> {}".format(
+            self.report["guard"], len(self.report["hub_keys"]), self.report["num_keys"], self.report["max_users"],
+            hub_keys, self.report["pairs_before"], self.report["pairs_after"])
+
+
+# drops keys with more than max_users users
+class HubHashtagCap(HubHashtagGuard):
+
+    def guard_key(self, key, user_list, total_users):
+        if len(set(user_list)) > self.max_users:
+            return None, 1
+        return user_list, 1
+
+    def get_name(self):
+        return "cap"
+
+
+# keeps the tweets of max_users randomly chosen users of a hub key
+class HubHashtagSampler(HubHashtagGuard):
+
+    def __init__(self, max_users, seed=0):
+        HubHashtagGuard.__init__(self, max_users)
+        self.seed = seed
+
+    def guard_key(self, key, user_list, total_users):
+        unique_users = sorted(set(user_list))
+        if len(unique_users) <= self.max_users:
+            return user_list, 1
+
+        # seeded per key so the sample does not depend on the order keys are processed in
+        sampled_users = set(random.Random("{}-{}".format(self.seed, key)).sample(unique_users, self.max_users))
+        return [user for user in user_list if user in sampled_users], 1
+
+    def get_name(self):
+        return "sample"
+
+
+# weighs each pair increment by log(total users / users of the key) / log(total users), so hub keys count less;
+# keys above max_users are down-sampled so the cost stays bounded
+class HubHashtagIDFWeighting(HubHashtagSampler):
+
+    def guard_key(self, key, user_list, total_users):
+        sampled_user_list, weight = HubHashtagSampler.guard_key(self, key, user_list, total_users)
+        if total_users <= 1:
+            return sampled_user_list, 1
+        num_users = len(set(user_list))
+        return sampled_user_list, math.log(total_users / num_users) / math.log(total_users)
+
+    def get_name(self):
+        return "idf"
+
+
+# number of increments score_user_co_occurrences makes for user_list
+def count_pair_expansions(user_list):
+    user_set = set()
+    count = 0
+    for user in user_list:
+        count += len(user_set)
+        user_set.add(user)
+    return count
+
+
+def apply_hub_hashtag_guard(hub_guard, key_users_dict, verbose=True):
+    if hub_guard is None:
+        return key_users_dict, {}
+
+    guarded_key_users_dict, key_weights = hub_guard.apply(key_users_dict)
+    if verbose:
+        print(hub_guard.get_report_string())
+    return guarded_key_users_dict, key_weights
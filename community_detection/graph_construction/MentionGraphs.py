@@ -1,69 +1,124 @@
 import pickle
 from collections import Counter
 
+import numpy
 from igraph import Graph
 
+from community_detection import TweetSentiments
+from community_detection.graph_construction import CoOccurrence
+from community_detection.graph_construction import HubHashtags
+from community_detection.graph_construction import ParallelScoring
+from community_detection.graph_construction import StageCache
+from community_detection.graph_construction.GraphBuilder import GraphBuilder
+from community_detection.graph_construction.PairScores import PairScores, UserIdInterner
+from community_detection.graph_construction.ThresholdSweep import ThresholdSweep
 from community_detection.graph_construction.TweetGraphs import add_user_vertex
 from sentiment_analysis.preprocessing import PreProcessing
-from twitter_data.database import DBUtils
 
 
 def construct_user_mention_hashtag_sa_graph(graph, tweets, classifier, pickle_file_name, THRESHOLD=0.5,
                                             hashtag_preprocessors=[], sa_preprocessors=[], verbose=False,
-                                            load_mode=False):
+                                            load_mode=False, sparse_scoring=False, hub_guard=None,
+                                            packed_scores=False, stage_cache=None, num_workers=None):
+    # num_workers scores the mention, hashtag and SA score dicts in parallel (see ParallelScoring); the sparse engine
+    # and packed scores are already vectorized and have no parallel version
+    if num_workers is not None and (sparse_scoring or packed_scores):
+        raise ValueError("num_workers only applies to score dicts, not to sparse_scoring or packed_scores")
+
     if load_mode:
         graph = pickle.load(open("without-edges-{}".format(pickle_file_name), "rb"))
         final_scores = pickle.load(open("final-scores-{}".format(pickle_file_name), "rb"))
     else:
-        if graph is None:
-            graph = Graph(directed=False)
-
-        for index, tweet in enumerate(tweets):
-            user_id_str = tweet.user.id_str
-            user_screen_name = tweet.user.screen_name
-
-            ### CREATE VERTICES ###
-            add_user_vertex(graph, user_id_str, user_screen_name)
+        # each stage is loaded from stage_cache when its key (input tweets + configuration so far) was already computed
+        if stage_cache is not None:
+            mentions_key = stage_cache.get_key("mentions", StageCache.hash_tweets(tweets), packed_scores,
+                                               graph.vs["name"] if graph is not None and graph.vcount() > 0 else None)
+            hashtags_key = stage_cache.get_key("hashtags", mentions_key, hashtag_preprocessors, sparse_scoring, hub_guard)
+            sa_key = stage_cache.get_key("sa", hashtags_key, sa_preprocessors, StageCache.describe_classifier(classifier))
+            normalize_key = stage_cache.get_key("normalize", sa_key)
+        else:
+            mentions_key = hashtags_key = sa_key = normalize_key = None
+
+        def compute_mention_stage():
+            builder = GraphBuilder(graph, directed=False)
+
+            for index, tweet in enumerate(tweets):
+                user_id_str = tweet.user.id_str
+                user_screen_name = tweet.user.screen_name
+
+                ### CREATE VERTICES ###
+                builder.add_user_vertex(user_id_str, user_screen_name)
+                if verbose:
+                    if index % 1000 == 0 or index == len(tweets) - 1:
+                        print("Constructing user mention hashtag SA graph: processed {}/{} tweets".format(index + 1,
+                                                                                                          len(tweets)))
+
+            ### CREATE EDGES ###
             if verbose:
-                if index % 1000 == 0 or index == len(tweets) - 1:
-                    print("Constructing user mention hashtag SA graph: processed {}/{} tweets".format(index + 1,
-                                                                                                      len(tweets)))
-
-        ### CREATE EDGES ###
-        if verbose:
-            print("Constructing mention scores")
-        mention_scores = score_mentions(tweets, graph)
-        if verbose:
-            print("Mention scores length: {}".format(len(mention_scores)))
-
-        pickle.dump(mention_scores, open("mention-scores-{}".format(pickle_file_name), "wb"))
-
-        if verbose:
-            print("Constructing hashtag scores")
-
-        preprocessed_tweets_for_hashtags = PreProcessing.preprocess_tweets(tweets, hashtag_preprocessors)
-        # extracting this after preprocessing to remove the universal hashtag(s)
-        unique_hashtags = get_unique_hashtags(preprocessed_tweets_for_hashtags)
-
-        mention_hashtag_scores = score_hashtags_optimized(preprocessed_tweets_for_hashtags, mention_scores,
-                                                          unique_hashtags)
-        pickle.dump(mention_hashtag_scores, open("mention-hashtag-scores-{}".format(pickle_file_name), "wb"))
-
+                print("Constructing mention scores")
+            if packed_scores:
+                mention_scores = score_mentions_packed(tweets, builder, UserIdInterner())
+            elif num_workers is not None:
+                add_mentioned_user_vertices(tweets, builder)
+                mention_scores = ParallelScoring.score_mentions(tweets, num_workers=num_workers)
+            else:
+                mention_scores = score_mentions(tweets, builder)
+            if verbose:
+                print("Mention scores length: {}".format(len(mention_scores)))
 
+            pickle.dump(mention_scores, open("mention-scores-{}".format(pickle_file_name), "wb"))
+            return builder.build(), mention_scores
 
-        if verbose:
-            print("Constructing sa scores")
-        preprocessed_tweets_for_sa = PreProcessing.preprocess_tweets(tweets, sa_preprocessors)
-        mention_hashtag_sa_scores = score_sa_optimized(preprocessed_tweets_for_sa, classifier, mention_hashtag_scores,
-                                                       unique_hashtags)
-        pickle.dump(mention_hashtag_scores, open("mention-hashtag-sa-scores-{}".format(pickle_file_name), "wb"))
+        def compute_hashtag_stage():
+            if verbose:
+                print("Constructing hashtag scores")
+
+            preprocessed_tweets_for_hashtags = PreProcessing.preprocess_tweets(tweets, hashtag_preprocessors)
+            # extracting this after preprocessing to remove the universal hashtag(s)
+            unique_hashtags = get_unique_hashtags(preprocessed_tweets_for_hashtags)
+
+            if num_workers is not None:
+                mention_hashtag_scores = ParallelScoring.score_hashtags_optimized(preprocessed_tweets_for_hashtags,
+                                                                                  mention_scores, unique_hashtags,
+                                                                                  hub_guard=hub_guard,
+                                                                                  num_workers=num_workers)
+            else:
+                mention_hashtag_scores = score_hashtags_optimized(preprocessed_tweets_for_hashtags, mention_scores,
+                                                                  unique_hashtags, sparse=sparse_scoring,
+                                                                  hub_guard=hub_guard)
+            pickle.dump(mention_hashtag_scores, open("mention-hashtag-scores-{}".format(pickle_file_name), "wb"))
+            return mention_hashtag_scores, unique_hashtags
+
+        def compute_sa_stage():
+            if verbose:
+                print("Constructing sa scores")
+            preprocessed_tweets_for_sa = PreProcessing.preprocess_tweets(tweets, sa_preprocessors)
+            sentiments = classify_tweets_with_hashtags(preprocessed_tweets_for_sa, classifier, unique_hashtags)
+            if num_workers is not None:
+                mention_hashtag_sa_scores = ParallelScoring.score_sa_optimized(preprocessed_tweets_for_sa, classifier,
+                                                                               mention_hashtag_scores, unique_hashtags,
+                                                                               sentiments=sentiments, hub_guard=hub_guard,
+                                                                               num_workers=num_workers)
+            else:
+                mention_hashtag_sa_scores = score_sa_optimized(preprocessed_tweets_for_sa, classifier,
+                                                               mention_hashtag_scores, unique_hashtags,
+                                                               sentiments=sentiments, sparse=sparse_scoring,
+                                                               hub_guard=hub_guard)
+            pickle.dump(mention_hashtag_sa_scores, open("mention-hashtag-sa-scores-{}".format(pickle_file_name), "wb"))
+            return mention_hashtag_sa_scores
+
+        def compute_normalize_stage():
+            if verbose:
+                print("Normalizing scores")
+            return normalize(mention_hashtag_sa_scores)
 
+        graph, mention_scores = StageCache.run_stage(stage_cache, mentions_key, compute_mention_stage, verbose)
+        mention_hashtag_scores, unique_hashtags = StageCache.run_stage(stage_cache, hashtags_key, compute_hashtag_stage, verbose)
+        mention_hashtag_sa_scores = StageCache.run_stage(stage_cache, sa_key, compute_sa_stage, verbose)
+        final_scores = StageCache.run_stage(stage_cache, normalize_key, compute_normalize_stage, verbose)
 
         if verbose:
-            print("Normalizing scores")
-        final_scores = normalize(mention_hashtag_sa_scores)
-        if verbose:
-            print(Counter([score for key, score in final_scores.items()]))
+            print(get_score_counts(final_scores))
 
         graph.save("without-edges-{}".format(pickle_file_name))
         pickle.dump(final_scores, open("final-scores-{}".format(pickle_file_name), "wb"))
@@ -71,14 +126,7 @@ def construct_user_mention_hashtag_sa_graph(graph, tweets, classifier, pickle_fi
     if verbose:
         print("Creating list of edges based on threshold score")
 
-    new_edges = set()
-    # count = 0
-    for tuple, score in final_scores.items():
-        if score >= THRESHOLD:
-            new_edges.add(tuple)
-
-        # count += 1
-        # print("Adding edge: Processed {}/{} scores.".format(count, len(final_scores.items())))
+    new_edges = get_pairs_above_threshold(final_scores, THRESHOLD)
 
     if verbose:
         print("Adding {} edges".format(len(new_edges)))
@@ -96,6 +144,37 @@ def construct_ordered_tuple(a, b):
     return construct_ordered_tuple(b, a)
 
 
+# builds and saves threshold-{threshold}-{pickle_file_name} for every threshold from the saved
+# without-edges/final-scores of construct_user_mention_hashtag_sa_graph, sorting the scores only once
+def construct_user_mention_hashtag_sa_threshold_graphs(pickle_file_name, thresholds, verbose=False):
+    graph = pickle.load(open("without-edges-{}".format(pickle_file_name), "rb"))
+    final_scores = pickle.load(open("final-scores-{}".format(pickle_file_name), "rb"))
+
+    sweep = ThresholdSweep(graph, final_scores)
+    for threshold, threshold_graph in sweep.iterate_graphs(thresholds):
+        if verbose:
+            print("Threshold {}: {} edges".format(threshold, threshold_graph.ecount()))
+        threshold_graph.save("threshold-{}-{}".format(threshold, pickle_file_name))
+
+    return sweep
+
+
+def get_pairs_above_threshold(final_scores, THRESHOLD):
+    if isinstance(final_scores, PairScores):
+        return final_scores.get_pairs_above_threshold(THRESHOLD)
+
+    new_edges = set()
+    # count = 0
+    for tuple, score in final_scores.items():
+        if score >= THRESHOLD:
+            new_edges.add(tuple)
+
+        # count += 1
+        # print("Adding edge: Processed {}/{} scores.".format(count, len(final_scores.items())))
+    return new_edges
+
+
+# graph can be an igraph Graph or a GraphBuilder; mentioned users are added as vertices to either
 def score_mentions(tweets, graph):
     score_dict = {}
 
@@ -105,128 +184,197 @@ def score_mentions(tweets, graph):
         mentions_idstr_screenname_tuples = [(mention_dict["id_str"], mention_dict["screen_name"]) for mention_dict in
                                             tweet.entities.get('user_mentions')]
         for other_user_id_str, other_user_screen_name in mentions_idstr_screenname_tuples:
-            add_user_vertex(graph, other_user_id_str, other_user_screen_name)
+            if isinstance(graph, GraphBuilder):
+                graph.add_user_vertex(other_user_id_str, other_user_screen_name)
+            else:
+                add_user_vertex(graph, other_user_id_str, other_user_screen_name)
             ordered_tuple = construct_ordered_tuple(user_id_str, other_user_id_str)
             score_dict[ordered_tuple] = score_dict.get(ordered_tuple, 0) + 1
 
     return score_dict
 
 
-def score_hashtags_optimized(tweets, score_dict, unique_hashtags):
+# adds the vertices of the mentioned users in the same order as score_mentions, for scoring without a graph
+def add_mentioned_user_vertices(tweets, builder):
+    for tweet in tweets:
+        for mention_dict in tweet.entities.get('user_mentions'):
+            builder.add_user_vertex(mention_dict["id_str"], mention_dict["screen_name"])
+
+
+# same as score_mentions but returns PairScores with the user ids interned in interner
+def score_mentions_packed(tweets, graph, interner):
+    source_indices = []
+    target_indices = []
+
+    for index, tweet in enumerate(tweets):
+        user_index = interner.intern(tweet.user.id_str)
+
+        for mention_dict in tweet.entities.get('user_mentions'):
+            if isinstance(graph, GraphBuilder):
+                graph.add_user_vertex(mention_dict["id_str"], mention_dict["screen_name"])
+            else:
+                add_user_vertex(graph, mention_dict["id_str"], mention_dict["screen_name"])
+            source_indices.append(user_index)
+            target_indices.append(interner.intern(mention_dict["id_str"]))
+
+    return PairScores.from_pairs(interner, source_indices, target_indices)
+
+
+# score_dict can also be PairScores, which is always scored with the sparse engine
+def score_hashtags_optimized(tweets, score_dict, unique_hashtags, sparse=False, hub_guard=None):
     if not unique_hashtags:
         unique_hashtags = get_unique_hashtags(tweets)
 
-    for hashtag in unique_hashtags:
-        user_set = set()
-        for tweet in tweets:
-            curr_user = tweet.user.id_str
-            if hashtag in [hashtag_dict["text"].lower() for hashtag_dict in tweet.entities.get('hashtags')]:
-                for other_user in user_set:
-                    tuple = construct_ordered_tuple(curr_user, other_user)
-                    if tuple in score_dict:  # only consider those entries already present in the score dict
-                        score_dict[tuple] += 1
-                user_set.add(curr_user)
-        del user_set
+    hashtag_users_dict = construct_hashtag_users_index(tweets, unique_hashtags)
+    hashtag_users_dict, key_weights = HubHashtags.apply_hub_hashtag_guard(hub_guard, hashtag_users_dict)
+
+    if isinstance(score_dict, PairScores):
+        return CoOccurrence.score_pair_scores(hashtag_users_dict, score_dict, key_weights)
+
+    if sparse:
+        return CoOccurrence.score_co_occurrences(hashtag_users_dict, score_dict, only_existing_pairs=True,
+                                                 key_weights=key_weights)
+
+    for hashtag, user_list in hashtag_users_dict.items():
+        score_user_co_occurrences(user_list, score_dict, only_existing_pairs=True,  # only consider those entries already present in the score dict
+                                  weight=key_weights.get(hashtag, 1))
     return score_dict
 
 
-def score_hashtags(tweets, unique_hashtags=None):
+def score_hashtags(tweets, unique_hashtags=None, sparse=False, hub_guard=None):
     if not unique_hashtags:
         unique_hashtags = get_unique_hashtags(tweets)
 
     score_dict = {}
 
-    for hashtag in unique_hashtags:
-        user_set = set()
-        for tweet in tweets:
-            curr_user = tweet.user.id_str
-            if hashtag in [hashtag_dict["text"].lower() for hashtag_dict in tweet.entities.get('hashtags')]:
-                for other_user in user_set:
-                    tuple = construct_ordered_tuple(curr_user, other_user)
-                    score_dict[tuple] = score_dict.get(tuple, 0) + 1
-                user_set.add(curr_user)
-        del user_set
+    hashtag_users_dict = construct_hashtag_users_index(tweets, unique_hashtags)
+    hashtag_users_dict, key_weights = HubHashtags.apply_hub_hashtag_guard(hub_guard, hashtag_users_dict)
+
+    if sparse:
+        return CoOccurrence.score_co_occurrences(hashtag_users_dict, score_dict, key_weights=key_weights)
+
+    for hashtag, user_list in hashtag_users_dict.items():
+        score_user_co_occurrences(user_list, score_dict, weight=key_weights.get(hashtag, 1))
+    return score_dict
+
+
+# hashtag -> users of the tweets containing the hashtag, in tweet order (one entry per tweet), built in one pass
+def construct_hashtag_users_index(tweets, unique_hashtags=None):
+    hashtag_users_dict = {}
+
+    for tweet in tweets:
+        curr_user = tweet.user.id_str
+        for hashtag in set(get_tweet_hashtags(tweet)):
+            if unique_hashtags is None or hashtag in unique_hashtags:
+                user_list = hashtag_users_dict.get(hashtag, None)
+                if user_list is None:
+                    user_list = []
+                    hashtag_users_dict[hashtag] = user_list
+                user_list.append(curr_user)
+
+    return hashtag_users_dict
+
+
+# pairs every user with the users before them in user_list, the same as rescanning the tweets per hashtag.
+# With existing_pairs, only pairs in existing_pairs are counted, into score_dict (e.g. partial scores of a worker)
+def score_user_co_occurrences(user_list, score_dict, only_existing_pairs=False, weight=1, existing_pairs=None):
+    user_set = set()
+    for curr_user in user_list:
+        for other_user in user_set:
+            tuple = construct_ordered_tuple(curr_user, other_user)
+            if existing_pairs is not None:
+                if tuple in existing_pairs:
+                    score_dict[tuple] = score_dict.get(tuple, 0) + weight
+            elif not only_existing_pairs:
+                score_dict[tuple] = score_dict.get(tuple, 0) + weight
+            elif tuple in score_dict:
+                score_dict[tuple] += weight
+        user_set.add(curr_user)
     return score_dict
 
 
-def score_sa_optimized(tweets, classifier, score_dict, unique_hashtags):
-    for hashtag_index, hashtag in enumerate(unique_hashtags):
-        positive_user_set = set()
-        negative_user_set = set()
-
-        for index, tweet in enumerate(tweets):
-            if index % 100 == 0 or index == len(tweets)-1:
-                print("SA score - hashtag {}/{} tweet {}/{}".format(hashtag_index, len(unique_hashtags), index, len(tweets)))
-
-            curr_user = tweet.user.id_str
-            if hashtag in [hashtag_dict["text"].lower() for hashtag_dict in tweet.entities.get('hashtags')]:
-
-                try:
-                    conv_context = DBUtils.retrieve_full_conversation(tweet.in_reply_to_status_id, [])
-                    conv_context = [tweet.text for tweet in conv_context]
-                except Exception as e:
-                    conv_context = []
-
-                sentiment = classifier.classify_sentiment(tweet.text, {"conv_context":conv_context})
-                user_set = None
-                if sentiment == 'positive':
-                    user_set = positive_user_set
-                elif sentiment == 'negative':
-                    user_set = negative_user_set
-
-                if user_set:
-                    for other_user in user_set:
-                        tuple = construct_ordered_tuple(curr_user, other_user)
-                        if tuple in score_dict:
-                            score_dict[tuple] += 1
-                    user_set.add(curr_user)
-
-        del positive_user_set
-        del negative_user_set
+# score_dict can also be PairScores, which is always scored with the sparse engine
+def score_sa_optimized(tweets, classifier, score_dict, unique_hashtags, sentiments=None, sparse=False,
+                       hub_guard=None):
+    if sentiments is None:
+        sentiments = classify_tweets_with_hashtags(tweets, classifier, unique_hashtags, with_context=True)
+
+    hashtag_sentiment_users_dict = construct_hashtag_sentiment_users_index(tweets, sentiments, unique_hashtags)
+    hashtag_sentiment_users_dict, key_weights = HubHashtags.apply_hub_hashtag_guard(hub_guard, hashtag_sentiment_users_dict)
+
+    if isinstance(score_dict, PairScores):
+        return CoOccurrence.score_pair_scores(hashtag_sentiment_users_dict, score_dict, key_weights)
+
+    if sparse:
+        return CoOccurrence.score_co_occurrences(hashtag_sentiment_users_dict, score_dict, only_existing_pairs=True,
+                                                 key_weights=key_weights)
+
+    for key, user_list in hashtag_sentiment_users_dict.items():
+        score_user_co_occurrences(user_list, score_dict, only_existing_pairs=True, weight=key_weights.get(key, 1))
     return score_dict
 
 
-def score_sa(tweets, classifier, unique_hashtags=None):
+def score_sa(tweets, classifier, unique_hashtags=None, sentiments=None, sparse=False, hub_guard=None):
     if not unique_hashtags:
         unique_hashtags = get_unique_hashtags(tweets)
 
+    if sentiments is None:
+        sentiments = classify_tweets_with_hashtags(tweets, classifier, unique_hashtags, with_context=False)
+
     score_dict = {}
 
-    for hashtag in unique_hashtags:
-        positive_user_set = set()
-        negative_user_set = set()
-        for tweet in tweets:
-            curr_user = tweet.user.id_str
-            if hashtag in [hashtag_dict["text"].lower() for hashtag_dict in tweet.entities.get('hashtags')]:
-
-                sentiment = classifier.classify_sentiment(tweet.text, {})
-
-                user_set = None
-                if sentiment == 'positive':
-                    user_set = positive_user_set
-                elif sentiment == 'negative':
-                    user_set = negative_user_set
-
-                if user_set:
-                    for other_user in user_set:
-                        tuple = construct_ordered_tuple(curr_user, other_user)
-                        score_dict[tuple] = score_dict.get(tuple, 0) + 1
-                    user_set.add(curr_user)
-
-        del positive_user_set
-        del negative_user_set
+    hashtag_sentiment_users_dict = construct_hashtag_sentiment_users_index(tweets, sentiments, unique_hashtags)
+    hashtag_sentiment_users_dict, key_weights = HubHashtags.apply_hub_hashtag_guard(hub_guard, hashtag_sentiment_users_dict)
+
+    if sparse:
+        return CoOccurrence.score_co_occurrences(hashtag_sentiment_users_dict, score_dict, key_weights=key_weights)
+
+    for key, user_list in hashtag_sentiment_users_dict.items():
+        score_user_co_occurrences(user_list, score_dict, weight=key_weights.get(key, 1))
     return score_dict
 
 
+# classifies each tweet that has at least one of the hashtags exactly once
+def classify_tweets_with_hashtags(tweets, classifier, unique_hashtags, with_context=True):
+    tweet_indices = [index for index, tweet in enumerate(tweets)
+                     if any(hashtag in unique_hashtags for hashtag in get_tweet_hashtags(tweet))]
+    return TweetSentiments.classify_tweets(tweets, classifier, with_context=with_context, tweet_indices=tweet_indices,
+                                           verbose=True)
+
+
+# (hashtag, sentiment) -> users in tweet order, only for positive and negative tweets
+def construct_hashtag_sentiment_users_index(tweets, sentiments, unique_hashtags=None):
+    hashtag_sentiment_users_dict = {}
+
+    for tweet, sentiment in zip(tweets, sentiments):
+        if sentiment != 'positive' and sentiment != 'negative':
+            continue
+
+        curr_user = tweet.user.id_str
+        for hashtag in set(get_tweet_hashtags(tweet)):
+            if unique_hashtags is None or hashtag in unique_hashtags:
+                user_list = hashtag_sentiment_users_dict.get((hashtag, sentiment), None)
+                if user_list is None:
+                    user_list = []
+                    hashtag_sentiment_users_dict[(hashtag, sentiment)] = user_list
+                user_list.append(curr_user)
+
+    return hashtag_sentiment_users_dict
+
+
 def get_unique_hashtags(tweets):
     unique_hashtags = set()
     for tweet in tweets:
-        tweet_hashtags = [hashtag_dict["text"].lower() for hashtag_dict in tweet.entities.get('hashtags')]
+        tweet_hashtags = get_tweet_hashtags(tweet)
         for tweet_hashtag in tweet_hashtags:
             unique_hashtags.add(tweet_hashtag)
     return unique_hashtags
 
 
+def get_tweet_hashtags(tweet):
+    return [hashtag_dict["text"].lower() for hashtag_dict in tweet.entities.get('hashtags')]
+
+
 # def score_sa(tweets, classifier):
 #     # group users according to hashtag
 #     hashtag_users_dict = {}
@@ -252,7 +400,11 @@ def get_unique_hashtags(tweets):
 #
 #     return score_dict
 
+# the score dicts can also be PairScores sharing one interner
 def consolidate(score_dict_list):
+    if score_dict_list and isinstance(score_dict_list[0], PairScores):
+        return PairScores.consolidate(score_dict_list)
+
     final_dict = {}
     for score_dict in score_dict_list:
         for tuple, score in score_dict.items():
@@ -262,6 +414,9 @@ def consolidate(score_dict_list):
 
 
 def normalize(score_dict):
+    if isinstance(score_dict, PairScores):
+        return score_dict.normalize()
+
     max_score = get_max_score(score_dict)
 
     if max_score == 0: # cannot normalize
@@ -276,10 +431,22 @@ def normalize(score_dict):
 
 
 def get_max_score(score_dict):
+    if isinstance(score_dict, PairScores):
+        return score_dict.get_max_score()
     if len(score_dict.items()) == 0:
         return 0
     return max([score for tuple, score in score_dict.items()])
 
 
+# number of pairs with each distinct score
+def get_score_counts(score_dict):
+    if isinstance(score_dict, PairScores):
+        scores, counts = numpy.unique(score_dict.scores, return_counts=True)
+        return Counter(dict(zip(scores.tolist(), counts.tolist())))
+    return Counter(score_dict.values())
+
+
 def calculate_total_score(score_dict):
-    return sum([score for tuple, score in score_dict.items()])
+    if isinstance(score_dict, PairScores):
+        return score_dict.calculate_total_score()
+    return sum([score for tuple, score in score_dict.items()])
\ No newline at end of file
@@ -0,0 +1,145 @@
+import numpy
+
+
+# Compact alternative to the {(user id str, user id str): score} dicts of MentionGraphs.
+# User id strings are interned once per run into dense int32 ids, and a pair is stored as one int64 key
+# (smaller id << 32 | larger id) in a sorted numpy array with a parallel array of scores.
+
+class UserIdInterner(object):
+
+    def __init__(self, user_ids=()):
+        self.user_index = {}
+        self.user_ids = []
+        for user_id in user_ids:
+            self.intern(user_id)
+
+    def intern(self, user_id_str):
+        index = self.user_index.get(user_id_str, None)
+        if index is None:
+            index = len(self.user_ids)
+            self.user_index[user_id_str] = index
+            self.user_ids.append(user_id_str)
+        return index
+
+    def get_index(self, user_id_str):
+        return self.user_index.get(user_id_str, None)
+
+    def get_user_id(self, index):
+        return self.user_ids[index]
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    # the index dict is rebuilt on load so only the id strings are pickled
+    def __getstate__(self):
+        return {"user_ids": self.user_ids}
+
+    def __setstate__(self, state):
+        self.user_ids = state["user_ids"]
+        self.user_index = {user_id: index for index, user_id in enumerate(self.user_ids)}
+
+
+def pack_pairs(source_indices, target_indices):
+    source_indices = numpy.asarray(source_indices, dtype=numpy.int64)
+    target_indices = numpy.asarray(target_indices, dtype=numpy.int64)
+    return (numpy.minimum(source_indices, target_indices) << 32) | numpy.maximum(source_indices, target_indices)
+
+
+def unpack_pairs(keys):
+    return (keys >> 32).astype(numpy.int32), (keys & 0xFFFFFFFF).astype(numpy.int32)
+
+
+class PairScores(object):
+
+    def __init__(self, interner, keys=None, scores=None):
+        self.interner = interner
+        self.keys = keys if keys is not None else numpy.zeros(0, dtype=numpy.int64)
+        self.scores = scores if scores is not None else numpy.zeros(0, dtype=numpy.float64)
+
+    # repeated pairs are summed; scores default to 1 per pair occurrence
+    @classmethod
+    def from_pairs(cls, interner, source_indices, target_indices, scores=None):
+        packed_keys = pack_pairs(source_indices, target_indices)
+        keys, inverse = numpy.unique(packed_keys, return_inverse=True)
+        summed_scores = numpy.bincount(inverse.ravel(), weights=scores, minlength=len(keys)).astype(numpy.float64)
+        return cls(interner, keys, summed_scores)
+
+    @classmethod
+    def from_score_dict(cls, score_dict, interner=None):
+        if interner is None:
+            interner = UserIdInterner()
+        source_indices = [interner.intern(a) for a, b in score_dict.keys()]
+        target_indices = [interner.intern(b) for a, b in score_dict.keys()]
+        scores = numpy.array(list(score_dict.values()), dtype=numpy.float64)
+        return cls.from_pairs(interner, source_indices, target_indices, scores)
+
+    def to_score_dict(self):
+        score_dict = {}
+        source_indices, target_indices = self.get_pairs()
+        for source_index, target_index, score in zip(source_indices, target_indices, self.scores):
+            a = self.interner.get_user_id(source_index)
+            b = self.interner.get_user_id(target_index)
+            score_dict[(a, b) if a <= b else (b, a)] = score.item()
+        return score_dict
+
+    def get_pairs(self):
+        return unpack_pairs(self.keys)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def copy(self):
+        return PairScores(self.interner, self.keys.copy(), self.scores.copy())
+
+    def get_max_score(self):
+        if len(self.scores) == 0:
+            return 0
+        return self.scores.max().item()
+
+    def calculate_total_score(self):
+        return self.scores.sum().item()
+
+    def normalize(self):
+        max_score = self.get_max_score()
+
+        if max_score == 0: # cannot normalize
+            return self
+
+        self.scores /= max_score
+        print("Mention graph normalization max score: {}".format(max_score))
+        return self
+
+    # (user id str, user id str) pairs with score >= threshold
+    def get_pairs_above_threshold(self, threshold):
+        source_indices, target_indices = unpack_pairs(self.keys[self.scores >= threshold])
+        return [(self.interner.get_user_id(source_index), self.interner.get_user_id(target_index))
+                for source_index, target_index in zip(source_indices, target_indices)]
+
+    # adds pair_scores in place with a sorted merge, so only the keys of pair_scores are searched for.
+    # Returns the mask of the keys of pair_scores that were not in these scores and their insert positions in the old
+    # keys, as taken by numpy.insert to keep arrays aligned with the keys
+    def merge(self, pair_scores):
+        if pair_scores.interner is not self.interner:
+            raise ValueError("Cannot merge pair scores with different user id interners")
+        positions = numpy.searchsorted(self.keys, pair_scores.keys)
+        is_found = positions < len(self.keys)
+        is_found[is_found] = self.keys[positions[is_found]] == pair_scores.keys[is_found]
+        self.scores[positions[is_found]] += pair_scores.scores[is_found]
+
+        is_new = ~is_found
+        insert_positions = positions[is_new]
+        if len(insert_positions):
+            self.keys = numpy.insert(self.keys, insert_positions, pair_scores.keys[is_new])
+            self.scores = numpy.insert(self.scores, insert_positions, pair_scores.scores[is_new])
+        return is_new, insert_positions
+
+    # all pair scores have to use the same interner
+    @staticmethod
+    def consolidate(pair_scores_list):
+        interner = pair_scores_list[0].interner
+        if any(pair_scores.interner is not interner for pair_scores in pair_scores_list):
+            raise ValueError("Cannot consolidate pair scores with different user id interners")
+        keys = numpy.concatenate([pair_scores.keys for pair_scores in pair_scores_list])
+        scores = numpy.concatenate([pair_scores.scores for pair_scores in pair_scores_list])
+        unique_keys, inverse = numpy.unique(keys, return_inverse=True)
+        return PairScores(interner, unique_keys, numpy.bincount(inverse.ravel(), weights=scores, minlength=len(unique_keys)))
@@ -0,0 +1,167 @@
+import multiprocessing
+
+from community_detection.graph_construction import HubHashtags
+from community_detection.graph_construction import MentionGraphs
+
+# Process-parallel versions of the score dict functions of MentionGraphs.
+# The work is split into a fixed number of shards (tweets for mentions, keys for hashtag and SA co-occurrences),
+# each shard is scored into a partial score dict and the partial dicts are added to the result in the calling process
+# as the workers return them. Shards and merge order depend only on num_shards, so the scores are the same for
+# any number of workers.
+# The inputs are handed to the workers once through the pool initializer, which is inherited without copying
+# when processes are forked.
+
+DEFAULT_NUM_SHARDS = 64
+
+_worker_state = {}
+
+
+def _init_worker(state):
+    _worker_state.clear()
+    _worker_state.update(state)
+
+
+def _score_mentions_shard(shard):
+    mention_lists = _worker_state["mention_lists"]
+    score_dict = {}
+    for user_id_str, mentioned_user_ids in mention_lists[shard[0]:shard[1]]:
+        for other_user_id_str in mentioned_user_ids:
+            ordered_tuple = MentionGraphs.construct_ordered_tuple(user_id_str, other_user_id_str)
+            score_dict[ordered_tuple] = score_dict.get(ordered_tuple, 0) + 1
+    return score_dict
+
+
+def _score_keys_shard(keys):
+    key_users_dict = _worker_state["key_users_dict"]
+    key_weights = _worker_state["key_weights"]
+    existing_pairs = _worker_state["existing_pairs"]
+    score_dict = {}
+    for key in keys:
+        MentionGraphs.score_user_co_occurrences(key_users_dict[key], score_dict, weight=key_weights.get(key, 1),
+                                                existing_pairs=existing_pairs)
+    return score_dict
+
+
+# the partial score dicts of the shards are added to score_dict in shard order
+def run_sharded(shard_func, shards, state, num_workers=None, score_dict=None):
+    if num_workers is None:
+        num_workers = multiprocessing.cpu_count()
+    if score_dict is None:
+        score_dict = {}
+
+    if num_workers <= 1 or len(shards) <= 1:
+        _init_worker(state)
+        try:
+            return merge_score_dicts(score_dict, (shard_func(shard) for shard in shards))
+        finally:
+            _worker_state.clear()
+
+    pool = multiprocessing.Pool(min(num_workers, len(shards)), initializer=_init_worker, initargs=(state,))
+    try:
+        return merge_score_dicts(score_dict, pool.imap(shard_func, shards))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def merge_score_dicts(score_dict, partial_score_dicts):
+    for partial_score_dict in partial_score_dicts:
+        for tuple, score in partial_score_dict.items():
+            score_dict[tuple] = score_dict.get(tuple, 0) + score
+    return score_dict
+
+
+# contiguous (start, end) ranges over num_items items
+def get_range_shards(num_items, num_shards=DEFAULT_NUM_SHARDS):
+    num_shards = max(1, min(num_shards, num_items))
+    bounds = [num_items * index // num_shards for index in range(num_shards + 1)]
+    return [(bounds[index], bounds[index + 1]) for index in range(num_shards)]
+
+
+# keys assigned to shards by decreasing number of pair expansions, always to the least loaded shard,
+# so one hub hashtag does not end up in a shard with many other big keys
+def get_key_shards(key_users_dict, num_shards=DEFAULT_NUM_SHARDS):
+    key_costs = sorted([(HubHashtags.count_pair_expansions(user_list), index, key)
+                        for index, (key, user_list) in enumerate(key_users_dict.items())],
+                       key=lambda cost_index_key: (-cost_index_key[0], cost_index_key[1]))
+
+    shards = [[] for index in range(max(1, min(num_shards, len(key_costs))))]
+    shard_costs = [0] * len(shards)
+    for cost, index, key in key_costs:
+        shard_index = shard_costs.index(min(shard_costs))
+        shards[shard_index].append(key)
+        shard_costs[shard_index] += cost
+    return [shard for shard in shards if shard]
+
+
+# same as MentionGraphs.score_mentions without adding the vertices
+def score_mentions(tweets, num_workers=None, num_shards=DEFAULT_NUM_SHARDS):
+    mention_lists = [(tweet.user.id_str, [mention_dict["id_str"] for mention_dict in tweet.entities.get('user_mentions')])
+                     for tweet in tweets]
+    return run_sharded(_score_mentions_shard, get_range_shards(len(mention_lists), num_shards),
+                       {"mention_lists": mention_lists}, num_workers)
+
+
+# score_user_co_occurrences over key_users_dict (e.g. from construct_hashtag_users_index); with only_existing_pairs
+# the scores are added to the pairs already in score_dict like the *_optimized functions
+def score_co_occurrences(key_users_dict, score_dict=None, only_existing_pairs=False, key_weights=None, num_workers=None,
+                         num_shards=DEFAULT_NUM_SHARDS):
+    if score_dict is None:
+        score_dict = {}
+
+    state = {"key_users_dict": key_users_dict,
+             "key_weights": key_weights if key_weights else {},
+             "existing_pairs": score_dict if only_existing_pairs else None}
+    # only_existing_pairs never adds pairs to score_dict, so the serial shards can read it while it is merged into
+    return run_sharded(_score_keys_shard, get_key_shards(key_users_dict, num_shards), state, num_workers, score_dict)
+
+
+def score_hashtags_optimized(tweets, score_dict, unique_hashtags, hub_guard=None, num_workers=None,
+                             num_shards=DEFAULT_NUM_SHARDS):
+    if not unique_hashtags:
+        unique_hashtags = MentionGraphs.get_unique_hashtags(tweets)
+
+    hashtag_users_dict = MentionGraphs.construct_hashtag_users_index(tweets, unique_hashtags)
+    hashtag_users_dict, key_weights = HubHashtags.apply_hub_hashtag_guard(hub_guard, hashtag_users_dict)
+    return score_co_occurrences(hashtag_users_dict, score_dict, only_existing_pairs=True, key_weights=key_weights,
+                                num_workers=num_workers, num_shards=num_shards)
+
+
+def score_hashtags(tweets, unique_hashtags=None, hub_guard=None, num_workers=None, num_shards=DEFAULT_NUM_SHARDS):
+    if not unique_hashtags:
+        unique_hashtags = MentionGraphs.get_unique_hashtags(tweets)
+
+    hashtag_users_dict = MentionGraphs.construct_hashtag_users_index(tweets, unique_hashtags)
+    hashtag_users_dict, key_weights = HubHashtags.apply_hub_hashtag_guard(hub_guard, hashtag_users_dict)
+    return score_co_occurrences(hashtag_users_dict, key_weights=key_weights, num_workers=num_workers,
+                                num_shards=num_shards)
+
+
+# tweets are classified in the calling process; only the co-occurrences are scored in parallel
+def score_sa_optimized(tweets, classifier, score_dict, unique_hashtags, sentiments=None, hub_guard=None,
+                       num_workers=None, num_shards=DEFAULT_NUM_SHARDS):
+    if sentiments is None:
+        sentiments = MentionGraphs.classify_tweets_with_hashtags(tweets, classifier, unique_hashtags, with_context=True)
+
+    hashtag_sentiment_users_dict = MentionGraphs.construct_hashtag_sentiment_users_index(tweets, sentiments,
+                                                                                         unique_hashtags)
+    hashtag_sentiment_users_dict, key_weights = HubHashtags.apply_hub_hashtag_guard(hub_guard,
+                                                                                    hashtag_sentiment_users_dict)
+    return score_co_occurrences(hashtag_sentiment_users_dict, score_dict, only_existing_pairs=True,
+                                key_weights=key_weights, num_workers=num_workers, num_shards=num_shards)
+
+
+def score_sa(tweets, classifier, unique_hashtags=None, sentiments=None, hub_guard=None, num_workers=None,
+             num_shards=DEFAULT_NUM_SHARDS):
+    if not unique_hashtags:
+        unique_hashtags = MentionGraphs.get_unique_hashtags(tweets)
+
+    if sentiments is None:
+        sentiments = MentionGraphs.classify_tweets_with_hashtags(tweets, classifier, unique_hashtags, with_context=False)
+
+    hashtag_sentiment_users_dict = MentionGraphs.construct_hashtag_sentiment_users_index(tweets, sentiments,
+                                                                                         unique_hashtags)
+    hashtag_sentiment_users_dict, key_weights = HubHashtags.apply_hub_hashtag_guard(hub_guard,
+                                                                                    hashtag_sentiment_users_dict)
+    return score_co_occurrences(hashtag_sentiment_users_dict, key_weights=key_weights, num_workers=num_workers,
+                                num_shards=num_shards)
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import pickle
+
+
+# Content-addressed cache for the stages of MentionGraphs.construct_user_mention_hashtag_sa_graph.
+# A stage key is a hash of the key of the stage before it plus the configuration the stage depends on,
+# so changing e.g. only the SA classifier changes the keys of the SA and normalize stages but not of the
+# mentions and hashtags stages, which are loaded from the cache instead of being recomputed.
+
+class StageCache(object):
+
+    def __init__(self, cache_dir="stage-cache"):
+        self.cache_dir = cache_dir
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    def get_key(self, stage_name, *parts):
+        hasher = hashlib.sha1(stage_name.encode("utf-8"))
+        for part in parts:
+            hasher.update(b"\0")
+            hasher.update(describe(part).encode("utf-8"))
+        return "{}-{}".format(stage_name, hasher.hexdigest())
+
+    def get_path(self, key):
+        return os.path.join(self.cache_dir, key + ".pickle")
+
+    def exists(self, key):
+        return os.path.exists(self.get_path(key))
+
+    def load(self, key):
+        with open(self.get_path(key), "rb") as cache_file:
+            return pickle.load(cache_file)
+
+    # written to a temporary file first so an interrupted run never leaves a truncated stage behind
+    def save(self, key, value):
+        temp_path = self.get_path(key) + ".tmp"
+        with open(temp_path, "wb") as cache_file:
+            pickle.dump(value, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.get_path(key))
+
+    def get_or_compute(self, key, compute_func, verbose=False):
+        if self.exists(key):
+            if verbose:
+                print("Stage cache hit: {}".format(key))
+            return self.load(key)
+
+        if verbose:
+            print("Stage cache miss: {}".format(key))
+        value = compute_func()
+        self.save(key, value)
+        return value
+
+
+def run_stage(stage_cache, key, compute_func, verbose=False):
+    if stage_cache is None:
+        return compute_func()
+    return stage_cache.get_or_compute(key, compute_func, verbose)
+
+
+# hash of the tweets in order: tweet ids where available, otherwise user and text (e.g. SentiTweetAdapter)
+def hash_tweets(tweets):
+    hasher = hashlib.sha1()
+    for tweet in tweets:
+        tweet_id = getattr(tweet, "id", None)
+        if tweet_id is not None:
+            hasher.update(str(tweet_id).encode("utf-8"))
+        else:
+            hasher.update(tweet.user.id_str.encode("utf-8"))
+            hasher.update(b"\0")
+            hasher.update(tweet.text.encode("utf-8"))
+        hasher.update(b"\n")
+    return hasher.hexdigest()
+
+
+# stable description of configuration objects (preprocessors, hub guards) for the stage keys
+def describe(part):
+    if part is None or isinstance(part, (bool, int, float, str)):
+        return repr(part)
+    if isinstance(part, (list, tuple)):
+        return "[" + ",".join(describe(item) for item in part) + "]"
+    if isinstance(part, dict):
+        return "{" + ",".join(describe(key) + ":" + describe(part[key]) for key in sorted(part, key=repr)) + "}"
+    if isinstance(part, (set, frozenset)):
+        return "{" + ",".join(sorted(describe(item) for item in part)) + "}"
+    if hasattr(part, "pattern"):  # compiled regex
+        return "re({})".format(repr(part.pattern))
+    if hasattr(part, "__dict__"):
+        attributes = {key: value for key, value in vars(part).items() if key != "report"}
+        return "{}{}".format(type(part).__name__, describe(attributes))
+    return "{}({})".format(type(part).__name__, repr(part))
+
+
+# classifiers are described by name and by the settings that change their output (with_context, model paths,
+# preprocessors); attributes holding loaded models or lexicons are left out
+def describe_classifier(classifier):
+    name = classifier.get_name() if hasattr(classifier, "get_name") else None
+    settings = {}
+    if hasattr(classifier, "__dict__"):
+        settings = {key: value for key, value in vars(classifier).items()
+                    if value is None or isinstance(value, (bool, int, float, str, list, tuple))}
+    return "{}({}){}".format(type(classifier).__name__, name, describe(settings))
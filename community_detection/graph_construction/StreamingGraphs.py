@@ -0,0 +1,403 @@
+import os
+import pickle
+from array import array
+
+import numpy
+
+from community_detection import TweetSentiments
+from community_detection.graph_construction import CoOccurrence
+from community_detection.graph_construction import HubHashtags
+from community_detection.graph_construction.GraphBuilder import GraphBuilder
+from community_detection.graph_construction.MentionGraphs import get_pairs_above_threshold, get_tweet_hashtags
+from community_detection.graph_construction.PairScores import PairScores, UserIdInterner, unpack_pairs
+from sentiment_analysis.preprocessing import PreProcessing
+from twitter_data.JSONTweets import parse_json_tweets
+from twitter_data.parsing.json_parser import JSONParser
+
+
+# Streaming version of MentionGraphs.construct_user_mention_hashtag_sa_graph with packed scores.
+# Tweets are consumed one at a time and only reduced to what the scores need: interned mention pairs,
+# the distinct hashtags and (hashtag, sentiment) keys of every user and the user vertices.
+# Memory grows with the number of users and distinct pairs, not with the number of tweets.
+# The accumulator is pickled next to the graph so later batches of tweets can update the graph in place.
+
+class MentionHashtagSAAccumulator(object):
+
+    def __init__(self, classifier, sa_preprocessors=[], with_context=True, batch_size=500, compact_every=1000000):
+        self.classifier = classifier
+        self.sa_preprocessors = sa_preprocessors
+        self.with_context = with_context
+        self.batch_size = batch_size
+        self.compact_every = compact_every
+
+        # users are added to the builder and the interner in the same order, so vertex id == interned user index
+        self.builder = GraphBuilder(directed=False)
+        self.interner = UserIdInterner()
+
+        # mention pairs are buffered and compacted into mention_scores every compact_every mentions
+        self.mention_sources = array("i")
+        self.mention_targets = array("i")
+        self.mention_scores = PairScores(self.interner)
+
+        # user index -> set of key ids
+        self.hashtag_ids = {}
+        self.user_hashtags = {}
+        self.sentiment_key_ids = {}
+        self.user_sentiment_keys = {}
+
+        # tweets with hashtags waiting to be classified in one classify_sentiments call
+        self.pending_tweets = []
+        self.num_tweets = 0
+
+        # state of the last scoring, used by update: the hashtag and SA counts aligned with mention_scores, the
+        # mention pair keys with the larger user id first in sorted order, the mentions compacted and the users that
+        # got new keys since then, the max score used for normalizing and the threshold of the graph
+        self.co_occurrence_counts = None
+        self.reverse_mention_keys = None
+        self.batch_mention_scores = None
+        self.changed_users = set()
+        self.hub_guard = None
+        self.max_score = 0
+        self.threshold = None
+
+    # the classifier holds the loaded models so it is not pickled; update takes it again
+    def __getstate__(self):
+        self.classify_pending_tweets()
+        state = self.__dict__.copy()
+        state["classifier"] = None
+        return state
+
+    def add_user(self, user_id_str, user_screen_name):
+        self.builder.add_user_vertex(user_id_str, user_screen_name)
+        return self.interner.intern(user_id_str)
+
+    def add_key(self, user_keys, user_index, key_id):
+        keys = user_keys.get(user_index, None)
+        if keys is None:
+            keys = set()
+            user_keys[user_index] = keys
+        if key_id not in keys:
+            keys.add(key_id)
+            self.changed_users.add(user_index)
+
+    def add_tweet(self, tweet):
+        self.num_tweets += 1
+        user_index = self.add_user(tweet.user.id_str, tweet.user.screen_name)
+
+        for mention_dict in tweet.entities.get('user_mentions'):
+            self.mention_sources.append(user_index)
+            self.mention_targets.append(self.add_user(mention_dict["id_str"], mention_dict["screen_name"]))
+        if len(self.mention_sources) >= self.compact_every:
+            self.compact_mentions()
+
+        tweet_hashtags = set(get_tweet_hashtags(tweet))
+        if not tweet_hashtags:
+            return
+
+        for hashtag in tweet_hashtags:
+            self.add_key(self.user_hashtags, user_index, self.hashtag_ids.setdefault(hashtag, len(self.hashtag_ids)))
+
+        self.pending_tweets.append((user_index, tweet_hashtags, tweet))
+        if len(self.pending_tweets) >= self.batch_size:
+            self.classify_pending_tweets()
+
+    def add_tweets(self, tweets, verbose=False):
+        for tweet in tweets:
+            self.add_tweet(tweet)
+            if verbose and self.num_tweets % 10000 == 0:
+                print("Streaming user mention hashtag SA graph: processed {} tweets, {} users".format(
+                    self.num_tweets, len(self.interner)))
+        return self
+
+    def compact_mentions(self):
+        if len(self.mention_sources) == 0:
+            return self.mention_scores
+        new_scores = PairScores.from_pairs(self.interner, numpy.frombuffer(self.mention_sources, dtype=numpy.int32),
+                                           numpy.frombuffer(self.mention_targets, dtype=numpy.int32))
+        is_new, insert_positions = self.mention_scores.merge(new_scores)
+        if self.co_occurrence_counts is not None:
+            # new pairs have no co-occurrences until they are rescored
+            self.co_occurrence_counts = numpy.insert(self.co_occurrence_counts, insert_positions, 0)
+            reverse_keys = numpy.sort(reverse_pairs(new_scores.keys[is_new]))
+            self.reverse_mention_keys = numpy.insert(self.reverse_mention_keys,
+                                                     numpy.searchsorted(self.reverse_mention_keys, reverse_keys),
+                                                     reverse_keys)
+            self.batch_mention_scores.merge(new_scores)
+        self.mention_sources = array("i")
+        self.mention_targets = array("i")
+        return self.mention_scores
+
+    def classify_pending_tweets(self):
+        if not self.pending_tweets:
+            return
+
+        tweet_texts = [PreProcessing.preprocess_strings([tweet.text], self.sa_preprocessors)[0]
+                       for user_index, tweet_hashtags, tweet in self.pending_tweets]
+        if self.with_context:
+            conv_contexts = TweetSentiments.get_conversation_contexts([tweet for user_index, tweet_hashtags, tweet
+                                                                       in self.pending_tweets])
+            contextual_info_dicts = [{"conv_context": conv_context} for conv_context in conv_contexts]
+        else:
+            contextual_info_dicts = [{} for tweet in self.pending_tweets]
+
+        sentiments = self.classifier.classify_sentiments(tweet_texts, contextual_info_dicts)
+        for (user_index, tweet_hashtags, tweet), sentiment in zip(self.pending_tweets, sentiments):
+            if sentiment != 'positive' and sentiment != 'negative':
+                continue
+            for hashtag in tweet_hashtags:
+                key_id = self.sentiment_key_ids.setdefault((hashtag, sentiment), len(self.sentiment_key_ids))
+                self.add_key(self.user_sentiment_keys, user_index, key_id)
+
+        self.pending_tweets = []
+
+    # incidence matrix with one row per user in user_indices
+    def get_incidence_matrix(self, user_keys, num_keys, user_indices):
+        rows = []
+        cols = []
+        for row, user_index in enumerate(user_indices):
+            keys = user_keys.get(user_index, ())
+            rows.extend([row] * len(keys))
+            cols.extend(keys)
+        return CoOccurrence.construct_incidence_matrix_from_indices(rows, cols, len(user_indices), num_keys)
+
+    # number of hashtags plus (hashtag, sentiment) keys shared by each pair of interned users
+    def count_co_occurrences(self, source_indices, target_indices):
+        user_indices = numpy.unique(numpy.concatenate([source_indices, target_indices]))
+        local_sources = numpy.searchsorted(user_indices, source_indices)
+        local_targets = numpy.searchsorted(user_indices, target_indices)
+
+        counts = numpy.zeros(len(source_indices), dtype=numpy.float64)
+        for user_keys, key_ids in [(self.user_hashtags, self.hashtag_ids), (self.user_sentiment_keys, self.sentiment_key_ids)]:
+            incidence_matrix = self.get_incidence_matrix(user_keys, len(key_ids), user_indices.tolist())
+            counts += CoOccurrence.compute_counts_for_pairs(incidence_matrix, local_sources, local_targets)
+        counts[source_indices == target_indices] = 0
+        return counts
+
+    # the guards work on user id strs so hub samples are the same as in the batch pipeline
+    def count_guarded_co_occurrences(self, hub_guard, verbose=False):
+        counts = PairScores(self.interner, self.mention_scores.keys,
+                            numpy.zeros(len(self.mention_scores), dtype=numpy.float64))
+        for user_keys, key_ids in [(self.user_hashtags, self.hashtag_ids), (self.user_sentiment_keys, self.sentiment_key_ids)]:
+            keys = sorted(key_ids, key=key_ids.get)
+            key_users_dict = {}
+            for user_index, user_key_ids in user_keys.items():
+                for key_id in user_key_ids:
+                    key_users_dict.setdefault(keys[key_id], []).append(self.interner.get_user_id(user_index))
+            key_users_dict, key_weights = HubHashtags.apply_hub_hashtag_guard(hub_guard, key_users_dict, verbose)
+            CoOccurrence.score_pair_scores(key_users_dict, counts, key_weights)
+        return counts.scores
+
+    def get_scores(self):
+        return PairScores(self.interner, self.mention_scores.keys.copy(),
+                          self.mention_scores.scores + self.co_occurrence_counts)
+
+    # mention scores plus hashtag and SA co-occurrences of the mention pairs, like score_hashtags_optimized and
+    # score_sa_optimized with packed scores
+    def score(self, hub_guard=None, verbose=False):
+        self.compact_mentions()
+        self.classify_pending_tweets()
+        if verbose:
+            print("Mention scores length: {}".format(len(self.mention_scores)))
+            print("Constructing hashtag and sa scores")
+
+        self.hub_guard = hub_guard
+        if hub_guard is None:
+            self.co_occurrence_counts = self.count_co_occurrences(*self.mention_scores.get_pairs())
+        else:
+            self.co_occurrence_counts = self.count_guarded_co_occurrences(hub_guard, verbose)
+        self.reverse_mention_keys = numpy.sort(reverse_pairs(self.mention_scores.keys))
+        self.batch_mention_scores = PairScores(self.interner)
+        self.changed_users = set()
+
+        scores = self.get_scores()
+        self.max_score = scores.get_max_score()
+        return scores
+
+    # returns (graph without edges, normalized PairScores)
+    def finish(self, hub_guard=None, verbose=False):
+        final_scores = self.score(hub_guard, verbose)
+        if verbose:
+            print("Normalizing scores")
+        final_scores.normalize()
+        return self.builder.build(), final_scores
+
+    # indices in mention_scores of the pairs of users that got new keys since the last scoring: the pairs of a user
+    # are one range of the sorted keys where it is the smaller id and one range of reverse_mention_keys
+    def get_changed_user_pair_indices(self):
+        changed_users = numpy.array(sorted(self.changed_users), dtype=numpy.int64)
+        starts = numpy.left_shift(changed_users, 32)
+        ends = numpy.left_shift(changed_users + 1, 32)
+
+        keys = self.mention_scores.keys
+        indices = concatenate_ranges(numpy.searchsorted(keys, starts), numpy.searchsorted(keys, ends))
+        reverse_indices = concatenate_ranges(numpy.searchsorted(self.reverse_mention_keys, starts),
+                                             numpy.searchsorted(self.reverse_mention_keys, ends))
+        reverse_keys = reverse_pairs(self.reverse_mention_keys[reverse_indices])
+        return numpy.union1d(indices, numpy.searchsorted(keys, reverse_keys))
+
+    # Rescores the mention pairs that were mentioned since the last scoring or have a user who got a new hashtag or
+    # (hashtag, sentiment) key since then. Only those pairs are looked at. Returns (sorted indices of those pairs in
+    # mention_scores, their scores before the update, mask of the pairs that did not exist before).
+    def rescore_changed_pairs(self):
+        if self.co_occurrence_counts is None:
+            raise ValueError("Accumulator has to be scored before it can be updated")
+        if self.hub_guard is not None:
+            raise ValueError("Incremental updates do not support hub hashtag guards")
+
+        self.classify_pending_tweets()
+        self.compact_mentions()
+
+        # mentions may have been compacted while the tweets were added, so they are taken from batch_mention_scores
+        batch_indices = numpy.searchsorted(self.mention_scores.keys, self.batch_mention_scores.keys)
+        rescored_indices = numpy.union1d(batch_indices, self.get_changed_user_pair_indices())
+
+        old_mention_scores = self.mention_scores.scores[rescored_indices]
+        old_mention_scores[numpy.searchsorted(rescored_indices, batch_indices)] -= self.batch_mention_scores.scores
+        old_scores = old_mention_scores + self.co_occurrence_counts[rescored_indices]
+
+        if len(rescored_indices):
+            source_indices, target_indices = unpack_pairs(self.mention_scores.keys[rescored_indices])
+            self.co_occurrence_counts[rescored_indices] = self.count_co_occurrences(source_indices, target_indices)
+
+        self.batch_mention_scores = PairScores(self.interner)
+        self.changed_users = set()
+        return rescored_indices, old_scores, old_mention_scores == 0
+
+    # adds a batch of new tweets to the accumulator and to graph, a graph built from this accumulator with the
+    # edges of self.threshold. Vertices are appended and only edges whose normalized score crossed THRESHOLD are
+    # added or deleted. Apart from the sorted merge of the new mention pairs, the work is proportional to the pairs
+    # of users in the batch; all pairs are only rechecked if the max score or the threshold changed.
+    def update(self, graph, tweets, classifier, THRESHOLD=None, verbose=False):
+        if THRESHOLD is None:
+            THRESHOLD = self.threshold
+        self.classifier = classifier
+
+        old_max_score = self.max_score
+        old_threshold = self.threshold
+
+        self.add_tweets(tweets, verbose=verbose)
+        changed_indices, old_scores, is_new = self.rescore_changed_pairs()
+        scores = self.mention_scores.scores[changed_indices] + self.co_occurrence_counts[changed_indices]
+        # mention counts and shared keys only grow, so the max score can only be one of the rescored pairs
+        if len(scores):
+            self.max_score = max(old_max_score, scores.max().item())
+
+        if self.max_score != old_max_score or THRESHOLD != old_threshold:
+            all_scores = self.mention_scores.scores + self.co_occurrence_counts
+            all_old_scores = all_scores.copy()
+            all_old_scores[changed_indices] = old_scores
+            all_is_new = numpy.zeros(len(all_scores), dtype=bool)
+            all_is_new[changed_indices] = is_new
+            changed_indices, scores, old_scores, is_new = numpy.arange(len(all_scores)), all_scores, all_old_scores, all_is_new
+
+        was_edge = is_above_threshold(old_scores, old_max_score, old_threshold) & ~is_new
+        is_edge = is_above_threshold(scores, self.max_score, THRESHOLD)
+
+        removed_sources, removed_targets = unpack_pairs(self.mention_scores.keys[changed_indices[was_edge & ~is_edge]])
+        added_sources, added_targets = unpack_pairs(self.mention_scores.keys[changed_indices[is_edge & ~was_edge]])
+
+        old_vcount = graph.vcount()
+        if self.builder.vcount() > old_vcount:
+            graph.add_vertices(self.builder.vcount() - old_vcount)
+            new_vertices = graph.vs[old_vcount:]
+            for attribute, values in self.builder.vertex_attributes.items():
+                new_vertices[attribute] = values[old_vcount:]
+
+        if len(removed_sources):
+            edge_ids = graph.get_eids(pairs=list(zip(removed_sources.tolist(), removed_targets.tolist())), error=False)
+            graph.delete_edges([edge_id for edge_id in edge_ids if edge_id >= 0])
+
+        old_ecount = graph.ecount()
+        if len(added_sources):
+            graph.add_edges(list(zip(added_sources.tolist(), added_targets.tolist())))
+            graph.es[old_ecount:]["weight"] = 1
+
+        self.threshold = THRESHOLD
+        if verbose:
+            print("Updated user mention hashtag SA graph: {} new vertices, {} edges added, {} edges removed".format(
+                graph.vcount() - old_vcount, len(added_sources), len(removed_sources)))
+        return graph
+
+
+# keys of the same pairs with the larger user id in the high bits
+def reverse_pairs(keys):
+    return numpy.left_shift(keys & 0xFFFFFFFF, 32) | numpy.right_shift(keys, 32)
+
+
+# indices starts[0]..ends[0]-1, starts[1]..ends[1]-1, ...
+def concatenate_ranges(starts, ends):
+    lengths = ends - starts
+    return numpy.repeat(starts - numpy.cumsum(lengths) + lengths, lengths) + numpy.arange(lengths.sum())
+
+
+# same comparison as normalizing the scores by max_score and keeping the scores >= threshold
+def is_above_threshold(scores, max_score, threshold):
+    if max_score == 0:
+        return scores >= threshold
+    return scores / max_score >= threshold
+
+
+# tweets can be any iterable (e.g. a generator over json files); no tweet is kept after it was added.
+# The accumulator is saved as accumulators-{pickle_file_name} for update_user_mention_hashtag_sa_graph.
+def construct_user_mention_hashtag_sa_graph_from_tweets(tweets, classifier, pickle_file_name, THRESHOLD=0.5,
+                                                        sa_preprocessors=[], verbose=False, hub_guard=None,
+                                                        with_context=True, batch_size=500, compact_every=1000000):
+    accumulator = MentionHashtagSAAccumulator(classifier, sa_preprocessors=sa_preprocessors, with_context=with_context,
+                                              batch_size=batch_size, compact_every=compact_every)
+    accumulator.add_tweets(tweets, verbose=verbose)
+    if verbose:
+        print("Streamed {} tweets from {} users".format(accumulator.num_tweets, len(accumulator.interner)))
+
+    graph, final_scores = accumulator.finish(hub_guard, verbose)
+
+    graph.save("without-edges-{}".format(pickle_file_name))
+    pickle.dump(final_scores, open("final-scores-{}".format(pickle_file_name), "wb"))
+
+    if verbose:
+        print("Creating list of edges based on threshold score")
+
+    new_edges = get_pairs_above_threshold(final_scores, THRESHOLD)
+
+    if verbose:
+        print("Adding {} edges".format(len(new_edges)))
+    graph.add_edges(list(new_edges))
+    graph.es["weight"] = 1
+    graph.save("threshold-{}-{}".format(THRESHOLD, pickle_file_name))
+
+    accumulator.threshold = THRESHOLD
+    pickle.dump(accumulator, open("accumulators-{}".format(pickle_file_name), "wb"))
+
+    return graph
+
+
+# json_files as returned by FolderIO.get_files; every file is read once
+def construct_user_mention_hashtag_sa_graph_from_json(json_files, classifier, pickle_file_name, THRESHOLD=0.5,
+                                                      sa_preprocessors=[], verbose=False, hub_guard=None,
+                                                      with_context=True, batch_size=500, compact_every=1000000):
+    tweet_generator = parse_json_tweets(JSONParser.parse_files_into_json_generator(json_files))
+    return construct_user_mention_hashtag_sa_graph_from_tweets(tweet_generator, classifier, pickle_file_name,
+                                                               THRESHOLD=THRESHOLD, sa_preprocessors=sa_preprocessors,
+                                                               verbose=verbose, hub_guard=hub_guard,
+                                                               with_context=with_context, batch_size=batch_size,
+                                                               compact_every=compact_every)
+
+
+# updates the graph and accumulators saved by construct_user_mention_hashtag_sa_graph_from_tweets with a batch of
+# new tweets; builds them from the batch if they do not exist yet. Loading and saving them takes time in proportion
+# to the whole graph, so a stream of small batches should keep the accumulator and call its update method.
+def update_user_mention_hashtag_sa_graph(tweets, classifier, pickle_file_name, THRESHOLD=0.5, sa_preprocessors=[],
+                                         verbose=False):
+    accumulator_file_name = "accumulators-{}".format(pickle_file_name)
+    if not os.path.exists(accumulator_file_name):
+        return construct_user_mention_hashtag_sa_graph_from_tweets(tweets, classifier, pickle_file_name,
+                                                                   THRESHOLD=THRESHOLD, sa_preprocessors=sa_preprocessors,
+                                                                   verbose=verbose)
+
+    accumulator = pickle.load(open(accumulator_file_name, "rb"))
+    graph = pickle.load(open("threshold-{}-{}".format(accumulator.threshold, pickle_file_name), "rb"))
+
+    accumulator.update(graph, tweets, classifier, THRESHOLD=THRESHOLD, verbose=verbose)
+
+    graph.save("threshold-{}-{}".format(THRESHOLD, pickle_file_name))
+    pickle.dump(accumulator, open(accumulator_file_name, "wb"))
+    return graph
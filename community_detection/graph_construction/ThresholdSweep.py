@@ -0,0 +1,73 @@
+import numpy
+
+from community_detection.graph_construction.PairScores import PairScores
+
+
+# Threshold sweep over the final scores of construct_user_mention_hashtag_sa_graph.
+# The scores are sorted once in descending order, so the edges of any threshold are a prefix slice and
+# going to a lower threshold only adds the next slice of edges to the graph.
+
+class ThresholdSweep(object):
+
+    def __init__(self, base_graph, final_scores):
+        self.base_graph = base_graph
+
+        vertex_index = {name: index for index, name in enumerate(base_graph.vs["name"])} if base_graph.vcount() > 0 else {}
+        sources, targets, scores = get_vertex_pairs_and_scores(final_scores, vertex_index)
+
+        order = numpy.argsort(-scores, kind="stable")
+        self.sources = sources[order]
+        self.targets = targets[order]
+        self.sorted_scores = scores[order]
+
+    # number of pairs with score >= threshold
+    def get_edge_count(self, threshold):
+        return int(numpy.searchsorted(-self.sorted_scores, -threshold, side="right"))
+
+    def get_edges(self, threshold, start=0):
+        end = self.get_edge_count(threshold)
+        return list(zip(self.sources[start:end].tolist(), self.targets[start:end].tolist()))
+
+    def construct_graph(self, threshold):
+        graph = self.base_graph.copy()
+        graph.add_edges(self.get_edges(threshold))
+        graph.es["weight"] = 1
+        return graph
+
+    # yields (threshold, graph) from the highest to the lowest threshold. Only one graph is kept and each step adds
+    # the edges between the previous and the current threshold, so copy the graph if it has to outlive the step.
+    def iterate_graphs(self, thresholds):
+        graph = self.base_graph.copy()
+        edge_count = 0
+        for threshold in sorted(thresholds, reverse=True):
+            new_edges = self.get_edges(threshold, start=edge_count)
+            graph.add_edges(new_edges)
+            edge_count += len(new_edges)
+            graph.es["weight"] = 1
+            yield threshold, graph
+
+    # yields (threshold, membership) computed with community_detection_func(graph) for each threshold
+    def iterate_memberships(self, thresholds, community_detection_func):
+        for threshold, graph in self.iterate_graphs(thresholds):
+            yield threshold, community_detection_func(graph)
+
+    def get_edge_counts(self, thresholds):
+        return [(threshold, self.get_edge_count(threshold)) for threshold in thresholds]
+
+
+# vertex id arrays and score array for score dicts or PairScores; pairs with a user missing from the graph are skipped
+def get_vertex_pairs_and_scores(final_scores, vertex_index):
+    if isinstance(final_scores, PairScores):
+        interned_to_vertex = numpy.array([vertex_index.get(user_id, -1) for user_id in final_scores.interner.user_ids],
+                                         dtype=numpy.int64)
+        source_indices, target_indices = final_scores.get_pairs()
+        sources = interned_to_vertex[source_indices] if len(interned_to_vertex) else numpy.zeros(0, dtype=numpy.int64)
+        targets = interned_to_vertex[target_indices] if len(interned_to_vertex) else numpy.zeros(0, dtype=numpy.int64)
+        scores = final_scores.scores
+    else:
+        sources = numpy.array([vertex_index.get(a, -1) for a, b in final_scores.keys()], dtype=numpy.int64)
+        targets = numpy.array([vertex_index.get(b, -1) for a, b in final_scores.keys()], dtype=numpy.int64)
+        scores = numpy.array(list(final_scores.values()), dtype=numpy.float64)
+
+    in_graph = (sources >= 0) & (targets >= 0)
+    return sources[in_graph], targets[in_graph], scores[in_graph]
@@ -1,5 +1,7 @@
 from igraph import *
 
+from community_detection.graph_construction import FollowGraphs
+from community_detection.graph_construction.GraphBuilder import GraphBuilder
 from twitter_data.database import DBManager
 
 
@@ -33,13 +35,10 @@ def construct_tweet_graph(graph, tweets, limit=10000, start_index=0):
 
 
 def construct_tweet_hashtag_graph_with_sentiment(graph, tweets, pickle_file_name, sentiment_classifier):
-    if graph is None:
-        graph = Graph(directed=False)
-
-    new_edges = set()
+    builder = GraphBuilder(graph, directed=False)
 
     for index, tweet in enumerate(tweets):
-        add_tweet_vertex(graph, tweet)
+        builder.add_tweet_vertex(tweet)
         hashtags = [hashtag_dict["text"].lower() for hashtag_dict in tweet.entities.get('hashtags')]
 
         sentiment = sentiment_classifier.classify_sentiment(tweet.text, {})
@@ -47,17 +46,17 @@ def construct_tweet_hashtag_graph_with_sentiment(graph, tweets, pickle_file_name
         hashtag_sentiment_set = set()
 
         for hashtag in hashtags:
-            add_hashtag_vertex(graph, hashtag+"-"+sentiment)
+            builder.add_hashtag_vertex(hashtag+"-"+sentiment)
             hashtag_sentiment_set.add(hashtag+"-"+sentiment)
 
         # edges
         # USER TO HASHTAG EDGE
         for hashtag in hashtag_sentiment_set:
-            new_edges.add((str(tweet.id), hashtag))
+            builder.add_edge(str(tweet.id), hashtag)
 
         print("Constructing base graph: Processed {}/{} tweets.".format(index,len(tweets)))
 
-    graph.add_edges(list(new_edges))
+    graph = builder.build()
     graph.es["weight"] = 1
     graph.save(pickle_file_name)
 
@@ -65,75 +64,35 @@ def construct_tweet_hashtag_graph_with_sentiment(graph, tweets, pickle_file_name
 
 
 def construct_user_graph(graph, tweet_objects, pickle_file_name, limit=10000, start_index=0, verbose=False):
-    if graph is None:
-        graph = Graph(directed=True)
+    builder = GraphBuilder(graph, directed=True)
 
-    new_edges = set()
-    found_tweets = 0
+    # each user is registered once no matter how many tweets they have
+    user_index = {}
     for index, tweet_object in enumerate(tweet_objects):
 
         if index >= start_index:
-
-            found_tweets += 1
             user_id = tweet_object.user.id_str
             username = tweet_object.user.screen_name
 
-            add_user_vertex(graph, user_id, username)
-
-            # construct directed edges if user A follows user B
-            # loop through all vertices and check if they are in following or followers then create appropriate edge
-            all_user_ids = graph.vs["name"]
-
-            # this code is flawed because DBManager.get followers/following should be corrected. it currently has a limit to avoid being stuck with one user
-            follower_ids = DBManager.get_or_add_followers_ids(user_id)
-            following_ids = DBManager.get_or_add_following_ids(user_id)
-
-            for other_user_id in all_user_ids:
-                if follower_ids and other_user_id in follower_ids:
-                    new_edges.add((other_user_id, user_id))
-
-                if following_ids and other_user_id in following_ids:
-                    new_edges.add((user_id, other_user_id))
-
-            # for other_user_id in all_user_ids:
-            #     friendship = DBManager.get_or_add_friendship(user_id, other_user_id)
-            #
-            #     if friendship:
-            #         if user_id < other_user_id:
-            #             if friendship["following"] is True:
-            #                 new_edges.add((user_id, other_user_id))
-            #             if friendship["followed_by"] is True:
-            #                 new_edges.add((other_user_id, user_id))
-            #
-            #         else:
-            #             if friendship["following"] is True:
-            #                 new_edges.add((other_user_id, user_id))
-            #             if friendship["followed_by"] is True:
-            #                 new_edges.add((user_id, other_user_id))
-
-            if verbose:
-                # print("Saved {} at tweet index {}".format(pickle_file_name, index))
-                print("# of edges and vertices after processing {} - {} - {}".format(user_id, graph.ecount(), all_user_ids.__len__()))
-
-    graph.add_edges(list(new_edges))
-    graph.es["weight"] = 1
-    graph.save(pickle_file_name)
-        # new_edges = set()
+            user_index[user_id] = builder.add_user_vertex(user_id, username)
 
+    # construct directed edges if user A follows user B, also to and from the vertices of a passed-in graph
+    for source_vertex_id, target_vertex_id in FollowGraphs.get_follow_edges(user_index, verbose, builder.vertex_ids):
+        builder.add_edge_by_id(source_vertex_id, target_vertex_id)
 
-    # print("Final edges to be added: ")
-    # print(new_edges)
-    # graph.add_edges(list(new_edges))
+    if verbose:
+        print("# of edges and vertices: {} - {}".format(builder.ecount(), builder.vcount()))
+
+    graph = builder.build()
+    graph.es["weight"] = 1
+    graph.save(pickle_file_name)
 
     return graph
 
 
 def construct_user_mention_graph(graph, tweets,  pickle_file_name, start_index=0, verbose=False):
 
-    if graph is None:
-        graph = Graph(directed=True)
-
-    new_edges = set()
+    builder = GraphBuilder(graph, directed=True)
 
     for index, tweet in enumerate(tweets):
         user_id_str = tweet.user.id_str
@@ -142,29 +101,85 @@ def construct_user_mention_graph(graph, tweets,  pickle_file_name, start_index=0
         mentions_idstr_screenname_tuples = [(mention_dict["id_str"], mention_dict["screen_name"]) for mention_dict in tweet.entities.get('user_mentions')]
 
         ### CREATE VERTICES ###
-        add_user_vertex(graph, user_id_str, user_screen_name)
+        user_vertex_id = builder.add_user_vertex(user_id_str, user_screen_name)
 
         ### CREATE EDGES ###
 
         # USER TO USER EDGE
         for other_user_id_str, other_user_screen_name in mentions_idstr_screenname_tuples:
-            add_user_vertex(graph, other_user_id_str, other_user_screen_name)
-            new_edges.add((user_id_str, other_user_id_str))
+            other_user_vertex_id = builder.add_user_vertex(other_user_id_str, other_user_screen_name)
+            builder.add_edge_by_id(user_vertex_id, other_user_vertex_id)
 
         print("Constructing base mention graph: Processed {}/{} tweets.".format(index,len(tweets)))
 
-    graph.add_edges(list(new_edges))
+    graph = builder.build()
     graph.es["weight"] = 1
     graph.save(pickle_file_name)
 
     return graph
 
-def construct_user_hashtag_graph(graph, tweets,  pickle_file_name, start_index=0, verbose=False):
 
-    if graph is None:
-        graph = Graph(directed=False)
+# adds the users and mention edges of a batch of new tweets to a graph built by construct_user_mention_graph.
+# Only the vertices and edges of the batch are looked up and the graph is changed in place with one add_vertices
+# and one add_edges call, so the cost depends on the size of the batch and not on the size of the graph.
+def update_user_mention_graph(graph, tweets, pickle_file_name, verbose=False):
+    old_vcount = graph.vcount()
+    vertex_ids = {}
+    new_vertex_attributes = {"name": [], "username": [], "display_str": []}
+
+    def get_or_add_user_vertex(user_id_str, user_screen_name):
+        vertex_id = vertex_ids.get(user_id_str, None)
+        if vertex_id is None:
+            vertex_id = find_vertex_id(graph, user_id_str)
+            if vertex_id is None:
+                vertex_id = old_vcount + len(new_vertex_attributes["name"])
+                new_vertex_attributes["name"].append(user_id_str)
+                new_vertex_attributes["username"].append(user_screen_name)
+                new_vertex_attributes["display_str"].append(user_screen_name)
+            vertex_ids[user_id_str] = vertex_id
+        return vertex_id
+
+    batch_edges = []
+    batch_edge_set = set()
+    for tweet in tweets:
+        user_vertex_id = get_or_add_user_vertex(tweet.user.id_str, tweet.user.screen_name)
+        for mention_dict in tweet.entities.get('user_mentions'):
+            edge = (user_vertex_id, get_or_add_user_vertex(mention_dict["id_str"], mention_dict["screen_name"]))
+            if edge not in batch_edge_set:
+                batch_edge_set.add(edge)
+                batch_edges.append(edge)
+
+    # edges between two existing vertices may already be in the graph
+    existing_vertex_edges = [edge for edge in batch_edges if edge[0] < old_vcount and edge[1] < old_vcount]
+    existing_edges = set()
+    if existing_vertex_edges:
+        edge_ids = graph.get_eids(pairs=existing_vertex_edges, error=False)
+        existing_edges = {edge for edge, edge_id in zip(existing_vertex_edges, edge_ids) if edge_id >= 0}
+    new_edges = [edge for edge in batch_edges if edge not in existing_edges]
+
+    if new_vertex_attributes["name"]:
+        graph.add_vertices(len(new_vertex_attributes["name"]))
+        new_vertices = graph.vs[old_vcount:]
+        for attribute, values in new_vertex_attributes.items():
+            new_vertices[attribute] = values
+
+    old_ecount = graph.ecount()
+    if new_edges:
+        graph.add_edges(new_edges)
+        graph.es[old_ecount:]["weight"] = 1
+
+    if verbose:
+        print("Updated mention graph: {} new vertices, {} new edges".format(len(new_vertex_attributes["name"]),
+                                                                            len(new_edges)))
 
-    new_edges = set()
+    graph.save(pickle_file_name)
+    return graph
+
+
+def construct_user_hashtag_graph(graph, tweets,  pickle_file_name, start_index=0, verbose=False):
+
+    builder = GraphBuilder(graph, directed=False)
+    user_index = {}
 
     for index, tweet in enumerate(tweets):
         user_id_str = tweet.user.id_str
@@ -173,37 +188,24 @@ def construct_user_hashtag_graph(graph, tweets,  pickle_file_name, start_index=0
         hashtags = [hashtag_dict["text"].lower() for hashtag_dict in tweet.entities.get('hashtags')]
 
         ### CREATE VERTICES ###
-        add_user_vertex(graph, user_id_str, user_screen_name)
+        user_index[user_id_str] = builder.add_user_vertex(user_id_str, user_screen_name)
         for hashtag in hashtags:
-            add_hashtag_vertex(graph, hashtag)
+            builder.add_hashtag_vertex(hashtag)
 
         ### CREATE EDGES ###
 
         # USER TO HASHTAG EDGE
         for hashtag in hashtags:
-            new_edges.add((user_id_str, hashtag))
+            builder.add_edge(user_id_str, hashtag)
 
-        # USER TO USER EDGE
-        all_vertex_ids = graph.vs["id"]
-
-        # this code is flawed because DBManager.get followers/following should be corrected. it currently has a limit to avoid being stuck with one user
-        follower_ids = DBManager.get_or_add_followers_ids(user_id_str)
-        following_ids = DBManager.get_or_add_following_ids(user_id_str)
-
-        for other_vertex_id in all_vertex_ids:
-            if not other_vertex_id == user_id_str:
-                if follower_ids and other_vertex_id in follower_ids:
-                    new_edges.add((other_vertex_id, user_id_str))
+        print("Constructing base graph: Processed {}/{} tweets.".format(index,len(tweets)))
 
-                if following_ids and other_vertex_id in following_ids:
-                    new_edges.add((user_id_str, other_vertex_id))
+    # USER TO USER EDGE, also to and from the vertices of a passed-in graph
+    for source_vertex_id, target_vertex_id in FollowGraphs.get_follow_edges(user_index, verbose, builder.vertex_ids):
+        builder.add_edge_by_id(source_vertex_id, target_vertex_id)
 
-        graph.add_edges(list(new_edges))
-        graph.save(pickle_file_name)
-        new_edges = set()
-        print("Saved {} at tweet index {}".format(pickle_file_name, index))
-        print("Constructing base graph: Processed {}/{} tweets.".format(index,len(tweets)))
-        print()
+    graph = builder.build()
+    graph.save(pickle_file_name)
 
     return graph
 
@@ -246,5 +248,21 @@ def add_tweet_vertex(graph, tweet):
 #     return graph
 
 
+# vs.find with only the name uses igraph's name index instead of scanning every vertex like vs.select
 def exists_in_graph(graph, id):
-    return graph.vcount() > 0 and graph.vs.select(name=str(id)).__len__() > 0
+    if graph.vcount() == 0:
+        return False
+    try:
+        graph.vs.find(name=str(id))
+        return True
+    except (ValueError, KeyError):
+        return False
+
+
+def find_vertex_id(graph, id):
+    if graph.vcount() == 0:
+        return None
+    try:
+        return graph.vs.find(name=str(id)).index
+    except (ValueError, KeyError):
+        return None
@@ -40,6 +40,15 @@ class TweetVerticesSAWeightModifier(EdgeWeightModifierBase):
             # vertex["text"] = "(" + sentiment + ") " + vertex["text"]
         return sentiment
 
+# vertex name -> vertex id; the first vertex wins for duplicate names, like graph.vs.find(name=...)
+def get_vertex_index(graph):
+    vertex_index = {}
+    if graph.vcount() == 0 or "name" not in graph.vs.attributes():
+        return vertex_index
+    for index, name in enumerate(graph.vs["name"]):
+        vertex_index.setdefault(name, index)
+    return vertex_index
+
 def modify_edge_weights(graph, edge_weight_modifiers, params, verbose=False):
     for modifier in edge_weight_modifiers:
         graph = modifier.modify_edge_weights(graph, params, verbose)
@@ -0,0 +1,114 @@
+import numpy
+
+from community_detection import TweetSentiments
+from community_detection.graph_construction.PairScores import UserIdInterner
+
+
+# Features of the tweets that the user vertex weight modifiers need, extracted in one pass over the tweets and
+# shared through the modify_edge_weights params, so chained modifiers do not re-parse the tweets each.
+# User ids are interned, hashtags (lowercased) get integer ids and sentiment labels are cached per classifier.
+
+class TweetFeatureIndex(object):
+
+    def __init__(self, tweets):
+        self.tweets = tweets
+        self.interner = UserIdInterner()
+        self.hashtag_ids = {}
+        self.hashtags = []
+
+        # per tweet: interned author, distinct hashtag ids and interned mentioned users
+        self.tweet_users = numpy.zeros(len(tweets), dtype=numpy.int32)
+        self.tweet_hashtags = []
+        self.tweet_mentions = []
+
+        for index, tweet in enumerate(tweets):
+            self.tweet_users[index] = self.interner.intern(tweet.user.id_str)
+
+            tweet_hashtag_ids = []
+            for hashtag_dict in tweet.entities.get('hashtags'):
+                hashtag_id = self.intern_hashtag(hashtag_dict["text"].lower())
+                if hashtag_id not in tweet_hashtag_ids:
+                    tweet_hashtag_ids.append(hashtag_id)
+            self.tweet_hashtags.append(tuple(tweet_hashtag_ids))
+
+            self.tweet_mentions.append(tuple(self.interner.intern(user_mention_dict["id_str"])
+                                             for user_mention_dict in tweet.entities.get('user_mentions')))
+
+        self.hashtag_users_dict = None
+        # (classifier, with_context) -> sentiment per tweet, None if not classified yet
+        self.sentiments = {}
+
+    def intern_hashtag(self, hashtag):
+        hashtag_id = self.hashtag_ids.get(hashtag, None)
+        if hashtag_id is None:
+            hashtag_id = len(self.hashtags)
+            self.hashtag_ids[hashtag] = hashtag_id
+            self.hashtags.append(hashtag)
+        return hashtag_id
+
+    def __len__(self):
+        return len(self.tweets)
+
+    def get_tweet_indices_with_hashtags(self):
+        return [index for index, tweet_hashtag_ids in enumerate(self.tweet_hashtags) if tweet_hashtag_ids]
+
+    # (interned author, interned mentioned user) arrays with one entry per mention
+    def get_mention_pairs(self):
+        source_indices = [self.tweet_users[index] for index, mentions in enumerate(self.tweet_mentions)
+                          for other_user_index in mentions]
+        target_indices = [other_user_index for mentions in self.tweet_mentions for other_user_index in mentions]
+        return numpy.array(source_indices, dtype=numpy.int64), numpy.array(target_indices, dtype=numpy.int64)
+
+    # hashtag -> set of user id strs
+    def get_hashtag_users_dict(self):
+        if self.hashtag_users_dict is None:
+            self.hashtag_users_dict = {}
+            for user_index, tweet_hashtag_ids in zip(self.tweet_users.tolist(), self.tweet_hashtags):
+                for hashtag_id in tweet_hashtag_ids:
+                    self.hashtag_users_dict.setdefault(self.hashtags[hashtag_id], set()).add(
+                        self.interner.get_user_id(user_index))
+        return self.hashtag_users_dict
+
+    # (hashtag, sentiment) -> set of user id strs for the tweets with a sentiment
+    def get_hashtag_sentiment_users_dict(self, sentiments):
+        hashtag_sentiment_users_dict = {}
+        for user_index, tweet_hashtag_ids, sentiment in zip(self.tweet_users.tolist(), self.tweet_hashtags, sentiments):
+            if sentiment is None:
+                continue
+            for hashtag_id in tweet_hashtag_ids:
+                hashtag_sentiment_users_dict.setdefault((self.hashtags[hashtag_id], sentiment), set()).add(
+                    self.interner.get_user_id(user_index))
+        return hashtag_sentiment_users_dict
+
+    # sentiments aligned with the tweets; tweets in tweet_indices that were not classified with this classifier yet
+    # are classified in batches, the others come from the cache
+    def get_sentiments(self, classifier, with_context, tweet_indices=None, batch_size=500, verbose=False):
+        key = (classifier, with_context)
+        sentiments = self.sentiments.get(key, None)
+        if sentiments is None:
+            sentiments = [None] * len(self.tweets)
+            self.sentiments[key] = sentiments
+
+        if tweet_indices is None:
+            tweet_indices = range(len(self.tweets))
+        missing_indices = [index for index in tweet_indices if sentiments[index] is None]
+        if missing_indices:
+            new_sentiments = TweetSentiments.classify_tweets(self.tweets, classifier, with_context=with_context,
+                                                             tweet_indices=missing_indices, batch_size=batch_size,
+                                                             verbose=verbose)
+            for index in missing_indices:
+                sentiments[index] = new_sentiments[index]
+        return sentiments
+
+    # interned user index -> vertex id (-1 if the user has no vertex); names are matched like graph.vs.find(name=...)
+    def get_user_vertex_ids(self, vertex_index):
+        return numpy.array([vertex_index.get(user_id, -1) for user_id in self.interner.user_ids], dtype=numpy.int64)
+
+
+# the index in params["tweet_features"], built from params["tweets"] and added to params if it is missing
+def get_tweet_feature_index(params):
+    tweet_features = params.get("tweet_features", None)
+    if tweet_features is None:
+        tweet_features = TweetFeatureIndex(params["tweets"])
+        params["tweet_features"] = tweet_features
+    return tweet_features
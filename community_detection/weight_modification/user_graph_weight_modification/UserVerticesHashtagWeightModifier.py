@@ -1,56 +1,42 @@
+import numpy
+
+from community_detection.graph_construction import CoOccurrence
+from community_detection.graph_construction import HubHashtags
 from community_detection.weight_modification.EdgeWeightModifier import EdgeWeightModifierBase
+from community_detection.weight_modification.TweetFeatureIndex import get_tweet_feature_index
 
 
 class UserVerticesHashtagWeightModifier(EdgeWeightModifierBase):
 
-    def modify_edge_weights(self, graph, params, verbose):
-        hashtag_users_dict = {}
-
-        tweets = params["tweets"]
+    # hub_guard: optional HubHashtagGuard that caps, samples or down-weights hashtags with too many users
+    def __init__(self, hub_guard=None):
+        self.hub_guard = hub_guard
 
-        if verbose:
-            print("Constructing (hashtag, sentiment) -> user dictionary.")
-
-        for index, tweet in enumerate(tweets):
-            user_id_str = tweet.user.id_str
-            hashtags = [hashtag_dict["text"].lower() for hashtag_dict in tweet.entities.get('hashtags')]
+    def modify_edge_weights(self, graph, params, verbose):
+        tweet_features = get_tweet_feature_index(params)
 
-            for hashtag in hashtags:
-                hashtag_user_set = self.get_or_add_hashtag_user_set(hashtag_users_dict, hashtag)
-                hashtag_user_set.add(user_id_str)
+        hashtag_users_dict = tweet_features.get_hashtag_users_dict()
 
-            if verbose:
-                print("UserVerticesHashtagWeightModifier: Processed {}/{} tweets".format(index+1, len(tweets)))
+        key_weights = {}
+        if self.hub_guard is not None:
+            guarded_hashtag_users_dict, key_weights = HubHashtags.apply_hub_hashtag_guard(
+                self.hub_guard, {hashtag: sorted(user_set) for hashtag, user_set in hashtag_users_dict.items()})
+            hashtag_users_dict = {hashtag: set(user_list) for hashtag, user_list in guarded_hashtag_users_dict.items()}
 
         if verbose:
             print("Going through edges.")
 
-        total_weight_update = 0
+        # every edge gets the (weighted) number of hashtags both of its users used: the users' rows of the
+        # user x hashtag incidence matrix are intersected for all edges at once
+        shared_hashtag_counts, weight_increments = CoOccurrence.count_shared_keys_per_edge(graph, hashtag_users_dict,
+                                                                                           key_weights)
+        total_weight_update = int(shared_hashtag_counts.sum())
+        if total_weight_update:
+            graph.es["weight"] = (numpy.array(graph.es["weight"]) + weight_increments).tolist()
 
-        for index, edge in enumerate(graph.es):
-            source_vertex_id = edge.source
-            target_vertex_id = edge.target
-            source_vertex_name = graph.vs[source_vertex_id]["name"]
-            target_vertex_name = graph.vs[target_vertex_id]["name"]
-
-            for key, user_set in hashtag_users_dict.items():
-                if source_vertex_name in user_set and target_vertex_name in user_set:
-                    edge["weight"] += 1
-                    total_weight_update +=1
-                    if verbose:
-                        print("New edge weight of {} to {} is {}".format(source_vertex_name, target_vertex_name, edge["weight"]))
-
-            if verbose:
-                print("HashtagWeightModifier: Processed {}/{} edges".format(index+1, len(graph.es)))
+        if verbose:
+            print("HashtagWeightModifier: {}/{} edges share at least one hashtag".format(
+                int(numpy.count_nonzero(shared_hashtag_counts)), graph.ecount()))
 
         print("Hashtag: Modified edges {} times.".format(total_weight_update))
         return graph
-
-    def get_or_add_hashtag_user_set(self, hashtag_users_dict, hashtag):
-        hashtag_user_set = hashtag_users_dict.get(hashtag, None)
-        if not hashtag_user_set:
-            hashtag_user_set = set()
-            hashtag_users_dict[hashtag] = hashtag_user_set
-
-        return hashtag_user_set
-
@@ -1,40 +1,46 @@
-from community_detection.weight_modification.EdgeWeightModifier import EdgeWeightModifierBase
+import numpy
+
+from community_detection.weight_modification.EdgeWeightModifier import EdgeWeightModifierBase, get_vertex_index
+from community_detection.weight_modification.TweetFeatureIndex import get_tweet_feature_index
 
 
 class UserVerticesMentionsWeightModifier(EdgeWeightModifierBase):
 
+    # every mention adds 1 to the edge from the user to the mentioned user and 1 to the edge back, if both edges
+    # exist (in undirected graphs both are the same edge). Vertex names are resolved through one dict, all edge ids
+    # with one get_eids call per direction and the weights are written back once.
     def modify_edge_weights(self, graph, params, verbose):
 
-        tweets = params["tweets"]
-
-        count_weight_modification = 0
-        total_weight_update = 0
-        for index, tweet in enumerate(tweets):
-            user_id_str = tweet.user.id_str
-            # in_reply_to_user_id_str = tweet.in_reply_to_user_id_str # not sure if this is needed
-            mentioned_user_ids = [user_mention_dict["id_str"] for user_mention_dict in tweet.entities.get('user_mentions')]
+        tweet_features = get_tweet_feature_index(params)
 
-            for mentioned_user_id in mentioned_user_ids:
+        user_vertex_ids = tweet_features.get_user_vertex_ids(get_vertex_index(graph))
+        source_user_indices, target_user_indices = tweet_features.get_mention_pairs()
+        this_user_v_indices = user_vertex_ids[source_user_indices]
+        other_user_v_indices = user_vertex_ids[target_user_indices]
+        in_graph = (this_user_v_indices >= 0) & (other_user_v_indices >= 0)
+        this_user_v_indices = this_user_v_indices[in_graph].tolist()
+        other_user_v_indices = other_user_v_indices[in_graph].tolist()
 
-                try:
-                    this_user_v_index = graph.vs.find(name=user_id_str).index
-                    other_user_v_index = graph.vs.find(name=mentioned_user_id).index
+        if verbose:
+            print("UserVerticesMentionsWeightModifier: Resolving {} mentions of {} tweets".format(len(this_user_v_indices),
+                                                                                                 len(tweet_features)))
 
-                    edge1 = graph.es.find(_source=this_user_v_index, _target=other_user_v_index)
-                    edge2 = graph.es.find(_source=other_user_v_index, _target=this_user_v_index)
-
-                    edge1["weight"] += 1
-                    edge2["weight"] += 1
+        total_weight_update = 0
+        if this_user_v_indices and "weight" in graph.es.attributes():
+            edge1_ids = numpy.array(graph.get_eids(pairs=list(zip(this_user_v_indices, other_user_v_indices)),
+                                                   error=False), dtype=numpy.int64)
+            edge2_ids = numpy.array(graph.get_eids(pairs=list(zip(other_user_v_indices, this_user_v_indices)),
+                                                   error=False), dtype=numpy.int64)
+            found = (edge1_ids >= 0) & (edge2_ids >= 0)
 
-                    total_weight_update += 1
-                except Exception as e:
-                    if verbose:
-                        print(e)
+            weights = numpy.array(graph.es["weight"])
+            numpy.add.at(weights, edge1_ids[found], 1)
+            numpy.add.at(weights, edge2_ids[found], 1)
+            graph.es["weight"] = weights.tolist()
 
-            if verbose:
-                print("UserVerticesMentionsWeightModifier: Processed {}/{} tweets".format(index+1, len(tweets)))
+            total_weight_update = int(found.sum())
 
         # if verbose:
         print("Mentions: Modified edges {} times.".format(total_weight_update))
 
-        return graph
\ No newline at end of file
+        return graph
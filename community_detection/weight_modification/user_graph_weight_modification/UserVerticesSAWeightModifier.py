@@ -1,59 +1,40 @@
+import numpy
+
+from community_detection.graph_construction import CoOccurrence
 from community_detection.weight_modification.EdgeWeightModifier import EdgeWeightModifierBase
-from twitter_data.database import DBUtils
+from community_detection.weight_modification.TweetFeatureIndex import get_tweet_feature_index
 
 class UserVerticesSAWeightModifier(EdgeWeightModifierBase):
-    def __init__(self, sentiment_classifier):
+    def __init__(self, sentiment_classifier, batch_size=500):
         self.classifier = sentiment_classifier
+        self.batch_size = batch_size
 
     def modify_edge_weights(self, graph, params, verbose):
-        hashtag_sentiment_users_dict = {}
-        tweets = params["tweets"]
+        tweet_features = get_tweet_feature_index(params)
         with_context = params["with_context"]
 
+        # only tweets with hashtags can add to the weights. They are classified in batches (once per classifier
+        # for all modifiers sharing tweet_features) and, with context, their conversations are fetched in bulk
+        sentiments = tweet_features.get_sentiments(self.classifier, with_context,
+                                                   tweet_indices=tweet_features.get_tweet_indices_with_hashtags(),
+                                                   batch_size=self.batch_size, verbose=verbose)
+
         if verbose:
             print("Constructing (hashtag, sentiment) -> user dictionary.")
-
-        for index, tweet in enumerate(tweets):
-            user_id_str = tweet.user.id_str
-            if with_context:
-                sentiment = self.classifier.classify_sentiment(tweet.text, {"conv_context":[x.text for x in DBUtils.retrieve_full_conversation(tweet.in_reply_to_status_id, [])]})
-            else:
-                sentiment = self.classifier.classify_sentiment(tweet.text, [])
-            hashtags = [hashtag_dict["text"].lower() for hashtag_dict in tweet.entities.get('hashtags')]
-
-            for hashtag in hashtags:
-                hashtag_sentiment_set = self.get_or_add_hashtag_sentiment_set(hashtag_sentiment_users_dict, hashtag, sentiment )
-                hashtag_sentiment_set.add(user_id_str)
-
-            if verbose:
-                print("UserVerticesSAWeightModifier: Processed {}/{} tweets".format(index+1, len(tweets)))
+        hashtag_sentiment_users_dict = tweet_features.get_hashtag_sentiment_users_dict(sentiments)
 
         if verbose:
             print("Going through edges.")
 
-        total_weight_update = 0
-        for index, edge in enumerate(graph.es):
-            source_vertex_id = edge.source
-            target_vertex_id = edge.target
-            source_vertex_name = graph.vs[source_vertex_id]["name"]
-            target_vertex_name = graph.vs[target_vertex_id]["name"]
+        # every edge gets the number of (hashtag, sentiment) keys both of its users have
+        shared_key_counts, weight_increments = CoOccurrence.count_shared_keys_per_edge(graph, hashtag_sentiment_users_dict)
+        total_weight_update = int(shared_key_counts.sum())
+        if total_weight_update:
+            graph.es["weight"] = (numpy.array(graph.es["weight"]) + weight_increments).tolist()
 
-            for key, user_set in hashtag_sentiment_users_dict.items():
-                if source_vertex_name in user_set and target_vertex_name in user_set:
-                    edge["weight"] += 1
-                    total_weight_update += 1
-                    # print("New edge weight of {} to {} is {}".format(source_vertex_name, target_vertex_name, edge["weight"]))
-
-            if verbose:
-                print("SAWeightModifier: Processed {}/{} edges".format(index+1, len(graph.es)))
+        if verbose:
+            print("SAWeightModifier: {}/{} edges share at least one (hashtag, sentiment)".format(
+                int(numpy.count_nonzero(shared_key_counts)), graph.ecount()))
 
         print("SA: Modified edges {} times.".format(total_weight_update))
         return graph
-
-    def get_or_add_hashtag_sentiment_set(self, hashtag_sentiment_users_dict, hashtag, sentiment):
-        hashtag_sentiment_set = hashtag_sentiment_users_dict.get((hashtag, sentiment), None)
-        if not hashtag_sentiment_set:
-            hashtag_sentiment_set = set()
-            hashtag_sentiment_users_dict[(hashtag, sentiment)] = hashtag_sentiment_set
-
-        return hashtag_sentiment_set
\ No newline at end of file
@@ -1,4 +1,5 @@
 import abc
+import os
 import pickle
 import numpy
 from sklearn.feature_extraction.text import TfidfVectorizer
@@ -63,6 +64,14 @@ class SentimentClassifier(object):
         :return: "negative" "positive" or "neutral"
         """
 
+    def classify_sentiments(self, tweet_texts, contextual_info_dicts):
+        """
+        :param tweet_texts: list of strings to be analyzed
+        :param contextual_info_dicts: list of dictionaries aligned with tweet_texts
+        :return: list of "negative" "positive" or "neutral"
+        """
+        return [self.classify_sentiment(tweet_text, contextual_info_dict) for tweet_text, contextual_info_dict in zip(tweet_texts, contextual_info_dicts)]
+
     @abc.abstractmethod
     def get_name(self):
         """
@@ -127,6 +136,7 @@ class KerasClassifier(SentimentClassifier):
 
     def __init__(self, tokenizer_pickle_path, classifier_json_path, classifier_weights_path, with_context=False):
         from keras.models import model_from_json
+        self.classifier_weights_path = classifier_weights_path
         self.tokenizer = pickle.load(open(tokenizer_pickle_path, "rb"))
         self.classifier = model_from_json([line for line in open(classifier_json_path, "r")][0])
         self.classifier.load_weights(classifier_weights_path)
@@ -206,6 +216,28 @@ class KerasClassifier(SentimentClassifier):
         # print("{}\n{}\n\n".format(tweet_text, self.convert_numerical_category_to_word(prediction)))
         return self.convert_numerical_category_to_word(prediction)
 
+    # one predict_on_batch call for all the texts instead of one per text
+    def classify_sentiments(self, tweet_texts, contextual_info_dicts):
+        if len(tweet_texts) == 0:
+            return []
+
+        from keras.preprocessing.sequence import pad_sequences
+        tweet_texts = [self.preprocess(tweet_text) for tweet_text in tweet_texts]
+        tweet_text_sequences = pad_sequences(self.tokenizer.texts_to_sequences(tweet_texts), maxlen=self.MAX_SEQUENCE_LENGTH)
+
+        if self.with_context:
+            conv_text_sequences = numpy.concatenate([self.convert_contextual_tweets_to_word_sequence(contextual_info_dict["conv_context"])
+                                                     for contextual_info_dict in contextual_info_dicts])
+            prediction_probabilities = self.classifier.predict_on_batch([tweet_text_sequences, conv_text_sequences])
+        else:
+            prediction_probabilities = self.classifier.predict_on_batch(tweet_text_sequences)
+
+        predictions = prediction_probabilities.argmax(axis=1)
+        return [self.convert_numerical_category_to_word(prediction) for prediction in predictions]
+
+    def get_name(self):
+        return "Keras_{}".format(os.path.splitext(os.path.basename(self.classifier_weights_path))[0])
+
 class WiebeLexiconClassifier(SentimentClassifier):
     def __init__(self):
         self.preprocessors = [PreProcessing.SplitWordByWhitespace(), PreProcessing.WordToLowercase(),
@@ -0,0 +1,58 @@
+import random
+import unittest
+
+from community_detection.graph_construction import CoOccurrence
+from community_detection.graph_construction import MentionGraphs
+
+
+def score_with_dicts(key_users_dict, score_dict=None, key_weights=None):
+    only_existing_pairs = score_dict is not None
+    score_dict = dict(score_dict) if only_existing_pairs else {}
+    for key, user_list in key_users_dict.items():
+        MentionGraphs.score_user_co_occurrences(user_list, score_dict, only_existing_pairs=only_existing_pairs,
+                                                weight=(key_weights or {}).get(key, 1))
+    return score_dict
+
+
+def get_random_key_users_dict(seed):
+    generator = random.Random(seed)
+    users = [str(user) for user in range(generator.randint(1, 8))]
+    return users, dict((key, [generator.choice(users) for entry in range(generator.randint(0, 10))])
+                       for key in range(generator.randint(0, 5)))
+
+
+class ScoreCoOccurrencesTest(unittest.TestCase):
+
+    # repeated users and self pairs are scored like the dict path
+    def test_repeated_users(self):
+        self.assertEqual({("u", "v"): 2, ("u", "u"): 1}, CoOccurrence.score_co_occurrences({"x": ["v", "u", "u"]}))
+        self.assertEqual({("u", "v"): 1, ("u", "u"): 1}, CoOccurrence.score_co_occurrences({"x": ["u", "u", "v"]}))
+
+    def test_matches_dict_path(self):
+        for seed in range(200):
+            users, key_users_dict = get_random_key_users_dict(seed)
+            key_weights = dict((key, 0.5 * (key + 1)) for key in key_users_dict) if seed % 2 else None
+
+            expected = dict((pair, score) for pair, score in
+                            score_with_dicts(key_users_dict, key_weights=key_weights).items() if score)
+            scores = CoOccurrence.score_co_occurrences(key_users_dict, key_weights=key_weights)
+            self.assertEqual(sorted(expected), sorted(scores))
+            for pair in expected:
+                self.assertAlmostEqual(expected[pair], scores[pair])
+
+    def test_matches_dict_path_for_existing_pairs(self):
+        for seed in range(200):
+            users, key_users_dict = get_random_key_users_dict(seed)
+            generator = random.Random(seed)
+            score_dict = {}
+            for pair in range(6):
+                a, b = sorted([generator.choice(users), generator.choice(users + ["missing"])])
+                score_dict[(a, b)] = generator.randint(0, 3)
+
+            expected = score_with_dicts(key_users_dict, score_dict)
+            scores = CoOccurrence.score_co_occurrences(key_users_dict, dict(score_dict), only_existing_pairs=True)
+            self.assertEqual(expected, scores)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+from community_detection.graph_construction import MentionGraphs
+from community_detection.graph_construction.PairScores import PairScores
+
+
+class Object(object):
+
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+def make_hashtag_tweet(user_id_str, hashtags):
+    return Object(text=" ".join("#" + hashtag for hashtag in hashtags), in_reply_to_status_id=None,
+                  user=Object(id_str=user_id_str, screen_name="u" + user_id_str),
+                  entities={"user_mentions": [], "hashtags": [{"text": hashtag} for hashtag in hashtags]})
+
+
+class ScoreSATest(unittest.TestCase):
+
+    def setUp(self):
+        self.tweets = [make_hashtag_tweet("a", ["x"]),
+                       make_hashtag_tweet("b", ["x"]),
+                       make_hashtag_tweet("c", ["x", "y"]),
+                       make_hashtag_tweet("d", ["y"]),
+                       make_hashtag_tweet("e", ["x"])]
+        self.sentiments = ["positive", "positive", "negative", "negative", "neutral"]
+
+    # users sharing a hashtag with the same sentiment co-occur, neutral tweets are ignored
+    def test_score_sa(self):
+        score_dict = MentionGraphs.score_sa(self.tweets, None, sentiments=self.sentiments)
+
+        self.assertEqual({("a", "b"): 1, ("c", "d"): 1}, score_dict)
+
+    def test_score_sa_optimized_only_scores_existing_pairs(self):
+        score_dict = {("a", "b"): 2, ("a", "c"): 1}
+
+        MentionGraphs.score_sa_optimized(self.tweets, None, score_dict, {"x", "y"}, sentiments=self.sentiments)
+
+        self.assertEqual({("a", "b"): 3, ("a", "c"): 1}, score_dict)
+
+    def test_sparse_scoring_matches(self):
+        score_dict = {("a", "b"): 2, ("c", "d"): 1, ("a", "c"): 1}
+
+        sparse_score_dict = MentionGraphs.score_sa_optimized(self.tweets, None, dict(score_dict), {"x", "y"},
+                                                             sentiments=self.sentiments, sparse=True)
+        MentionGraphs.score_sa_optimized(self.tweets, None, score_dict, {"x", "y"}, sentiments=self.sentiments)
+
+        self.assertEqual({("a", "b"): 3, ("c", "d"): 2, ("a", "c"): 1}, score_dict)
+        self.assertEqual(score_dict, sparse_score_dict)
+
+
+class PackedScoresTest(unittest.TestCase):
+
+    # a user repeated on a hashtag and a self pair score the same as with score dicts
+    def test_score_hashtags_optimized_matches_score_dict(self):
+        tweets = [make_hashtag_tweet("u", ["x"]),
+                  make_hashtag_tweet("v", ["x"]),
+                  make_hashtag_tweet("u", ["x"]),
+                  make_hashtag_tweet("u", ["x", "y"]),
+                  make_hashtag_tweet("v", ["y"])]
+        score_dict = {("u", "v"): 1, ("u", "u"): 1}
+
+        pair_scores = MentionGraphs.score_hashtags_optimized(tweets, PairScores.from_score_dict(score_dict),
+                                                             {"x", "y"})
+        MentionGraphs.score_hashtags_optimized(tweets, score_dict, {"x", "y"})
+
+        self.assertEqual({("u", "v"): 5, ("u", "u"): 3}, score_dict)
+        self.assertEqual(score_dict, pair_scores.to_score_dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from community_detection.graph_construction import StreamingGraphs
+
+
+class Object(object):
+
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+def make_mention_tweet(user_id_str, mentioned_user_id_str, hashtags=()):
+    return Object(text="@u{}".format(mentioned_user_id_str), in_reply_to_status_id=None,
+                  user=Object(id_str=user_id_str, screen_name="u" + user_id_str),
+                  entities={"user_mentions": [{"id_str": mentioned_user_id_str,
+                                               "screen_name": "u" + mentioned_user_id_str}],
+                            "hashtags": [{"text": hashtag} for hashtag in hashtags]})
+
+
+def make_hashtag_tweet(user_id_str, hashtags):
+    return Object(text=" ".join("#" + hashtag for hashtag in hashtags), in_reply_to_status_id=None,
+                  user=Object(id_str=user_id_str, screen_name="u" + user_id_str),
+                  entities={"user_mentions": [], "hashtags": [{"text": hashtag} for hashtag in hashtags]})
+
+
+class NeutralClassifier(object):
+
+    def classify_sentiments(self, tweet_texts, contextual_info_dicts):
+        return ["neutral"] * len(tweet_texts)
+
+
+def get_named_edges(graph):
+    names = graph.vs["name"]
+    return sorted(tuple(sorted((names[source], names[target]))) for source, target in graph.get_edgelist())
+
+
+class UpdateUserMentionHashtagSAGraphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+
+    # c-d scores 1/4 after the first batch and 3/4 after the second one, without the max score changing
+    def test_pair_crosses_threshold_through_mention_count(self):
+        first_batch = [make_mention_tweet("a", "b")] * 4 + [make_mention_tweet("c", "d")]
+        second_batch = [make_mention_tweet("c", "d")] * 2
+
+        StreamingGraphs.update_user_mention_hashtag_sa_graph(first_batch, None, "updated.pickle", THRESHOLD=0.5)
+        updated_graph = StreamingGraphs.update_user_mention_hashtag_sa_graph(second_batch, None, "updated.pickle",
+                                                                             THRESHOLD=0.5)
+        rebuilt_graph = StreamingGraphs.construct_user_mention_hashtag_sa_graph_from_tweets(
+            first_batch + second_batch, None, "rebuilt.pickle", THRESHOLD=0.5)
+
+        self.assertEqual([("a", "b"), ("c", "d")], get_named_edges(rebuilt_graph))
+        self.assertEqual(get_named_edges(rebuilt_graph), get_named_edges(updated_graph))
+
+    # mentions compacted while the batch is added still count as mentioned again
+    def test_mentions_compacted_during_update(self):
+        first_batch = [make_mention_tweet("a", "b")] * 4 + [make_mention_tweet("c", "d")]
+        second_batch = [make_mention_tweet("c", "d")] * 2 + [make_mention_tweet("e", "f")]
+
+        accumulator = StreamingGraphs.MentionHashtagSAAccumulator(None, compact_every=1)
+        accumulator.add_tweets(first_batch)
+        graph, final_scores = accumulator.finish()
+        graph.add_edges(StreamingGraphs.get_pairs_above_threshold(final_scores, 0.5))
+        accumulator.threshold = 0.5
+
+        accumulator.update(graph, second_batch, None)
+
+        self.assertEqual([("a", "b"), ("c", "d")], get_named_edges(graph))
+
+    # only d, the larger user id of c-d, gets a new hashtag, which it shares with c
+    def test_pair_crosses_threshold_through_new_hashtag(self):
+        first_batch = [make_mention_tweet("a", "b")] * 4 + [make_mention_tweet("c", "d", ["x"])]
+        second_batch = [make_hashtag_tweet("d", ["x"])]
+
+        accumulator = StreamingGraphs.MentionHashtagSAAccumulator(NeutralClassifier(), with_context=False)
+        accumulator.add_tweets(first_batch)
+        graph, final_scores = accumulator.finish()
+        graph.add_edges(StreamingGraphs.get_pairs_above_threshold(final_scores, 0.5))
+        accumulator.threshold = 0.5
+
+        accumulator.update(graph, second_batch, NeutralClassifier())
+
+        self.assertEqual([("a", "b"), ("c", "d")], get_named_edges(graph))
+
+
+if __name__ == "__main__":
+    unittest.main()
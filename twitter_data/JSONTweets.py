@@ -0,0 +1,46 @@
+class JSONTweetAdapter(object):
+    # Keeps only the fields graph construction needs from a raw tweet json instead of a full tweepy Status.
+    # Exposes the same attributes (id, text, in_reply_to_status_id, user.id_str, user.screen_name, entities)
+    # so it can be used wherever tweet objects are expected.
+
+    __slots__ = ["id", "text", "in_reply_to_status_id", "user", "entities"]
+
+    def __init__(self, tweet_json):
+        self.id = tweet_json["id"]
+        self.text = tweet_json["text"]
+        self.in_reply_to_status_id = tweet_json.get("in_reply_to_status_id", None)
+
+        self.user = JSONTweetAdapterUser(tweet_json["user"]["id_str"], tweet_json["user"]["screen_name"])
+
+        entities = tweet_json.get("entities", {})
+        mentions_dict_list = [{"id_str": mention["id_str"], "screen_name": mention["screen_name"]}
+                              for mention in entities.get("user_mentions", [])]
+        hashtag_dict_list = [{"text": hashtag["text"]} for hashtag in entities.get("hashtags", [])]
+
+        self.entities = {'user_mentions': mentions_dict_list, 'hashtags': hashtag_dict_list}
+
+    def __str__(self):
+        return " - ".join([self.user.screen_name, self.text])
+
+    def __repr__(self):
+        return " - ".join([self.user.screen_name, self.text])
+
+
+class JSONTweetAdapterUser(object):
+
+    __slots__ = ["id_str", "screen_name"]
+
+    def __init__(self, id_str, screen_name):
+        self.id_str = id_str
+        self.screen_name = screen_name
+
+
+# skips rate limit responses (having limit in json) and malformed tweets like Utils.load_tweet_objects_from_json_files
+def parse_json_tweets(tweet_json_generator):
+    for tweet_json in tweet_json_generator:
+        if "limit" in tweet_json:
+            continue
+        try:
+            yield JSONTweetAdapter(tweet_json)
+        except Exception as e:
+            print(e)
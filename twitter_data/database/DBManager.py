@@ -91,6 +91,26 @@ def get_or_add_tweet_db_given_json(tweet_json):
 def get_or_add_tweet(tweet_id):
     return get_or_add(tweet_id, tweet_collection, TweepyHelper.retrieve_tweet, Status.parse)
 
+# tweet id -> tweet (None if unavailable) with one query for all ids in the database; ids that are not in the
+# database yet go through get_or_add_tweet
+def get_tweets(tweet_ids):
+    tweet_ids = list(tweet_ids)
+    tweets = {}
+    try:
+        for from_db in tweet_collection.find({"id": {"$in": tweet_ids}}):
+            from_db = json.loads(dumps(from_db))
+            if UNAVAILABLE_KEY in from_db:
+                tweets[from_db["id"]] = None
+            else:
+                tweets[from_db["id"]] = Status.parse(TweepyHelper.api, from_db)
+    except Exception as e:
+        print("Get tweets exception: {}".format(e))
+
+    for tweet_id in tweet_ids:
+        if tweet_id not in tweets:
+            tweets[tweet_id] = get_or_add_tweet(tweet_id)
+    return tweets
+
 def delete_tweet(tweet_id):
     tweet_collection.delete_one({"id":tweet_id})
 
@@ -23,3 +23,26 @@ def retrieve_full_conversation(tweet_id, curr_list):
 
     curr_list.append(tweet)
     return retrieve_full_conversation(tweet.in_reply_to_status_id, curr_list)
+
+
+# tweet id -> retrieve_full_conversation(tweet_id, []) for all tweet_ids. The conversations are fetched one reply
+# level at a time with one DBManager.get_tweets call per level, and tweets shared by conversations are fetched once.
+def retrieve_full_conversations(tweet_ids):
+    conversation_tweets = {}
+    to_fetch = {tweet_id for tweet_id in tweet_ids if tweet_id is not None}
+    while to_fetch:
+        fetched_tweets = DBManager.get_tweets(to_fetch)
+        conversation_tweets.update(fetched_tweets)
+        to_fetch = {tweet.in_reply_to_status_id for tweet in fetched_tweets.values()
+                    if tweet and tweet.in_reply_to_status_id is not None
+                    and tweet.in_reply_to_status_id not in conversation_tweets}
+
+    conversations = {}
+    for tweet_id in tweet_ids:
+        conversation = []
+        tweet = conversation_tweets.get(tweet_id, None)
+        while tweet:
+            conversation.append(tweet)
+            tweet = conversation_tweets.get(tweet.in_reply_to_status_id, None)
+        conversations[tweet_id] = conversation
+    return conversations
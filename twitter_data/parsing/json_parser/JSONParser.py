@@ -10,7 +10,8 @@ def parse_files_into_json_generator(files):
 # This method assumes that the file contains one valid JSON string per line
 def parse_file_into_json_generator(file):
     with file.open() as f:
-        for line in f.readlines():
+        # iterating the file object reads one line at a time instead of loading the whole file
+        for line in f:
             if line.strip() != "":
                 try:
                     yield json.loads(line)